@@ -2,27 +2,37 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
+from scripts.aqi import proxy_aqi
+from scripts.dashboard_data import DashboardData, latest_row
+
 # URLs to CSVs in your GitHub repo
 DATA_CLEAN_URL = "https://raw.githubusercontent.com/Ravihakhan21/pearls-aqi-predictor/main/data/hourly_clean_updated.csv"
 PRED_CSV_URL   = "https://raw.githubusercontent.com/Ravihakhan21/pearls-aqi-predictor/main/data/predictions_72h.csv"
 
+# Same files in a local checkout (AQI_DATA_SOURCE=local)
+DATA_CLEAN_PATH = "data/hourly_clean_updated.csv"
+PRED_CSV_PATH   = "data/predictions_72h.csv"
+
+@st.cache_resource
+def get_data() -> DashboardData:
+    # One instance per server process: keeps the parsed frames between reruns
+    return DashboardData.from_env(
+        urls={"history": DATA_CLEAN_URL, "predictions": PRED_CSV_URL},
+        local_paths={"history": DATA_CLEAN_PATH, "predictions": PRED_CSV_PATH},
+    )
 
 st.set_page_config(page_title="PEARLS AQI Forecast", layout="wide")
 st.title("🌍 PEARLS — Live AQI & 72-hour Forecast")
 
-def compute_aqi_row(row):
-    return (row.get('co', 0) * 0.02 +
-            row.get('no2', 0) * 0.6 +
-            row.get('o3', 0) * 0.3 +
-            row.get('so2', 0) * 0.5)
+data = get_data()
 
 # Sidebar: latest snapshot
 st.sidebar.header("Latest observed data")
 try:
-    df = pd.read_csv(DATA_CLEAN_URL, parse_dates=['timestamp'])
+    df = data.history()
     if not df.empty:
-        latest = df.sort_values('timestamp').iloc[-1]
-        latest_aqi = latest['aqi'] if 'aqi' in latest and pd.notna(latest['aqi']) else compute_aqi_row(latest)
+        latest = latest_row(df)
+        latest_aqi = latest['aqi'] if 'aqi' in latest and pd.notna(latest['aqi']) else proxy_aqi(latest, missing=0)
         st.sidebar.write("Timestamp:", latest['timestamp'])
         st.sidebar.metric("Current AQI (calc)", float(latest_aqi))
         st.sidebar.caption("Latest pollutants / weather")
@@ -31,12 +41,12 @@ try:
     else:
         st.sidebar.warning("Clean data exists but is empty.")
 except Exception:
-    st.sidebar.warning("Could not fetch latest clean data from GitHub.")
+    st.sidebar.warning(f"Could not fetch latest clean data ({data.source}).")
 
 # Main: forecast
 st.header("Next 72 hours — Forecast")
 try:
-    pred = pd.read_csv(PRED_CSV_URL, parse_dates=['timestamp'])
+    pred = data.predictions()
     if not pred.empty:
         st.line_chart(pred.set_index('timestamp')['pred_aqi'])
         st.subheader("Forecast table")
@@ -47,4 +57,4 @@ try:
     else:
         st.info("Predictions file exists but is empty.")
 except Exception:
-    st.info("Could not fetch predictions file from GitHub.")
+    st.info(f"Could not fetch predictions file ({data.source}).")
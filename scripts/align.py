@@ -0,0 +1,112 @@
+# scripts/align.py
+"""
+Put several timestamped sources on one canonical hourly grid.
+
+Exact-timestamp merges break as soon as two sources disagree by a few minutes
+(a live record at 17:08:15 never meets Open-Meteo's 17:00), and concatenating
+them leaves one row per raw record. Here every source is instead bucketed onto
+the grid the same way clean_aqi_json_v2.py builds the live history:
+
+    grid      every hour from the earliest to the latest source hour
+    bucket    each record belongs to the hour it falls in (timestamp floored,
+              so 04:35 stays in 04:00); an hour with several records takes the
+              LAST one, with skipna each column separately its last non-null
+    overlap   a column present in several sources (e.g. an old dataset plus
+              newer live rows) takes the first non-null in source order
+
+Sorting is O(n log n) per source and each bucket join is one linear pass over
+the sorted grid, so long multi-source histories stay cheap. fill_gaps() then
+interpolates every column in one 2-D pass.
+
+    from align import align_sources, fill_gaps
+    merged = align_sources({"pollutants": df_om, "weather": df_weather})
+    merged = fill_gaps(merged)
+"""
+import numpy as np
+import pandas as pd
+
+FREQ = "h"
+
+
+def _sorted_source(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """timestamp + `columns`, without unparseable timestamps, sorted (stable: later duplicates stay later)."""
+    src = df[["timestamp", *columns]].copy(deep=False)
+    src["timestamp"] = pd.to_datetime(src["timestamp"], errors="coerce").astype("datetime64[ns]")
+    return src.dropna(subset=["timestamp"]).sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def hourly_grid(start, end, freq: str = FREQ) -> pd.DataFrame:
+    """One row per `freq` step covering the buckets of [start, end]."""
+    start, end = pd.Timestamp(start).floor(freq), pd.Timestamp(end).floor(freq)
+    return pd.DataFrame({"timestamp": pd.date_range(start, end, freq=freq).astype("datetime64[ns]")})
+
+
+def bucket_last(source: pd.DataFrame, columns: list = None, freq: str = FREQ, skipna: bool = True) -> pd.DataFrame:
+    """
+    One row per `freq` bucket (timestamp floored): the last record in it, or
+    with `skipna` each column's last non-null value (GroupBy.last skips NaN,
+    as clean_aqi_json_v2.hourly_last does).
+    """
+    columns = [c for c in source.columns if c != "timestamp"] if columns is None else list(columns)
+    src = _sorted_source(source, columns)
+    src["timestamp"] = src["timestamp"].dt.floor(freq)
+    if skipna:
+        return src.groupby("timestamp", as_index=False, sort=True)[columns].last()
+    return src.drop_duplicates("timestamp", keep="last").reset_index(drop=True)
+
+
+def bucket_join(grid: pd.DataFrame, source: pd.DataFrame, columns: list = None, freq: str = FREQ,
+                skipna: bool = True) -> pd.DataFrame:
+    """`columns` of `source` at each grid timestamp (NaN for hours without a record)."""
+    columns = [c for c in source.columns if c != "timestamp"] if columns is None else list(columns)
+    buckets = bucket_last(source, columns, freq, skipna).set_index("timestamp")
+    joined = buckets.reindex(grid["timestamp"])[columns]
+    joined.index = grid.index
+    return joined
+
+
+def align_sources(sources: dict, columns: dict = None, freq: str = FREQ, start=None, end=None,
+                  keep_empty: bool = False, skipna: bool = True) -> pd.DataFrame:
+    """
+    {name: DataFrame with a timestamp column} → one frame on the `freq` grid:
+    timestamp + every source column (in source order). `columns` optionally
+    picks columns per source. Grid rows no source reached are dropped unless
+    `keep_empty`.
+    """
+    columns = columns or {}
+    picked = {name: columns.get(name) or [c for c in df.columns if c != "timestamp"]
+              for name, df in sources.items()}
+
+    if start is None or end is None:
+        ts = [pd.to_datetime(df["timestamp"], errors="coerce") for df in sources.values() if len(df)]
+        ts = [t for t in ts if t.notna().any()]
+        if not ts:
+            return pd.DataFrame({"timestamp": pd.Series(dtype="datetime64[ns]"),
+                                 **{c: pd.Series(dtype=float) for cols in picked.values() for c in cols}})
+        start = min(t.min() for t in ts) if start is None else start
+        end = max(t.max() for t in ts) if end is None else end
+    grid = hourly_grid(start, end, freq)
+
+    out = grid.copy()
+    for name, df in sources.items():
+        joined = bucket_join(grid, df, picked[name], freq, skipna)
+        for c in picked[name]:
+            # A column several sources provide: the earlier source wins where it has a value
+            out[c] = out[c].fillna(joined[c]) if c in out.columns else joined[c].to_numpy()
+
+    if not keep_empty:
+        values = out.drop(columns="timestamp")
+        out = out[values.notna().any(axis=1).to_numpy()].reset_index(drop=True)
+    return out
+
+
+def fill_gaps(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
+    """
+    Linear interpolation, then back/forward fill at the edges, for all
+    `columns` (default: every numeric one) in one 2-D pass — the same values
+    as the per-column interpolate().bfill().ffill() loop.
+    """
+    columns = list(df.select_dtypes(include=np.number).columns) if columns is None else list(columns)
+    out = df.copy(deep=False)
+    out[columns] = out[columns].interpolate().bfill().ffill()
+    return out
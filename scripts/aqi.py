@@ -0,0 +1,89 @@
+# scripts/aqi.py
+"""
+AQI calculations shared by the whole pipeline, as column-wise array operations.
+
+- proxy_aqi():      the linear EPA-style proxy used for the live data
+                    AQI = 0.02*CO + 0.6*NO2 + 0.3*O3 + 0.5*SO2
+- breakpoint_aqi(): US-EPA-style breakpoint sub-indices (max over pollutants),
+                    used when building the historic training set
+"""
+import numpy as np
+import pandas as pd
+
+POLLUTANTS = ["co", "no2", "o3", "so2"]
+
+PROXY_WEIGHTS = {"co": 0.02, "no2": 0.6, "o3": 0.3, "so2": 0.5}
+
+# Simplified AQI breakpoints for pollutants (values in µg/m³ or ppb approximations)
+# (c_low, c_high, i_low, i_high)
+BREAKPOINTS = {
+    'co': [
+        (0.0, 4400, 0, 50),
+        (4500, 9400, 51, 100),
+        (9500, 12400, 101, 150),
+        (12500, 15400, 151, 200),
+    ],
+    'no2': [
+        (0, 53, 0, 50),
+        (54, 100, 51, 100),
+        (101, 360, 101, 150),
+    ],
+    'o3': [
+        (0, 54, 0, 50),
+        (55, 70, 51, 100),
+        (71, 85, 101, 150),
+    ],
+    'so2': [
+        (0, 35, 0, 50),
+        (36, 75, 51, 100),
+        (76, 185, 101, 150),
+    ]
+}
+
+
+def _column(data, col: str, missing=np.nan):
+    """Column as a float array (non-numeric → NaN), or `missing` if the column is absent."""
+    if isinstance(data, pd.DataFrame):
+        if col not in data.columns:
+            return np.full(len(data), missing, dtype=float)
+        s = data[col]
+        if not pd.api.types.is_numeric_dtype(s):
+            s = pd.to_numeric(s, errors="coerce")
+        return s.to_numpy(dtype=float)
+    # Single row (Series / dict)
+    value = data.get(col, missing)
+    return np.nan if value is None else float(pd.to_numeric(value, errors="coerce"))
+
+
+def proxy_aqi(data, missing=np.nan):
+    """
+    Linear proxy AQI for a DataFrame (→ Series) or a single row / dict (→ float).
+    Absent pollutant columns count as `missing` (NaN by default).
+    """
+    total = sum(w * _column(data, col, missing) for col, w in PROXY_WEIGHTS.items())
+    if isinstance(data, pd.DataFrame):
+        return pd.Series(total, index=data.index)
+    return float(total)
+
+
+def subindex(values: np.ndarray, breakpoints) -> np.ndarray:
+    """
+    Piecewise-linear sub-index for a whole column. Values in the gaps between
+    ranges (e.g. CO 4400–4500), above the table or NaN get NaN, i.e. no sub-index.
+    """
+    values = np.asarray(values, dtype=float)
+    c_low, c_high, i_low, i_high = (np.asarray(col, dtype=float) for col in zip(*breakpoints))
+    # Candidate range = last one whose c_low <= value; valid only if value <= its c_high
+    idx = np.searchsorted(c_low, values, side="right") - 1
+    j = np.clip(idx, 0, None)
+    slope = (i_high - i_low) / (c_high - c_low)
+    out = slope[j] * (values - c_low[j]) + i_low[j]
+    out[(idx < 0) | ~(values <= c_high[j])] = np.nan
+    return out
+
+
+def breakpoint_aqi(df: pd.DataFrame, breakpoints=BREAKPOINTS) -> pd.Series:
+    """AQI = max sub-index over the pollutants present; NaN if none has one."""
+    subs = np.stack([subindex(_column(df, pol), breakpoints[pol]) for pol in POLLUTANTS])
+    # fmax ignores NaN and stays NaN only when every pollutant is NaN
+    return pd.Series(np.fmax.reduce(subs, axis=0), index=df.index)
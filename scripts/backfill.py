@@ -0,0 +1,159 @@
+# scripts/backfill.py
+"""
+Concurrent, rate-limited, resumable backfill engine (used by fetch_historic_data.py).
+
+- TokenBucket:   shared request budget (rate/s, burst) across all worker threads
+- with_retries:  exponential backoff + jitter for transient failures
+                 (connection errors, timeouts, HTTP 429 / 5xx)
+- Checkpoint:    JSONL file, one line per finished unit (e.g. one day). It is
+                 both the incremental output and the progress record: every unit
+                 is flushed as soon as it completes, and a rerun only fetches
+                 the keys that are not in the file yet. A line cut off by a
+                 crash is ignored (that unit is simply fetched again). Units
+                 that can still change (e.g. today) are returned but never
+                 checkpointed, so the next run fetches them again.
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+
+class RetryableError(Exception):
+    """Transient failure (network, 429, 5xx): try again after a backoff."""
+
+
+class PermanentError(Exception):
+    """Failure that retrying will not fix (e.g. 400/401/403): give up on this unit."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up."""
+
+    def __init__(self, rate: float, burst: int = 1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(self.burst)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until one token is available and take it."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+def with_retries(fn, retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0, sleep=time.sleep):
+    """Call fn(); on RetryableError wait base_delay * 2**attempt (± jitter) and try again."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except RetryableError:
+            if attempt == retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            sleep(delay * random.uniform(0.5, 1.0))
+
+
+class Checkpoint:
+    """Append-only JSONL of finished units: {"key": ..., "data": ...} per line."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._repaired = False
+
+    def items(self):
+        """(key, data) for every complete line; later lines win for a repeated key."""
+        if not self.path.exists():
+            return {}
+        done = {}
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue                      # truncated by a crash
+                done[entry["key"]] = entry["data"]
+        return done
+
+    def done(self) -> set:
+        return set(self.items())
+
+    def write(self, key: str, data) -> None:
+        line = json.dumps({"key": key, "data": data}, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                # A crash can leave a partial last line; start on a fresh one
+                if not self._repaired and f.tell() and not self._ends_with_newline():
+                    f.write("\n")
+                self._repaired = True
+                f.write(line)
+                f.flush()
+
+    def _ends_with_newline(self) -> bool:
+        with self.path.open("rb") as f:
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+
+def run_backfill(keys, fetch_one, checkpoint: Checkpoint, workers: int = 4, bucket: TokenBucket = None,
+                 retries: int = 5, base_delay: float = 1.0, log=print, is_final=None) -> dict:
+    """
+    fetch_one(key) → JSON-serialisable data, for every key not yet in the checkpoint,
+    on `workers` threads sharing `bucket`. Failed keys — any exception, not just
+    RetryableError / PermanentError — are reported (and left out of the
+    checkpoint, so the next run tries them again). Keys for which
+    `is_final(key)` is false are fetched but only returned in summary["partial"].
+    """
+    keys = list(keys)
+    done = checkpoint.done()
+    todo = [k for k in keys if k not in done]
+    summary = {"total": len(keys), "skipped": len(keys) - len(todo), "fetched": 0, "failed": {}, "partial": {}}
+    if not todo:
+        return summary
+
+    def attempt(key):
+        def once():
+            if bucket is not None:
+                bucket.acquire()
+            return fetch_one(key)
+        return with_retries(once, retries=retries, base_delay=base_delay)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(attempt, k): k for k in todo}
+        for fut in as_completed(futures):
+            key = futures[fut]
+            try:
+                data = fut.result()
+            except (RetryableError, PermanentError) as e:
+                summary["failed"][key] = str(e)
+                log(f"⚠️ {key}: {e}")
+                continue
+            except Exception as e:                  # a bug or odd record must not sink the other keys
+                summary["failed"][key] = f"{type(e).__name__}: {e}"
+                log(f"❌ {key}: {type(e).__name__}: {e}")
+                continue
+            summary["fetched"] += 1
+            if is_final is not None and not is_final(key):
+                summary["partial"][key] = data
+                log(f"🔄 {key} (incomplete, not checkpointed)")
+                continue
+            checkpoint.write(key, data)
+            log(f"✅ {key}")
+    return summary
@@ -0,0 +1,250 @@
+# scripts/backtest.py
+"""
+Walk-forward backtest: replay predict_live.py's 72-hour forecast from many
+historical origins and score it against the AQI that was actually observed.
+
+✅ History features come from the feature store once (scripts/feature_store.py);
+   each origin only needs its own feature row / a few recent AQI values
+✅ Recursive mode advances all origins of a chunk in lockstep (one predict per
+   horizon step for the whole chunk), direct mode is one predict per chunk —
+   same per-row results as running predict_live.py at each origin
+✅ Chunks of origins run on a process pool; every worker loads the model once
+✅ Output: per-horizon MAE / RMSE / bias table (+ optional raw forecasts)
+
+    python scripts/backtest.py                                   # recursive, one origin per day
+    python scripts/backtest.py --mode both --every 6 --start 2025-08-01 --workers 4
+    python scripts/backtest.py --data data/final_training_dataset_v3.csv --save-forecasts
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import predict_live as pl
+from columnar_store import load_frame
+from direct_forecast import direct_forecast_matrix
+from feature_store import load_features
+from flat_forest import load_model
+from forest_intervals import make_predictor
+from incremental_features import IncrementalFeatureState
+
+HORIZON_CSV   = Path("models/backtest_horizons.csv")
+REPORT_JSON   = Path("models/backtest_report.json")
+FORECASTS_CSV = Path("models/backtest_forecasts.csv")   # --save-forecasts
+
+MODEL_PATHS = {"recursive": pl.MODEL_PATH, "direct": pl.DIRECT_MODEL_PATH}
+CHUNK_ORIGINS = 256          # origins per task (one lockstep batch)
+SUMMARY_HORIZONS = [1, 3, 6, 12, 24, 48, 72]
+
+# ========================
+# 🧮 WORKER SIDE
+# ========================
+_shared = {}
+
+
+def _init_worker(hist: pd.DataFrame, hist_fe: pd.DataFrame, feature_cols: list, model_paths: dict):
+    _shared.update(hist=hist, hist_fe=hist_fe, feature_cols=feature_cols,
+                   models={mode: load_model(path) for mode, path in model_paths.items()},
+                   scaler=pl.load_scaler_if_exists())
+
+
+def _forecast_chunk(mode: str, hist_pos: np.ndarray, fe_pos: np.ndarray, hours: int) -> np.ndarray:
+    """(n_origins, hours) point forecasts for one chunk of origins."""
+    hist, hist_fe = _shared["hist"], _shared["hist_fe"]
+    feature_cols, model, scaler = _shared["feature_cols"], _shared["models"][mode], _shared["scaler"]
+    last_times = list(hist_fe["timestamp"].iloc[fe_pos])
+
+    if mode == "direct":
+        origin_scaled = pl.apply_scaler(hist_fe.iloc[fe_pos][feature_cols], scaler)
+        X = np.vstack([direct_forecast_matrix(row, t, hours) for row, t in zip(origin_scaled, last_times)])
+        return make_predictor(model)(X)["pred_aqi"].reshape(len(fe_pos), hours)
+
+    # History as predict_live would have seen it at each origin: rows up to and including it
+    size = IncrementalFeatureState().size
+    states = [IncrementalFeatureState.from_history(hist.iloc[max(0, i + 1 - size):i + 1]) for i in hist_pos]
+    bases = [pl.forward_fill_future_base_row(hist.iloc[i]) for i in hist_pos]
+    outs = pl.recursive_forecast_lockstep(states, bases, last_times, feature_cols, model, scaler, hours,
+                                          names=[str(t) for t in last_times])
+    return outs["pred_aqi"]
+
+
+# ========================
+# 🗂 ORIGINS + SCORING
+# ========================
+def select_origins(hist_fe: pd.DataFrame, truth_end: pd.Timestamp, start=None, end=None,
+                   every: int = 24, hours: int = pl.FORECAST_HOURS, max_origins: int = None) -> np.ndarray:
+    """
+    Positions in hist_fe of the forecast origins: feature rows in [start, end]
+    whose whole horizon lies inside the observed history, at least `every`
+    hours apart. With `max_origins`, the most recent ones are kept.
+    """
+    ts = hist_fe["timestamp"]
+    ok = ts <= truth_end - timedelta(hours=hours)
+    if start is not None:
+        ok &= ts >= pd.Timestamp(start)
+    if end is not None:
+        ok &= ts <= pd.Timestamp(end)
+    picked, next_allowed = [], None
+    for pos, t in zip(np.flatnonzero(ok.to_numpy()), ts[ok]):
+        if next_allowed is None or t >= next_allowed:
+            picked.append(pos)
+            next_allowed = t + timedelta(hours=every)
+    picked = np.asarray(picked, dtype=np.intp)
+    return picked[-max_origins:] if max_origins else picked
+
+
+def score_horizons(pred: np.ndarray, actual: np.ndarray) -> pd.DataFrame:
+    """Per-horizon n / MAE / RMSE / bias over origins (NaN actuals = missing hours, skipped)."""
+    err = pred - actual
+    ok = ~np.isnan(err)
+    n = ok.sum(axis=0)
+    abs_err = np.where(ok, np.abs(err), 0.0)
+    sq_err = np.where(ok, err ** 2, 0.0)
+    signed = np.where(ok, err, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "horizon": np.arange(1, pred.shape[1] + 1),
+            "n": n,
+            "mae": abs_err.sum(axis=0) / n,
+            "rmse": np.sqrt(sq_err.sum(axis=0) / n),
+            "bias": signed.sum(axis=0) / n,
+        })
+
+
+def table_cell(value) -> str:
+    """One 8-wide MAE cell of the printed summary ("n/a" when nothing was observed)."""
+    return f"{'n/a':>8}" if value is None else f"{value:8.2f}"
+
+
+def run_backtest(hist: pd.DataFrame, hist_fe: pd.DataFrame, feature_cols: list, origins: np.ndarray,
+                 modes: list, hours: int = pl.FORECAST_HOURS, workers: int = 1) -> dict:
+    """{mode: (n_origins, hours) forecasts}, origins split into chunks over `workers` processes."""
+    # hist row of each origin (clean history is hourly-unique; keep the last on duplicates)
+    pos_of = pd.Series(np.arange(len(hist)), index=hist["timestamp"].to_numpy())
+    pos_of = pos_of[~pos_of.index.duplicated(keep="last")]
+    hist_pos = pos_of.reindex(hist_fe["timestamp"].iloc[origins].to_numpy()).to_numpy()
+    if np.isnan(hist_pos).any():
+        raise ValueError("Feature rows without a matching history row — rebuild the feature store.")
+    hist_pos = hist_pos.astype(np.intp)
+
+    n_chunks = max(workers, -(-len(origins) // CHUNK_ORIGINS))
+    chunks = [c for c in np.array_split(np.arange(len(origins)), n_chunks) if len(c)]
+    tasks = [(mode, hist_pos[c], origins[c], hours) for mode in modes for c in chunks]
+    model_paths = {mode: MODEL_PATHS[mode] for mode in modes}
+
+    if workers == 1:
+        _init_worker(hist, hist_fe, feature_cols, model_paths)
+        results = [_forecast_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(hist, hist_fe, feature_cols, model_paths)) as pool:
+            results = list(pool.map(_forecast_chunk, *zip(*tasks)))
+
+    per_mode = {mode: [] for mode in modes}
+    for (mode, *_), res in zip(tasks, results):
+        per_mode[mode].append(res)
+    return {mode: np.vstack(parts) for mode, parts in per_mode.items()}
+
+
+def main(data_csv: Path = pl.DATA_CSV, mode: str = "recursive", start=None, end=None, every: int = 24,
+         max_origins: int = None, hours: int = pl.FORECAST_HOURS, workers: int = None,
+         save_forecasts: bool = False):
+    workers = workers or os.cpu_count() or 1
+    modes = ["recursive", "direct"] if mode == "both" else [mode]
+    for m in modes:
+        if not (MODEL_PATHS[m].exists() or pl.flat_path(MODEL_PATHS[m]).exists()):
+            raise FileNotFoundError(f"Model not found: {MODEL_PATHS[m]}")
+
+    # ========================
+    # 📥 1. HISTORY + SHARED FEATURES
+    # ========================
+    hist = load_frame(data_csv).sort_values("timestamp", kind="stable").reset_index(drop=True)
+    hist_fe = load_features(data_csv, hist)
+    feature_cols = pl.load_feature_cols_or_infer(hist_fe)
+    truth = pd.Series(hist["aqi"].to_numpy(), index=hist["timestamp"].to_numpy())
+    truth = truth[~truth.index.duplicated(keep="last")]
+
+    origins = select_origins(hist_fe, truth.index.max(), start, end, every, hours, max_origins)
+    if not len(origins):
+        raise ValueError("No forecast origins in range (each needs a full horizon of observed history).")
+    origin_times = hist_fe["timestamp"].iloc[origins].to_numpy()
+    print(f"📥 {len(hist)} history rows, {len(origins)} origins "
+          f"({pd.Timestamp(origin_times[0])} → {pd.Timestamp(origin_times[-1])}, every ≥{every} h), "
+          f"modes {modes}, {workers} worker(s)")
+
+    # ========================
+    # 🔄 2. REPLAY FORECASTS
+    # ========================
+    start_t = time.perf_counter()
+    forecasts = run_backtest(hist, hist_fe, feature_cols, origins, modes, hours, workers)
+    elapsed = time.perf_counter() - start_t
+
+    # ========================
+    # 📊 3. SCORE PER HORIZON
+    # ========================
+    target_times = origin_times[:, None] + (np.arange(1, hours + 1) * np.timedelta64(1, "h"))[None, :]
+    actual = truth.reindex(target_times.ravel()).to_numpy(dtype=float).reshape(target_times.shape)
+
+    tables, report = [], {"data": str(data_csv), "origins": int(len(origins)), "every_h": every,
+                          "first_origin": str(pd.Timestamp(origin_times[0])),
+                          "last_origin": str(pd.Timestamp(origin_times[-1])),
+                          "hours": hours, "workers": workers, "elapsed_s": round(elapsed, 3), "modes": {}}
+    for m, pred in forecasts.items():
+        table = score_horizons(pred, actual)
+        table.insert(0, "mode", m)
+        tables.append(table)
+        err = (pred - actual)[~np.isnan(actual)]
+        by_h = table.set_index("horizon")
+        report["modes"][m] = {
+            "mae": float(np.abs(err).mean()) if err.size else None,
+            "rmse": float(np.sqrt((err ** 2).mean())) if err.size else None,
+            "model": str(MODEL_PATHS[m]),
+            # None (JSON null) for a horizon with no observed hours
+            "by_horizon": {int(h): round(float(by_h.at[h, "mae"]), 4) if by_h.at[h, "n"] else None
+                           for h in SUMMARY_HORIZONS if h <= hours},
+        }
+
+    horizons = pd.concat(tables, ignore_index=True)
+    HORIZON_CSV.parent.mkdir(parents=True, exist_ok=True)
+    horizons.to_csv(HORIZON_CSV, index=False)
+    with REPORT_JSON.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, allow_nan=False)
+    if save_forecasts:
+        pd.concat([pd.DataFrame({
+            "mode": m,
+            "origin": np.repeat(origin_times, hours),
+            "horizon": np.tile(np.arange(1, hours + 1), len(origins)),
+            "timestamp": target_times.ravel(),
+            "pred_aqi": pred.ravel(),
+            "actual_aqi": actual.ravel(),
+        }) for m, pred in forecasts.items()], ignore_index=True).to_csv(FORECASTS_CSV, index=False)
+
+    print(f"\n📊 MAE by horizon ({len(origins)} origins, {elapsed:.1f} s):")
+    print("  " + "mode".ljust(10) + "".join(f"{f'+{h}h':>8}" for h in SUMMARY_HORIZONS if h <= hours)
+          + "     all")
+    for m, r in report["modes"].items():
+        print("  " + m.ljust(10) + "".join(table_cell(v) for v in r["by_horizon"].values()) + table_cell(r["mae"]))
+    print(f"✅ Per-horizon table → {HORIZON_CSV}, report → {REPORT_JSON}"
+          + (f", forecasts → {FORECASTS_CSV}" if save_forecasts else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the 72-hour forecast")
+    parser.add_argument("--data", type=Path, default=pl.DATA_CSV, help="clean hourly history with observed aqi")
+    parser.add_argument("--mode", choices=["recursive", "direct", "both"], default="recursive")
+    parser.add_argument("--start", help="first origin (timestamp)")
+    parser.add_argument("--end", help="last origin (timestamp)")
+    parser.add_argument("--every", type=int, default=24, help="minimum hours between origins")
+    parser.add_argument("--max-origins", type=int, default=None, help="keep only the most recent N origins")
+    parser.add_argument("--hours", type=int, default=pl.FORECAST_HOURS)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--save-forecasts", action="store_true", help=f"also write {FORECASTS_CSV}")
+    args = parser.parse_args()
+    main(args.data, args.mode, args.start, args.end, args.every, args.max_origins, args.hours,
+         args.workers, args.save_forecasts)
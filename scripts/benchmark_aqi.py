@@ -0,0 +1,77 @@
+# scripts/benchmark_aqi.py
+"""
+Vectorized breakpoint AQI (scripts/aqi.py) vs the old row-wise
+`merged.apply(calculate_aqi, axis=1)` from clean_and_merge_data.py.
+
+    python scripts/benchmark_aqi.py --rows 3000000 --apply-rows 200000
+
+The row-wise version is timed on `--apply-rows` rows (it is far too slow for
+millions) and extrapolated; both results are checked for equality on those rows.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from aqi import BREAKPOINTS, POLLUTANTS, breakpoint_aqi, proxy_aqi
+
+
+# ---------- previous row-wise implementation (reference) ----------
+def calc_subindex(c, breakpoints):
+    for c_low, c_high, i_low, i_high in breakpoints:
+        if c_low <= c <= c_high:
+            return ((i_high - i_low) / (c_high - c_low)) * (c - c_low) + i_low
+    return None
+
+
+def calculate_aqi(row):
+    subindexes = []
+    for pol in POLLUTANTS:
+        val = row.get(pol)
+        if pd.notna(val):
+            idx = calc_subindex(val, BREAKPOINTS[pol])
+            if idx is not None:
+                subindexes.append(idx)
+    return max(subindexes) if subindexes else None
+
+
+def synthetic_pollutants(n: int, seed: int = 42) -> pd.DataFrame:
+    """Values spread over every range, the gaps between them, beyond the table, and NaNs."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({pol: rng.uniform(0, BREAKPOINTS[pol][-1][1] * 1.1, n) for pol in POLLUTANTS})
+    for pol in POLLUTANTS:
+        df.loc[rng.random(n) < 0.05, pol] = np.nan
+    return df
+
+
+def main(rows: int, apply_rows: int):
+    df = synthetic_pollutants(rows)
+    sample = df.iloc[:min(apply_rows, rows)]
+
+    start = time.perf_counter()
+    expected = sample.apply(calculate_aqi, axis=1).astype(float)
+    t_apply = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = breakpoint_aqi(df)
+    t_vec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proxy_aqi(df)
+    t_proxy = time.perf_counter() - start
+
+    np.testing.assert_allclose(got.iloc[:len(sample)].to_numpy(), expected.to_numpy(), rtol=0, atol=1e-12)
+    t_apply_full = t_apply * rows / len(sample)
+    print(f"📊 {rows:,} rows ({len(sample):,} checked against the row-wise reference: identical)")
+    print(f"  row-wise apply     {t_apply_full:9.2f} s   (measured {t_apply:.2f} s on {len(sample):,} rows)")
+    print(f"  vectorized         {t_vec:9.3f} s   ({t_apply_full / t_vec:,.0f}x faster)")
+    print(f"  proxy (linear)     {t_proxy:9.3f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Row-wise vs vectorized AQI benchmark")
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--apply-rows", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.rows, args.apply_rows)
@@ -0,0 +1,73 @@
+# scripts/benchmark_columnar.py
+"""
+Load-time comparison: CSV (read_csv + parse_dates) vs columnar table (memory-mapped)
+on a synthetic multi-year hourly history shaped like hourly_clean_updated.csv.
+
+    python scripts/benchmark_columnar.py --years 5 --repeat 5
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import save_table, load_table
+
+COLUMNS = ["o3", "co", "no2", "so2", "temp_c", "humidity", "wind_kph", "pressure_mb", "aqi"]
+
+
+def synthetic_history(years: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2020-01-01", periods=years * 365 * 24, freq="h")
+    df = pd.DataFrame({"timestamp": ts})
+    for c in COLUMNS:
+        df[c] = rng.gamma(2.0, 20.0, len(ts)).round(3)
+    return df
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(years: int = 5, repeat: int = 5):
+    df = synthetic_history(years)
+    tmp = Path(tempfile.mkdtemp(prefix="aqi_bench_"))
+    try:
+        csv_path, tbl_path = tmp / "history.csv", tmp / "history.cols"
+        df.to_csv(csv_path, index=False)
+        save_table(df, tbl_path)
+
+        cases = {
+            "csv  all columns":      lambda: pd.read_csv(csv_path, parse_dates=["timestamp"]),
+            "csv  timestamp+aqi":    lambda: pd.read_csv(csv_path, usecols=["timestamp", "aqi"], parse_dates=["timestamp"]),
+            "cols all columns":      lambda: load_table(tbl_path).copy(),
+            "cols timestamp+aqi":    lambda: load_table(tbl_path, ["timestamp", "aqi"]).copy(),
+            "cols mmap only (lazy)": lambda: load_table(tbl_path),
+        }
+        csv_mb = csv_path.stat().st_size / 1e6
+        tbl_mb = sum(p.stat().st_size for p in tbl_path.iterdir()) / 1e6
+        print(f"📊 {len(df):,} rows ({years} years hourly) — CSV {csv_mb:.1f} MB, columnar {tbl_mb:.1f} MB")
+
+        baseline = None
+        for name, fn in cases.items():
+            t = best_of(fn, repeat)
+            baseline = baseline or t
+            print(f"  {name:22s} {t * 1000:9.2f} ms   ({baseline / t:6.1f}x vs CSV)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV vs columnar load-time benchmark")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.years, args.repeat)
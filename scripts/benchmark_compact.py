@@ -0,0 +1,128 @@
+# scripts/benchmark_compact.py
+"""
+Memory check for compact mode (--compact / AQI_COMPACT=1): peak memory of the
+feature pipeline with full vs compact dtypes, on a synthetic station-keyed
+hourly history shaped like hourly_clean_updated.csv, plus a check that the
+model inputs stay numerically equivalent.
+
+    full      float64 history → feature_engineering_pipeline(df, compact=False)
+    compact   float32 history (load_frame(compact=True)) → feature_engineering_pipeline(df, compact=True)
+
+Peaks are tracemalloc peaks of the pipeline call (the input history is
+allocated before tracing starts, in both cases). The feature matrices must have
+the same rows and columns and every value must lie within RTOL of its column's
+largest magnitude — float32 keeps ~7 significant digits, and a difference like
+aqi_change_rate inherits the rounding of the AQI values it subtracts, so a
+per-value relative bound would be meaningless near zero. A tree model can still
+flip a split whose threshold falls inside that rounding, so the largest
+prediction gap of a forest fitted on the full-precision features is only
+reported, never asserted (0.23 AQI with the defaults below).
+
+    python scripts/benchmark_compact.py --stations 20 --years 3
+    python scripts/benchmark_compact.py --stations 2 --years 1      (quick)
+
+Exits with status 1 if compact mode does not lower the peak or the features
+differ by more than the tolerance.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from benchmark_columnar import synthetic_history
+from columnar_store import compact_frame
+from feature_engineering import feature_engineering_pipeline
+from stations import STATION_COL
+
+RTOL = 1e-5          # of each column's largest |value| (float32 eps is ~6e-8; rolling sums add rounding)
+
+
+def station_history(stations: int, years: int) -> pd.DataFrame:
+    frames = []
+    for i in range(stations):
+        df = synthetic_history(years, seed=42 + i)
+        df.insert(0, STATION_COL, f"s{i:02d}")
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def traced(fn):
+    """(result, peak MB, seconds) of fn()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        out = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return out, peak / 1e6, time.perf_counter() - start
+
+
+def compare(full: pd.DataFrame, compact: pd.DataFrame) -> dict:
+    """Largest differences between the two feature frames (numeric columns as float64)."""
+    if list(full.columns) != list(compact.columns) or len(full) != len(compact):
+        raise AssertionError(f"Feature frames differ in shape: {full.shape} vs {compact.shape}")
+    if not full["timestamp"].equals(compact["timestamp"]):
+        raise AssertionError("Feature frames differ in their timestamps")
+    cols = [c for c in full.columns if pd.api.types.is_numeric_dtype(full[c])]
+    a = full[cols].to_numpy(dtype=np.float64)
+    b = compact[cols].to_numpy(dtype=np.float64)
+    scale = np.maximum(np.nanmax(np.abs(a), axis=0), 1.0)
+    rel = (np.abs(a - b) / scale).max(axis=0)
+    worst = int(np.argmax(rel))
+    return {"columns": len(cols), "max_abs": float(np.abs(a - b).max()), "max_rel": float(rel[worst]),
+            "within_tolerance": bool((rel <= RTOL).all()), "worst_column": cols[worst]}
+
+
+def prediction_gap(full: pd.DataFrame, compact: pd.DataFrame, trees: int = 50) -> float:
+    """Largest |prediction difference| of one forest (fitted on `full`) on the two feature matrices."""
+    cols = [c for c in full.columns if c not in ("timestamp", "aqi", STATION_COL)]
+    model = RandomForestRegressor(n_estimators=trees, max_depth=12, random_state=42, n_jobs=-1)
+    model.fit(full[cols].to_numpy(np.float64), full["aqi"].to_numpy(np.float64))
+    return float(np.abs(model.predict(full[cols].to_numpy(np.float64))
+                        - model.predict(compact[cols].to_numpy(np.float64))).max())
+
+
+def main(stations: int = 20, years: int = 3) -> bool:
+    hist = station_history(stations, years)
+    hist_c = compact_frame(hist)
+    print(f"📊 {len(hist):,} rows ({stations} station(s) x {years} year(s) hourly) — history "
+          f"{hist.memory_usage(deep=True).sum() / 1e6:.0f} MB full, {hist_c.memory_usage(deep=True).sum() / 1e6:.0f} MB compact")
+
+    fe_full, peak_full, t_full = traced(lambda: feature_engineering_pipeline(hist, compact=False))
+    fe_comp, peak_comp, t_comp = traced(lambda: feature_engineering_pipeline(hist_c, compact=True))
+    size_full = fe_full.memory_usage(deep=True).sum() / 1e6
+    size_comp = fe_comp.memory_usage(deep=True).sum() / 1e6
+
+    print(f"  {'':8s}{'peak':>10s}{'features':>11s}{'time':>9s}")
+    print(f"  {'full':8s}{peak_full:7.0f} MB{size_full:8.0f} MB{t_full:8.2f}s")
+    print(f"  {'compact':8s}{peak_comp:7.0f} MB{size_comp:8.0f} MB{t_comp:8.2f}s   "
+          f"({peak_full / peak_comp:.2f}x lower peak)")
+
+    check = compare(fe_full, fe_comp)
+    print(f"🧮 {check['columns']} feature columns: max |Δ| {check['max_abs']:.2e}, max |Δ| / column scale "
+          f"{check['max_rel']:.2e} (worst: {check['worst_column']}; tolerance {RTOL:g})")
+    print(f"🤖 Forest on the same rows: max |prediction Δ| {prediction_gap(fe_full, fe_comp):.3f} AQI (reported only)")
+
+    ok = True
+    if peak_comp >= peak_full:
+        print("❌ Compact mode did not lower the pipeline's peak memory")
+        ok = False
+    if not check["within_tolerance"]:
+        print("❌ Compact features differ from the full-precision ones by more than the tolerance")
+        ok = False
+    if ok:
+        print("✅ Lower peak memory, same model inputs (within tolerance)")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory and feature equivalence of compact dtypes")
+    parser.add_argument("--stations", type=int, default=20)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(0 if main(args.stations, args.years) else 1)
@@ -0,0 +1,77 @@
+# scripts/benchmark_intervals.py
+"""
+Cost of prediction intervals (scripts/forest_intervals.py) over point prediction.
+
+    python scripts/benchmark_intervals.py [--model models/RandomForest_final_model_v3.joblib]
+
+Times, per batch size (1 row = one recursive step, 72 rows = one direct forecast,
+and a large batch):
+    point        model.predict
+    tree loop    np.stack([tree.predict(X) for tree in estimators_]) + quantiles
+    gather       ForestIntervals.predict (one apply + one gather + quantiles)
+and a full 72-hour recursive forecast with and without --intervals.
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import joblib
+
+from forest_intervals import DEFAULT_COVERAGE, ForestIntervals, interval_quantiles
+from predict_live import (MODEL_PATH, DATA_CSV, load_scaler_if_exists, load_feature_cols_or_infer,
+                          recursive_forecast)
+from feature_engineering import feature_engineering_pipeline
+from columnar_store import load_frame
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def tree_loop(model, X, quantiles):
+    per_tree = np.stack([est.predict(X) for est in model.estimators_], axis=1)
+    return per_tree.mean(axis=1), np.quantile(per_tree, quantiles, axis=1)
+
+
+def main(model_path: Path, repeat: int):
+    model = joblib.load(model_path)
+    scaler = load_scaler_if_exists()
+    hist = load_frame(DATA_CSV)
+    hist_fe = feature_engineering_pipeline(hist)
+    feature_cols = load_feature_cols_or_infer(hist_fe)
+    X_all = hist_fe[feature_cols]
+    X_all = scaler.transform(X_all) if scaler is not None else X_all.to_numpy()
+
+    fi = ForestIntervals(model, DEFAULT_COVERAGE)
+    quantiles = interval_quantiles(DEFAULT_COVERAGE)
+    print(f"📊 {len(model.estimators_)} trees, {X_all.shape[1]} features (best of {repeat})")
+
+    for n in (1, 72, min(len(X_all), 5000)):
+        X = X_all[-n:]
+        np.testing.assert_allclose(fi.predict(X)["pred_aqi"], model.predict(X), rtol=1e-12)
+        t_point = best_of(lambda: model.predict(X), repeat)
+        t_loop = best_of(lambda: tree_loop(model, X, quantiles), repeat)
+        t_gather = best_of(lambda: fi.predict(X), repeat)
+        print(f"  {n:5d} rows  point {t_point * 1e3:8.2f} ms   tree loop {t_loop * 1e3:8.2f} ms "
+              f"(x{t_loop / t_point:5.1f})   gather {t_gather * 1e3:8.2f} ms (x{t_gather / t_point:4.1f})")
+
+    last_time = hist_fe["timestamp"].max()
+    t_rec = best_of(lambda: recursive_forecast(hist, last_time, feature_cols, model, scaler), repeat)
+    t_rec_iv = best_of(lambda: recursive_forecast(hist, last_time, feature_cols, model, scaler,
+                                                  coverage=DEFAULT_COVERAGE), repeat)
+    print(f"  72h recursive forecast: point {t_rec * 1e3:.1f} ms, with intervals {t_rec_iv * 1e3:.1f} ms "
+          f"(x{t_rec_iv / t_rec:.2f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediction-interval overhead benchmark")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.model, args.repeat)
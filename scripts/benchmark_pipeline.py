@@ -0,0 +1,230 @@
+# scripts/benchmark_pipeline.py
+"""
+End-to-end scaling benchmark on synthetic data (scripts/synthetic_data.py).
+
+Builds a throw-away sandbox (data/ + models/) of the requested size, then runs
+every pipeline stage as its own process — exactly like the workflows do — and
+records wall time, CPU time and peak RSS per stage:
+
+    clean_aqi_json_v2       (full rebuild, then an incremental run after one more day arrives)
+    clean_and_merge_data
+    feature_engineering
+    train_model
+    predict_live
+
+    python scripts/benchmark_pipeline.py --days 730 --historic-days 365
+    python scripts/benchmark_pipeline.py --compare benchmark_results/a.json benchmark_results/b.json
+
+Results are written as JSON to benchmark_results/ (commit sha in the name), so
+runs from two commits can be compared. Note clean_and_merge_data.py keeps only
+its hard-coded Apr–Jul 2025 window, so its output stops growing past ~112 days.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import joblib
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from columnar_store import load_frame
+from feature_engineering import feature_engineering_pipeline
+from raw_store import RawStore
+from synthetic_data import raw_records, write_dataset
+
+REPO_ROOT   = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+RESULTS_DIR = Path("benchmark_results")
+
+STAGES = ["clean_aqi_json_v2", "clean_aqi_json_v2_incremental", "clean_and_merge_data",
+          "feature_engineering", "train_model", "predict_live"]
+
+
+# ---------- untimed per-stage setup ----------
+def append_next_day(sandbox: Path):
+    """One more day of live observations after the newest raw record (for the incremental run)."""
+    store = RawStore(sandbox / "data/aqi_data.jsonl", sandbox / "data/aqi_data.idx")
+    last = max(store.iter_records(columns=["timestamp"]), key=lambda r: r["timestamp"])["timestamp"]
+    start = datetime.strptime(last, "%Y-%m-%d %H:%M:%S").replace(minute=0, second=0) + timedelta(hours=1)
+    for rec in raw_records(start, 24, seed=int(start.timestamp())):
+        store.append(rec)
+
+
+def train_forecast_model(sandbox: Path, n_estimators: int = 50):
+    """predict_live.py needs a model/scaler/feature list; fit a small one on the sandbox features."""
+    df_fe = feature_engineering_pipeline(load_frame(sandbox / "data/hourly_clean_updated.csv"))
+    feature_cols = [c for c in df_fe.columns if c not in ["timestamp", "aqi"]]
+    scaler = StandardScaler().fit(df_fe[feature_cols])
+    model = RandomForestRegressor(n_estimators=n_estimators, min_samples_leaf=5, random_state=42, n_jobs=-1)
+    model.fit(scaler.transform(df_fe[feature_cols]), df_fe["aqi"])
+    models = sandbox / "models"
+    joblib.dump(model, models / "RandomForest_final_model_v3.joblib")
+    joblib.dump(scaler, models / "scaler_v3.joblib")
+    with (models / "feature_cols.json").open("w", encoding="utf-8") as f:
+        json.dump(feature_cols, f)
+
+
+# name → (script args, setup before each run, output whose row count is reported)
+STAGE_SPECS = {
+    "clean_aqi_json_v2":             (["clean_aqi_json_v2.py", "--full"], None, "data/hourly_clean_updated.csv"),
+    "clean_aqi_json_v2_incremental": (["clean_aqi_json_v2.py"], append_next_day, "data/hourly_clean_updated.csv"),
+    "clean_and_merge_data":          (["clean_and_merge_data.py"], None, "data/final_training_dataset.csv"),
+    "feature_engineering":           (["feature_engineering.py"], None, "data/hourly_features.csv"),
+    "train_model":                   (["train_model.py", "--data", "data/final_training_dataset.csv",
+                                       "--grid", "quick", "--folds", "3"], None, "data/final_training_dataset.csv"),
+    "predict_live":                  (["predict_live.py"], train_forecast_model, "data/predictions_72h.csv"),
+}
+
+
+# ---------- measurement ----------
+# Runs the stage script as __main__ and records the process's own peak RSS (VmHWM)
+# at exit. ru_maxrss from wait4() is no good here: a forked child inherits the
+# high-water mark of this (much bigger) harness process.
+STAGE_RUNNER = """
+import atexit, os, runpy, sys
+def _peak():
+    with open("/proc/self/status") as f:
+        kb = next((int(l.split()[1]) for l in f if l.startswith("VmHWM:")), 0)
+    with open(os.environ["BENCH_PEAK_FILE"], "w") as f:
+        f.write(str(kb))
+atexit.register(_peak)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def run_stage(sandbox: Path, args: list, log) -> dict:
+    """Run one script in the sandbox; wall time from the clock, CPU from wait4(), peak RSS from the child."""
+    peak_file = sandbox / ".peak_rss"
+    peak_file.unlink(missing_ok=True)
+    env = {**os.environ, "PYTHONPATH": str(SCRIPTS_DIR), "PYTHONWARNINGS": "ignore",
+           "BENCH_PEAK_FILE": str(peak_file)}
+    env.pop("FORECAST_SERVICE_URL", None)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", STAGE_RUNNER, str(SCRIPTS_DIR / args[0]), *args[1:]],
+                            cwd=sandbox, env=env, stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    peak_kb = int(peak_file.read_text()) if peak_file.exists() else 0
+    return {
+        "returncode": proc.returncode,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 4),
+        "max_rss_mb": round(peak_kb / 1024, 1),
+    }
+
+
+def count_rows(path: Path):
+    if not path.exists():
+        return None
+    with path.open("rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def git_info() -> dict:
+    def git(*args):
+        out = subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True)
+        return out.stdout.strip() if out.returncode == 0 else None
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run_benchmark(days: int, historic_days: int, repeat: int, stages: list, seed: int, keep: bool) -> dict:
+    sandbox = Path(tempfile.mkdtemp(prefix="aqi_bench_"))
+    (sandbox / "models").mkdir()
+    print(f"🚀 Sandbox {sandbox}: {days} live days, {historic_days} historic days")
+    start = time.perf_counter()
+    sizes = write_dataset(sandbox, days, historic_days, seed=seed)
+    print(f"✅ Synthetic data: {sizes['raw_records']:,} raw records, {sizes['historic_hours']:,} historic hours "
+          f"({time.perf_counter() - start:.1f} s)")
+
+    results = []
+    with (sandbox / "stages.log").open("w", encoding="utf-8") as log:
+        for name in stages:
+            args, setup, output = STAGE_SPECS[name]
+            runs = []
+            for _ in range(repeat):
+                if setup is not None:
+                    setup(sandbox)
+                log.write(f"\n===== {name} =====\n")
+                log.flush()
+                runs.append(run_stage(sandbox, args, log))
+                if runs[-1]["returncode"] != 0:
+                    break
+            best = min(runs, key=lambda r: r["wall_s"])
+            stage = {"stage": name, **best, "rows": count_rows(sandbox / output),
+                     "wall_s_runs": [r["wall_s"] for r in runs]}
+            results.append(stage)
+            status = "✅" if best["returncode"] == 0 else f"⚠️ exit {best['returncode']}"
+            print(f"  {name:<30} {best['wall_s']:8.2f} s wall  {best['cpu_s']:8.2f} s cpu  "
+                  f"{best['max_rss_mb']:8.1f} MB  rows={stage['rows']}  {status}")
+            if best["returncode"] != 0:
+                print(f"     see {sandbox / 'stages.log'}")
+                keep = True
+
+    if not keep:
+        shutil.rmtree(sandbox)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git_info(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"days": days, "historic_days": historic_days, "repeat": repeat, "seed": seed, **sizes},
+        "stages": results,
+    }
+
+
+def compare(base_path: Path, new_path: Path):
+    """Per-stage ratios new/base (< 1.00 = faster / smaller)."""
+    with base_path.open("r", encoding="utf-8") as f:
+        base = json.load(f)
+    with new_path.open("r", encoding="utf-8") as f:
+        new = json.load(f)
+    if base["config"] != new["config"]:
+        print(f"⚠️ Different configs: {base['config']} vs {new['config']}")
+    print(f"📊 {base['git']['commit']} → {new['git']['commit']}")
+    base_stages = {s["stage"]: s for s in base["stages"]}
+    for s in new["stages"]:
+        b = base_stages.get(s["stage"])
+        if b is None:
+            print(f"  {s['stage']:<30} (new stage)")
+            continue
+        print(f"  {s['stage']:<30} wall {b['wall_s']:8.2f} → {s['wall_s']:8.2f} s (x{s['wall_s'] / b['wall_s']:.2f})  "
+              f"rss {b['max_rss_mb']:7.1f} → {s['max_rss_mb']:7.1f} MB (x{s['max_rss_mb'] / b['max_rss_mb']:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic-data benchmark of every pipeline stage")
+    parser.add_argument("--days", type=int, default=365, help="days of live raw observations")
+    parser.add_argument("--historic-days", type=int, default=112, help="days of Open-Meteo/WeatherAPI history")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage (the fastest is reported)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="result JSON (default benchmark_results/<commit>_<days>d.json)")
+    parser.add_argument("--keep", action="store_true", help="keep the sandbox directory")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BASE", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_benchmark(args.days, args.historic_days, args.repeat, args.stages, args.seed, args.keep)
+    out = args.out or RESULTS_DIR / f"{report['git']['commit'] or 'nogit'}_{args.days}d.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"🎉 Results saved → {out}")
+
+
+if __name__ == "__main__":
+    main()
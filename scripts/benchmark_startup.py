@@ -0,0 +1,147 @@
+# scripts/benchmark_startup.py
+"""
+Cold-start benchmark: predict_live.py vs the lean forecast_lite.py.
+
+Both run as fresh processes in a throw-away sandbox holding a copy of the
+clean history and the model files (the repo's data/ is never written). After
+one untimed warm-up of each (feature store, flat model export, prepared
+state), every entry point is timed `--repeat` times, and one extra run under
+`python -X importtime` gives the per-package import breakdown:
+
+    interpreter      python -c pass (the floor)
+    predict_live     pandas + joblib + sklearn (unpickled scaler) + feature store
+    forecast_lite    NumPy + the prepared state (scripts/forecast_lite.py)
+
+    python scripts/benchmark_startup.py --repeat 5
+    python scripts/benchmark_startup.py --top 12
+
+Also checks that both wrote the same forecast. Results are written as JSON to
+benchmark_results/startup_<commit>.json.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmark_pipeline import REPO_ROOT, RESULTS_DIR, SCRIPTS_DIR, git_info
+
+COPY_FILES = ["data/hourly_clean_updated.csv",
+              "models/RandomForest_final_model_v3.joblib", "models/RandomForest_final_model_v3.npz",
+              "models/scaler_v3.joblib", "models/feature_cols.json"]
+ENTRY_POINTS = {
+    "interpreter":   ["-c", "pass"],
+    "predict_live":  [str(SCRIPTS_DIR / "predict_live.py")],
+    "forecast_lite": [str(SCRIPTS_DIR / "forecast_lite.py"), "--out", "data/predictions_72h_lite.csv"],
+}
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def make_sandbox(root: Path) -> Path:
+    sandbox = Path(tempfile.mkdtemp(prefix="aqi_startup_"))
+    for rel in COPY_FILES:
+        src = root / rel
+        if src.exists():
+            (sandbox / rel).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, sandbox / rel)
+    (sandbox / "data").mkdir(exist_ok=True)
+    return sandbox
+
+
+def run(sandbox: Path, args: list, importtime: bool = False) -> subprocess.CompletedProcess:
+    cmd = [sys.executable, *(["-X", "importtime"] if importtime else []), *args]
+    env = {**os.environ, "PYTHONWARNINGS": "ignore"}
+    env.pop("FORECAST_SERVICE_URL", None)
+    env.pop("AQI_COMPACT", None)
+    proc = subprocess.run(cmd, cwd=sandbox, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stdout}\n{proc.stderr}")
+    return proc
+
+
+def import_breakdown(stderr: str) -> dict:
+    """{top-level package: cumulative import ms} from -X importtime output (nested imports folded in)."""
+    rows = [m.groups() for m in map(IMPORTTIME_RE.match, stderr.splitlines()) if m]
+    if not rows:
+        return {}
+    top = min(len(indent) for _, _, indent, _ in rows)
+    totals = {}
+    for _, cumulative, indent, name in rows:
+        if len(indent) == top:
+            root = name.split(".")[0]
+            totals[root] = totals.get(root, 0.0) + int(cumulative) / 1e3
+    return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+
+def run_benchmark(repeat: int, root: Path = REPO_ROOT, keep: bool = False) -> dict:
+    sandbox = make_sandbox(root)
+    print(f"🚀 Sandbox {sandbox}")
+    try:
+        # Warm-up: lite first (exports the flat model if needed), then the full run (writes the state)
+        run(sandbox, ENTRY_POINTS["forecast_lite"] + ["--rebuild"])
+        run(sandbox, ENTRY_POINTS["predict_live"])
+
+        results = {}
+        for name, args in ENTRY_POINTS.items():
+            walls = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run(sandbox, args)
+                walls.append(time.perf_counter() - start)
+            imports = import_breakdown(run(sandbox, args, importtime=True).stderr)
+            results[name] = {"wall_s": [round(w, 4) for w in walls], "median_wall_s": round(statistics.median(walls), 4),
+                             "import_ms": round(sum(imports.values()), 1),
+                             "imports_ms": {k: round(v, 1) for k, v in imports.items()}}
+
+        full = (sandbox / "data/predictions_72h.csv").read_bytes()
+        lite = (sandbox / "data/predictions_72h_lite.csv").read_bytes()
+    finally:
+        if not keep:
+            shutil.rmtree(sandbox, ignore_errors=True)
+    return {"git": git_info(), "python": sys.version.split()[0], "repeat": repeat,
+            "identical_forecast": full == lite, "entry_points": results}
+
+
+def print_report(report: dict, top: int) -> None:
+    res = report["entry_points"]
+    print(f"\n{'':<16}{'median wall':>12}{'imports':>12}")
+    for name, r in res.items():
+        print(f"  {name:<14}{r['median_wall_s'] * 1e3:9.0f} ms{r['import_ms']:9.0f} ms")
+    for name in ("predict_live", "forecast_lite"):
+        print(f"\n📊 {name}: slowest imports (cumulative)")
+        for pkg, ms in list(res[name]["imports_ms"].items())[:top]:
+            print(f"  {pkg:<24}{ms:9.1f} ms")
+
+    floor = res["interpreter"]["median_wall_s"]
+    full, lite = res["predict_live"]["median_wall_s"], res["forecast_lite"]["median_wall_s"]
+    print(f"\n✅ Cold start {full * 1e3:.0f} ms → {lite * 1e3:.0f} ms (x{full / lite:.1f}; "
+          f"{(full - floor) * 1e3:.0f} → {(lite - floor) * 1e3:.0f} ms above the bare interpreter)")
+    if not report["identical_forecast"]:
+        print("⚠️ forecast_lite.py and predict_live.py wrote different forecasts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time and import breakdown of the forecast entry points")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per entry point (median reported)")
+    parser.add_argument("--top", type=int, default=8, help="packages listed per import breakdown")
+    parser.add_argument("--out", type=Path, help="result JSON (default benchmark_results/startup_<commit>.json)")
+    parser.add_argument("--keep", action="store_true", help="keep the sandbox directory")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.repeat, keep=args.keep)
+    print_report(report, args.top)
+    out = args.out or RESULTS_DIR / f"startup_{report['git']['commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"🎉 Results saved → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# scripts/benchmark_update.py
+"""
+Warm-start updates (train_model.py --update) vs a full refit, replayed over time.
+
+The training rows are split at --initial: one forest is fitted on the rows
+before it, then the rest arrives --step rows at a time. After every step
+    update    warm_start_update(): trees for the new rows on the recent window,
+              oldest trees retired (same defaults as train_model.py --update)
+    refit     a fresh forest with the same parameters on every row so far
+and both are scored on the next --horizon rows (not yet seen by either):
+
+    step  rows  update_s  refit_s  mae_update  mae_refit  drift  mean |update - refit|
+
+The summary gives the speed-up and how far the updated forest drifts from the
+refit one (MAE difference, and the mean absolute gap between their forecasts).
+
+    python scripts/benchmark_update.py --trees 100 --step 24 --horizon 72
+    python scripts/benchmark_update.py --data data/final_training_dataset_v3.csv --max-steps 10
+
+Results are written as JSON to benchmark_results/update_<commit>.json.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from benchmark_pipeline import RESULTS_DIR, git_info
+from columnar_store import load_frame
+from feature_store import load_features
+from train_model import TRAIN_CSV, WINDOW_HOURS, trees_for_rows, warm_start_update
+
+
+def mae(a, b) -> float:
+    return float(np.mean(np.abs(np.asarray(a) - np.asarray(b))))
+
+
+def run_benchmark(train_csv: Path, trees: int, initial: float, step: int, horizon: int,
+                  window_hours: int, max_steps: int = None, params: dict = None) -> dict:
+    df = load_frame(train_csv).sort_values("timestamp").reset_index(drop=True)
+    df_fe = load_features(train_csv, df)         # same rows as train_model.py
+    feature_cols = [c for c in df_fe.columns if c not in ["timestamp", "aqi"]]
+    ts = df_fe["timestamp"]
+    y = df_fe["aqi"].to_numpy(dtype=np.float64)
+    n = len(df_fe)
+    start_rows = int(n * initial)
+    if start_rows + step + horizon > n:
+        raise ValueError(f"{n} rows: not enough for --initial {initial}, --step {step}, --horizon {horizon}")
+
+    # One scaler for both: trees are invariant to it, and the updated forest must keep its units
+    scaler = StandardScaler().fit(df_fe[feature_cols].iloc[:start_rows])
+    X = scaler.transform(df_fe[feature_cols])
+    params = {"n_estimators": trees, **(params or {})}
+
+    def refit(rows: int) -> RandomForestRegressor:
+        return RandomForestRegressor(random_state=42, n_jobs=-1, **params).fit(X[:rows], y[:rows])
+
+    print(f"🚀 {n} rows: initial fit on {start_rows}, then +{step} rows per step, scored on the next {horizon}")
+    model = refit(start_rows)
+    steps = []
+    seen = start_rows
+    while seen + step + horizon <= n and (max_steps is None or len(steps) < max_steps):
+        new_end = seen + step
+        # Same window as train_model.update_model(): the new rows + window_hours before the newest
+        lo = min(seen, int(ts.searchsorted(ts.iloc[new_end - 1] - pd.Timedelta(hours=window_hours), side="right")))
+        new_trees = trees_for_rows(step, new_end - lo, params["n_estimators"])
+
+        start = time.perf_counter()
+        retired = warm_start_update(model, X[lo:new_end], y[lo:new_end], new_trees, params["n_estimators"],
+                                    seed=42 + len(steps) + 1)
+        update_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = refit(new_end)
+        refit_s = time.perf_counter() - start
+
+        test = slice(new_end, new_end + horizon)
+        p_update, p_refit = model.predict(X[test]), full.predict(X[test])
+        rec = {"step": len(steps) + 1, "rows": new_end, "window_rows": new_end - lo, "new_trees": new_trees,
+               "retired_trees": retired, "update_s": round(update_s, 4), "refit_s": round(refit_s, 4),
+               "mae_update": mae(p_update, y[test]), "mae_refit": mae(p_refit, y[test]),
+               "gap": mae(p_update, p_refit)}
+        rec["drift"] = rec["mae_update"] - rec["mae_refit"]
+        steps.append(rec)
+        print(f"  {rec['step']:>4} {new_end:>6} {update_s:9.2f}s {refit_s:8.2f}s {rec['mae_update']:11.2f} "
+              f"{rec['mae_refit']:10.2f} {rec['drift']:+7.2f} {rec['gap']:9.2f}")
+        seen = new_end
+
+    if not steps:
+        raise ValueError("No update steps fit in the data")
+    frame = pd.DataFrame(steps)
+    summary = {
+        "steps": len(steps),
+        "update_s_mean": round(float(frame["update_s"].mean()), 4),
+        "refit_s_mean": round(float(frame["refit_s"].mean()), 4),
+        "speedup": round(float(frame["refit_s"].sum() / frame["update_s"].sum()), 2),
+        "mae_update_mean": round(float(frame["mae_update"].mean()), 4),
+        "mae_refit_mean": round(float(frame["mae_refit"].mean()), 4),
+        "drift_mean": round(float(frame["drift"].mean()), 4),
+        "drift_max": round(float(frame["drift"].max()), 4),
+        "gap_mean": round(float(frame["gap"].mean()), 4),
+    }
+    return {"git": git_info(), "config": {"data": str(train_csv), "params": params, "initial": initial,
+                                          "step": step, "horizon": horizon, "window_hours": window_hours},
+            "summary": summary, "steps": steps}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm-start forest updates vs full refits over time")
+    parser.add_argument("--data", type=Path, default=TRAIN_CSV)
+    parser.add_argument("--trees", type=int, default=100, help="forest size (bound of the updated forest)")
+    parser.add_argument("--initial", type=float, default=0.6, help="share of rows in the initial fit")
+    parser.add_argument("--step", type=int, default=24, help="new rows per update")
+    parser.add_argument("--horizon", type=int, default=72, help="rows after each step used for scoring")
+    parser.add_argument("--window", type=int, default=WINDOW_HOURS, help="hours of history the new trees see")
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--out", type=Path, help="result JSON (default benchmark_results/update_<commit>.json)")
+    args = parser.parse_args()
+
+    print(f"{'step':>6} {'rows':>6} {'update':>10} {'refit':>9} {'mae_update':>11} {'mae_refit':>10} "
+          f"{'drift':>7} {'|gap|':>9}")
+    report = run_benchmark(args.data, args.trees, args.initial, args.step, args.horizon, args.window,
+                           args.max_steps)
+    s = report["summary"]
+    print(f"\n✅ {s['steps']} update(s): {s['update_s_mean']:.2f} s vs {s['refit_s_mean']:.2f} s per refit "
+          f"(x{s['speedup']:.1f})")
+    print(f"📊 MAE update {s['mae_update_mean']:.2f} vs refit {s['mae_refit_mean']:.2f} "
+          f"(drift {s['drift_mean']:+.2f} mean, {s['drift_max']:+.2f} worst); "
+          f"mean |update - refit| {s['gap_mean']:.2f} AQI")
+
+    out = args.out or RESULTS_DIR / f"update_{report['git']['commit'] or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"🎉 Results saved → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,16 @@
 import pandas as pd
-import json
+
+from raw_store import RawStore
+from columnar_store import load_frame, write_frame
+from aqi import proxy_aqi
+from align import align_sources, fill_gaps
 
 # 📥 Load historic dataset
-df_hist = pd.read_csv('data/final_training_dataset.csv')
+df_hist = load_frame('data/final_training_dataset.csv')
 df_hist['timestamp'] = pd.to_datetime(df_hist['timestamp'], errors='coerce')
 
-# 📥 Load aqi_data.json
-with open('data/aqi_data.json', 'r') as f:
-    json_data = json.load(f)
-
-# 🔍 Convert JSON to DataFrame
-df_json = pd.DataFrame(json_data)
+# 📥 Load raw AQI records for 26–31 July only (range read from the raw store)
+df_json = RawStore().read_frame(start="2025-07-26 17:08:15", end="2025-07-31 23:59:59")
 df_json['timestamp'] = pd.to_datetime(df_json['timestamp'], errors='coerce')
 
 # ⏳ Keep only data from 26 July 2025 until 31 July 2025
@@ -24,30 +24,22 @@ required_cols = ['co', 'no2', 'o3', 'so2', 'temp_c', 'humidity', 'wind_kph', 'pr
 df_json = df_json.dropna(subset=required_cols)
 
 # 🧮 Calculate AQI (EPA-style, without PM2.5 and PM10)
-df_json['aqi'] = (
-    df_json['co'] * 0.02 +
-    df_json['no2'] * 0.6 +
-    df_json['o3'] * 0.3 +
-    df_json['so2'] * 0.5
-)
+df_json['aqi'] = proxy_aqi(df_json)
 
 # 🧱 Keep only final dataset columns
 final_columns = ['timestamp', 'co', 'no2', 'o3', 'so2', 'temp_c', 'humidity', 'wind_kph', 'pressure_mb', 'aqi']
 df_json = df_json[final_columns]
 
-# 📊 Combine old + new
-df_final = pd.concat([df_hist, df_json], ignore_index=True)
-
-# 🧹 Sort and reset
-df_final = df_final.sort_values(by='timestamp').reset_index(drop=True)
-
-# 🔄 Fill missing values (interpolate + bfill + ffill)
-for col in final_columns[1:-1]:  # exclude timestamp and aqi
-    df_final[col] = df_final[col].interpolate().bfill().ffill()
+# 📊 Combine old + new on the hourly grid (scripts/align.py): live records are bucketed
+#    by the hour they fall in (last value per hour, as in clean_aqi_json_v2.py), historic
+#    rows win where both have a value
+value_columns = final_columns[1:]
+df_final = align_sources({"historic": df_hist, "live": df_json},
+                         columns={"historic": value_columns, "live": value_columns})
 
-# Ensure AQI has no null values
-df_final['aqi'] = df_final['aqi'].interpolate().bfill().ffill()
+# 🔄 Fill missing values (interpolate + bfill + ffill), AQI included, all columns in one pass
+df_final = fill_gaps(df_final, value_columns)
 
 # 💾 Save final training dataset
-df_final.to_csv('data/final_training_dataset_v2.csv', index=False)
+write_frame(df_final, 'data/final_training_dataset_v2.csv', partition_by="month")
 print("✅ Done! Saved: data/final_training_dataset_v2.csv")
\ No newline at end of file
@@ -0,0 +1,162 @@
+# scripts/check_backfill.py
+"""
+End-to-end check of the backfill engine (scripts/backfill.py) and
+fetch_historic_data.fetch_day against a local stub of WeatherAPI's
+history.json (an http.server on 127.0.0.1, reached via WEATHERAPI_BASE_URL;
+the response cache is switched off so every request reaches the stub).
+
+First run — per-day behaviour of the stub:
+    429, 429, 200      retried twice, then fetched
+    500, 200           retried once, then fetched
+    500 forever        gives up after --retries retries (retries + 1 requests)
+    400                permanent: one request, no retry
+    truncated 200, 200 malformed body retried, then fetched
+    200                fetched on the first request
+Second run (stub now answers 200 everywhere): only the two failed days are
+requested, and the checkpoint then holds every day.
+
+Every request goes through one TokenBucket(--rate, burst=1) shared by the
+workers: the n-th request may not arrive earlier than (n - 1) / rate seconds
+after the first.
+
+    python scripts/check_backfill.py
+    python scripts/check_backfill.py --rate 10 --workers 8
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DAYS = ["2025-04-01", "2025-04-02", "2025-04-03", "2025-04-04", "2025-04-05", "2025-04-06", "2025-04-07"]
+PLAN = {                                        # first-run answers per day; then 200
+    "2025-04-01": [429, 429],
+    "2025-04-02": [500],
+    "2025-04-03": ["500*"],                     # every request
+    "2025-04-04": [400],
+    "2025-04-05": ["truncated"],
+}
+SLACK_S = 0.02                                  # scheduling / timer slack of the rate check
+
+
+def day_body(day: str) -> bytes:
+    hours = [{"time": f"{day} {h:02d}:00", "temp_c": 30.0 + h / 10, "humidity": 60, "wind_kph": 12.5,
+              "pressure_mb": 1005.0} for h in range(24)]
+    return json.dumps({"forecast": {"forecastday": [{"date": day, "hour": hours}]}}).encode("utf-8")
+
+
+class StubWeatherAPI(BaseHTTPRequestHandler):
+    plan = {}
+    requests = defaultdict(list)                # day → arrival times
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        day = parse_qs(url.query).get("dt", [""])[0]
+        with self.lock:
+            self.requests[day].append(time.perf_counter())
+            steps = self.plan.get(day, [])
+            step = steps[0] if steps else 200
+            if steps and step != "500*":
+                steps.pop(0)
+        if url.path != "/history.json" or day not in DAYS:
+            return self._send(404, b'{"error": "unknown"}')
+        if step == "truncated":
+            return self._send(200, day_body(day)[:40])
+        if step == "500*":
+            return self._send(500, b'{"error": "down"}')
+        if step != 200:
+            return self._send(step, b'{"error": "stub"}')
+        self._send(200, day_body(day))
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def rate_ok(times: list, rate: float) -> bool:
+    """Token bucket with burst 1: the i-th request (0-based) no earlier than i / rate after the first."""
+    times = sorted(times)
+    return all(t - times[0] >= i / rate - SLACK_S for i, t in enumerate(times))
+
+
+def main(workers: int = 4, rate: float = 20.0, retries: int = 2) -> bool:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubWeatherAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["WEATHERAPI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["AQI_HTTP_CACHE"] = "off"
+    # Imported after the environment is set: BASE_URL and the shared client are read on import / first use
+    from backfill import Checkpoint, TokenBucket, run_backfill
+    from fetch_historic_data import fetch_day
+
+    checks = []
+
+    def check(name: str, ok: bool, detail: str = ""):
+        checks.append(ok)
+        print(f"  {'✅' if ok else '❌'} {name}" + (f"  ({detail})" if detail else ""))
+
+    tmp = tempfile.mkdtemp(prefix="aqi_backfill_check_")
+    checkpoint = Checkpoint(os.path.join(tmp, "days.jsonl"))
+
+    def run():
+        StubWeatherAPI.requests.clear()
+        start = time.perf_counter()
+        summary = run_backfill(DAYS, lambda d: fetch_day("Stub", d), checkpoint, workers=workers,
+                               bucket=TokenBucket(rate, burst=1), retries=retries, base_delay=0.01,
+                               log=lambda msg: None)
+        return summary, {d: len(t) for d, t in StubWeatherAPI.requests.items()}, time.perf_counter() - start
+
+    try:
+        print(f"🚀 Run 1: {len(DAYS)} days, {workers} workers, {rate:g} req/s, {retries} retries")
+        StubWeatherAPI.plan = {d: list(p) for d, p in PLAN.items()}
+        summary, counts, elapsed = run()
+        all_times = [t for ts in StubWeatherAPI.requests.values() for t in ts]
+        check("429, 429 → retried, fetched", counts["2025-04-01"] == 3 and "2025-04-01" not in summary["failed"])
+        check("500 → retried, fetched", counts["2025-04-02"] == 2 and "2025-04-02" not in summary["failed"])
+        check(f"500 forever → {retries + 1} requests, failed",
+              counts["2025-04-03"] == retries + 1 and "2025-04-03" in summary["failed"])
+        check("400 → one request, failed", counts["2025-04-04"] == 1 and "2025-04-04" in summary["failed"])
+        check("truncated 200 → retried, fetched", counts["2025-04-05"] == 2 and "2025-04-05" not in summary["failed"])
+        check("plain 200 → one request", all(counts[d] == 1 for d in DAYS[5:]))
+        check(f"token bucket holds {rate:g} req/s", rate_ok(all_times, rate),
+              f"{len(all_times)} requests in {elapsed:.2f}s")
+        check("checkpoint holds exactly the fetched days",
+              checkpoint.done() == set(DAYS) - {"2025-04-03", "2025-04-04"})
+
+        print("🔄 Run 2 (resume; stub answers 200 everywhere)")
+        StubWeatherAPI.plan = {}
+        summary, counts, _ = run()
+        check("only the missing days are requested", counts == {"2025-04-03": 1, "2025-04-04": 1}, str(counts))
+        check("nothing failed, all days checkpointed",
+              not summary["failed"] and summary["skipped"] == len(DAYS) - 2 and checkpoint.done() == set(DAYS))
+        check("24 hourly records per day", all(len(v) == 24 for v in checkpoint.items().values()))
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    ok = all(checks)
+    print("🎉 Backfill engine OK" if ok else f"❌ {checks.count(False)} check(s) failed")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill engine vs a local WeatherAPI stub")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=20.0, help="requests per second (token bucket)")
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+    sys.exit(0 if main(args.workers, args.rate, args.retries) else 1)
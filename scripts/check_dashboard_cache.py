@@ -0,0 +1,159 @@
+# scripts/check_dashboard_cache.py
+"""
+End-to-end check of the dashboard's HTTP cache (scripts/dashboard_data.py)
+against a local http.server stand-in for raw.githubusercontent. The cache
+gets a fake clock, so TTL expiry needs no sleeping.
+
+    history.csv      served with an ETag        → revalidated via If-None-Match
+    predictions.csv  served with Last-Modified  → revalidated via If-Modified-Since
+
+Checks, in order:
+    first load             one download per file
+    within the TTL         no request reaches the server
+    after the TTL          conditional GET answered 304: same body, same version,
+                           parsed frame reused (memoized per version)
+    file changed upstream  downloaded again, new version
+    latest_row()           same row as sort_values("timestamp").iloc[-1], on
+                           shuffled rows
+
+    python scripts/check_dashboard_cache.py
+    python scripts/check_dashboard_cache.py --rows 50000
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import hashlib
+import shutil
+import sys
+import tempfile
+import threading
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import DashboardData, HTTPCache, latest_row
+
+TTL = 300
+
+
+def csv_history(rows: int, seed: int) -> bytes:
+    """Hourly history with its rows shuffled (latest_row must not rely on file order)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"timestamp": pd.date_range("2025-07-26", periods=rows, freq="h"),
+                       "aqi": rng.gamma(2.0, 20.0, rows).round(2),
+                       "o3": rng.gamma(2.0, 20.0, rows).round(2)})
+    return df.sample(frac=1.0, random_state=seed).to_csv(index=False).encode("utf-8")
+
+
+class StubGitHub(BaseHTTPRequestHandler):
+    files = {}                                 # path → (body, validators: {"etag"} or {"last_modified"})
+    hits = Counter()                           # (path, status) → requests
+    conditional = Counter()                    # request header → times sent
+
+    def do_GET(self):
+        if self.path not in self.files:
+            return self._send(404, b"not found", {})
+        body, validators = self.files[self.path]
+        for header in ("If-None-Match", "If-Modified-Since"):
+            if self.headers.get(header):
+                self.conditional[header] += 1
+        etag, modified = validators.get("etag"), validators.get("last_modified")
+        if (etag and self.headers.get("If-None-Match") == etag) or \
+                (modified and self.headers.get("If-Modified-Since") == modified):
+            self.hits[self.path, 304] += 1
+            return self._send(304, b"", {})
+        headers = {"ETag": etag} if etag else {"Last-Modified": modified}
+        self.hits[self.path, 200] += 1
+        self._send(200, body, headers)
+
+    def _send(self, status: int, body: bytes, headers: dict):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def publish(path: str, body: bytes, by: str):
+    validators = ({"etag": '"' + hashlib.sha256(body).hexdigest()[:16] + '"'} if by == "etag"
+                  else {"last_modified": formatdate(1_750_000_000, usegmt=True)})
+    StubGitHub.files[path] = (body, validators)
+
+
+def main(rows: int = 5000) -> bool:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    tmp = tempfile.mkdtemp(prefix="aqi_dashboard_check_")
+    now = [1_000_000.0]
+    checks = []
+
+    def check(name: str, ok: bool, detail: str = ""):
+        checks.append(ok)
+        print(f"  {'✅' if ok else '❌'} {name}" + (f"  ({detail})" if detail else ""))
+
+    def requests_so_far() -> int:
+        return sum(StubGitHub.hits.values())
+
+    try:
+        publish("/history.csv", csv_history(rows, 1), "etag")
+        publish("/predictions.csv", csv_history(72, 2), "last_modified")
+        cache = HTTPCache(tmp, ttl=TTL, clock=lambda: now[0])
+        data = DashboardData("remote", {"history": base + "/history.csv", "predictions": base + "/predictions.csv"},
+                             {}, cache=cache)
+
+        print(f"🚀 Stub server {base}, TTL {TTL}s (fake clock)")
+        hist, pred = data.history(), data.predictions()
+        check("first load downloads each file once", StubGitHub.hits == Counter(
+            {("/history.csv", 200): 1, ("/predictions.csv", 200): 1}) and cache.stats["downloaded"] == 2)
+
+        now[0] += TTL / 2
+        before = requests_so_far()
+        hist_again, _ = data.history(), data.predictions()
+        check("within the TTL nothing is fetched", requests_so_far() == before and cache.stats["fresh"] == 2)
+
+        now[0] += TTL
+        version = cache.fetch(base + "/history.csv")[1]
+        now[0] += TTL
+        hist_reval, pred_reval = data.history(), data.predictions()
+        check("after the TTL: 304 via If-None-Match (ETag)",
+              StubGitHub.hits["/history.csv", 304] >= 1 and StubGitHub.conditional["If-None-Match"] >= 1)
+        check("after the TTL: 304 via If-Modified-Since (Last-Modified)",
+              StubGitHub.hits["/predictions.csv", 304] >= 1 and StubGitHub.conditional["If-Modified-Since"] >= 1)
+        check("304 keeps body and version; parsed frames reused",
+              cache.fetch(base + "/history.csv")[1] == version and hist_reval is hist and pred_reval is pred
+              and hist_again is hist)
+
+        publish("/history.csv", csv_history(rows + 24, 3), "etag")
+        now[0] += TTL
+        hist_new = data.history()
+        check("changed upstream → downloaded again, new version",
+              StubGitHub.hits["/history.csv", 200] == 2 and len(hist_new) == rows + 24
+              and cache.fetch(base + "/history.csv")[1] != version)
+
+        for name, df in (("history", hist_new), ("predictions", pred)):
+            expected = df.sort_values("timestamp").iloc[-1]
+            check(f"latest_row({name}) == sort_values().iloc[-1]", latest_row(df).equals(expected),
+                  str(latest_row(df)["timestamp"]))
+        print(f"📊 Cache stats: {cache.stats}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    ok = all(checks)
+    print("🎉 Dashboard cache OK" if ok else f"❌ {checks.count(False)} check(s) failed")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard HTTP cache vs a local stand-in server")
+    parser.add_argument("--rows", type=int, default=5000, help="hourly rows in the stub history")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.rows) else 1)
@@ -1,18 +1,27 @@
 import pandas as pd
 from datetime import datetime
 
+from raw_store import RawStore
+from columnar_store import load_range, write_frame
+from aqi import breakpoint_aqi
+from align import align_sources
+
 # 📂 File paths
 openmeteo_file = "data/historic_openmeteo_pollutants.json"
 weather_file = "data/historic_weather.json"
-aqi_file = "data/aqi_data.json"
 output_file = "data/final_training_dataset.csv"
 
 print("📥 Loading datasets...")
 
-# ✅ Load JSON files into DataFrames
-df_openmeteo = pd.read_json(openmeteo_file)
-df_weather = pd.read_json(weather_file)
-df_aqi = pd.read_json(aqi_file)
+# 📅 Historic range: April 1 – July 21
+start_date = datetime(2025, 4, 1)
+end_date = datetime(2025, 7, 21)
+
+# ✅ Load only the historic range (monthly partitions of the JSON files when converted with
+#    `python scripts/columnar_store.py --partition month <file.json>`, else the whole file, filtered)
+df_openmeteo = load_range(openmeteo_file, start_date, end_date)
+df_weather = load_range(weather_file, start_date, end_date)
+df_aqi = RawStore().read_frame(start=start_date, end=end_date)
 
 print(f"✅ Open-Meteo: {len(df_openmeteo)} rows")
 print(f"✅ WeatherAPI: {len(df_weather)} rows")
@@ -40,10 +49,7 @@ for col in ['nh3', 'no']:
     if col in df_aqi.columns:
         df_aqi.drop(columns=col, inplace=True)
 
-# 4️⃣ Filter to April 1 – July 21 (match historic range)
-start_date = datetime(2025, 4, 1)
-end_date = datetime(2025, 7, 21)
-
+# 4️⃣ Filter to April 1 – July 21 (match historic range; the JSON loads above are range reads already)
 def filter_by_date(df):
     return df[(df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)]
 
@@ -54,66 +60,25 @@ df_aqi = filter_by_date(df_aqi)
 print(f"✅ After cleaning: Open-Meteo {len(df_openmeteo)}, Weather {len(df_weather)}, AQI {len(df_aqi)}")
 
 # ------------------- MERGING -------------------
-print("\n🔗 Merging data...")
+print("\n🔗 Aligning sources on the hourly grid...")
 
-# Merge pollutants + weather first
-merged = pd.merge(df_openmeteo, df_weather, on="timestamp", how="outer")
-
-# Merge any AQI values (if they exist)
+# Pollutants + weather (+ any AQI values) on one hourly grid, each source bucketed by
+# the hour its records fall in, last value per hour (see scripts/align.py); the rows come
+# back sorted by timestamp, one per hour that any source reached
+sources = {"openmeteo": df_openmeteo, "weather": df_weather}
 if 'aqi' in df_aqi.columns:
-    merged = pd.merge(merged, df_aqi[['timestamp', 'aqi']], on="timestamp", how="left")
+    sources["aqi"] = df_aqi[['timestamp', 'aqi']]
+merged = align_sources(sources)
 
-# ✅ Sort by timestamp
-merged.sort_values(by="timestamp", inplace=True)
+# AQI is only taken where pollutants or weather exist (as the old left join did)
+if 'aqi' in merged.columns:
+    merged = merged[merged.drop(columns=['timestamp', 'aqi']).notna().any(axis=1)]
 
 # ------------------- AQI CALCULATION -------------------
 print("\n📊 Calculating AQI from pollutants...")
 
-def calc_subindex(c, breakpoints):
-    """Calculate subindex for one pollutant based on breakpoints"""
-    for bp in breakpoints:
-        c_low, c_high, i_low, i_high = bp
-        if c_low <= c <= c_high:
-            return ((i_high - i_low) / (c_high - c_low)) * (c - c_low) + i_low
-    return None  # If outside defined range
-
-# Simplified AQI breakpoints for pollutants (values in µg/m³ or ppb approximations)
-breakpoints = {
-    'co': [
-        (0.0, 4400, 0, 50),
-        (4500, 9400, 51, 100),
-        (9500, 12400, 101, 150),
-        (12500, 15400, 151, 200),
-    ],
-    'no2': [
-        (0, 53, 0, 50),
-        (54, 100, 51, 100),
-        (101, 360, 101, 150),
-    ],
-    'o3': [
-        (0, 54, 0, 50),
-        (55, 70, 51, 100),
-        (71, 85, 101, 150),
-    ],
-    'so2': [
-        (0, 35, 0, 50),
-        (36, 75, 51, 100),
-        (76, 185, 101, 150),
-    ]
-}
-
-def calculate_aqi(row):
-    subindexes = []
-    for pol in pollutants:
-        val = row.get(pol)
-        if pd.notna(val):
-            idx = calc_subindex(val, breakpoints[pol])
-            if idx is not None:
-                subindexes.append(idx)
-    return max(subindexes) if subindexes else None
-
-# Apply AQI calculation for every row
-merged['calculated_aqi'] = merged.apply(calculate_aqi, axis=1)
+# Vectorized breakpoint sub-indices (see scripts/aqi.py) for every row at once
+merged['calculated_aqi'] = breakpoint_aqi(merged)
 
 # If existing AQI is missing, use calculated AQI
 if 'aqi' in merged.columns:
@@ -127,7 +92,7 @@ merged.drop(columns=['calculated_aqi'], inplace=True)
 print("✅ AQI calculated and filled.")
 
 # ------------------- SAVE -------------------
-merged.to_csv(output_file, index=False)
+write_frame(merged, output_file, partition_by="month")
 print(f"\n🎉 Final dataset ready: {output_file}")
 print(f"📊 Total rows: {len(merged)}")
 print("✅ This dataset is CLEAN, MERGED, and READY for feature engineering.")
@@ -1,71 +1,167 @@
 # scripts/clean_aqi_json_v2.py
+import argparse
 import json
 from pathlib import Path
 import pandas as pd
 import numpy as np
 
-RAW_JSON = Path("data/aqi_data.json")
-OUT_CSV  = Path("data/hourly_clean_updated.csv")
+from raw_store import RawStore
+from columnar_store import load_frame, write_frame
+from aqi import proxy_aqi
+from stations import get_station, load_stations
+from instrument import collect, stage
+
+OUT_CSV   = Path("data/hourly_clean_updated.csv")
+WATERMARK = Path("data/hourly_clean_watermark.json")   # last (possibly unfinished) hour already cleaned
+METRICS   = Path("data/hourly_clean_metrics.json")     # per-stage timings of the last run
+PROFILE   = Path("data/hourly_clean.prof")             # --profile
+# (default station; other stations use the same names under data/stations/<id>/)
 
 START_DATE = pd.Timestamp("2025-07-26 00:00:00")  # keep from here onward
 
-def compute_aqi(df: pd.DataFrame) -> pd.Series:
+NUMERIC_COLS = ["o3","co","no2","so2","temp_c","humidity","wind_kph","pressure_mb"]
+
+def hourly_last(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Your EPA-style proxy (no PM2.5/PM10):
-    AQI = 0.02*CO + 0.6*NO2 + 0.3*O3 + 0.5*SO2
+    Raw records → one row per hour: for each hour and column take the LAST
+    non-null value. GroupBy.last() skips NaN per column, so this is the
+    vectorized equivalent of a per-group `s.dropna().iloc[-1]`.
     """
-    # Coerce numeric
-    for col in ["co","no2","o3","so2"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        else:
-            df[col] = np.nan
-    return (df["co"] * 0.02) + (df["no2"] * 0.6) + (df["o3"] * 0.3) + (df["so2"] * 0.5)
-
-def main():
-    if not RAW_JSON.exists():
-        raise FileNotFoundError(f"Raw JSON not found: {RAW_JSON}")
-
-    with RAW_JSON.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    df = pd.DataFrame(data)
-    if df.empty:
-        raise ValueError("JSON contained no rows.")
-
     # Parse & sort time
     df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
     df = df.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
 
-    # Keep from 26 July onward
+    # Keep from 26 July onward (already range-read; keeps the check explicit)
     df = df[df["timestamp"] >= START_DATE].copy()
 
     # Coerce numeric for all known numeric cols
-    numeric_cols = ["o3","co","no2","so2","temp_c","humidity","wind_kph","pressure_mb"]
-    for c in numeric_cols:
+    for c in NUMERIC_COLS:
         if c in df.columns:
             df[c] = pd.to_numeric(df[c], errors="coerce")
+        else:
+            df[c] = np.nan
 
-    # Aggregate to hourly: floor to hour, then for each hour take the LAST non-null row
-    df["hour_bucket"] = df["timestamp"].dt.floor("H")
-    # Sort within hour so 'last' is truly last
+    # Aggregate to hourly: floor to hour; sort within hour so 'last' is truly last
+    df["hour_bucket"] = df["timestamp"].dt.floor("h")
     df = df.sort_values(["hour_bucket", "timestamp"])
+    hourly = df.groupby("hour_bucket", as_index=False)[NUMERIC_COLS].last()
+    return hourly.rename(columns={"hour_bucket": "timestamp"})
+
+def aggregate_hourly(df: pd.DataFrame) -> pd.DataFrame:
+    """hourly_last() + the deterministic "current AQI" from your formula."""
+    hourly = hourly_last(df)
+    hourly["aqi"] = proxy_aqi(hourly)
+    return hourly
 
-    # Define how to take last non-null in a group
-    def last_valid(s: pd.Series):
-        return s.dropna().iloc[-1] if s.dropna().size > 0 else np.nan
+def aggregate_hourly_chunks(chunks) -> pd.DataFrame:
+    """
+    aggregate_hourly() over time-ordered raw chunks (RawStore.iter_frames).
+    "Last non-null per hour" composes: an hour split across two chunks is the
+    last non-null of its two partial rows, so only one chunk plus the hourly
+    partials are ever in memory.
+    """
+    partials = [hourly_last(chunk) for chunk in chunks]
+    partials = [p for p in partials if not p.empty]
+    if not partials:
+        return pd.DataFrame()
+    hourly = pd.concat(partials, ignore_index=True)
+    hourly = hourly.groupby("timestamp", as_index=False, sort=True)[NUMERIC_COLS].last()
+    hourly["aqi"] = proxy_aqi(hourly)
+    return hourly
+
+def read_watermark(existing: pd.DataFrame, watermark: Path = WATERMARK):
+    """
+    Watermark = start of the newest hour bucket already in the output. It is only
+    trusted if the output still ends at that hour (otherwise do a full rebuild).
+    Returns (mark, watermark dict) or (None, {}).
+    """
+    if not watermark.exists() or existing is None or existing.empty:
+        return None, {}
+    with watermark.open("r", encoding="utf-8") as f:
+        info = json.load(f)
+    mark = pd.Timestamp(info["last_hour"])
+    return (mark, info) if existing["timestamp"].max() == mark else (None, {})
 
-    agg_dict = {c: last_valid for c in numeric_cols}
-    hourly = df.groupby("hour_bucket", as_index=False).agg(agg_dict)
-    hourly = hourly.rename(columns={"hour_bucket": "timestamp"})
+def raw_seen(df: pd.DataFrame) -> dict:
+    """Newest raw timestamp + record count of a read from the watermark hour (to spot a no-op rerun)."""
+    ts = pd.to_datetime(df["timestamp"], errors="coerce")
+    return {"last_record": str(ts.max()), "records": int(len(df))}
 
-    # Compute AQI with your formula (deterministic "current AQI")
-    hourly["aqi"] = compute_aqi(hourly)
+def write_watermark(hourly: pd.DataFrame, watermark: Path = WATERMARK, seen: dict = None) -> None:
+    with watermark.open("w", encoding="utf-8") as f:
+        json.dump({"last_hour": str(hourly["timestamp"].max()), "rows": int(len(hourly)), **(seen or {})},
+                  f, indent=2)
+
+def clean_station(store: RawStore, out_csv: Path = OUT_CSV, watermark: Path = WATERMARK, full: bool = False):
+    """Raw store → clean hourly CSV for one station (incremental unless `full`)."""
+    if not store.exists():
+        raise FileNotFoundError(f"Raw store not found: {store.path} (run scripts/raw_store.py --migrate)")
+
+    with stage("load_existing") as st:
+        existing = load_frame(out_csv) if (out_csv.exists() and not full) else None
+        mark, info = (None, {}) if full else read_watermark(existing, watermark)
+        st["rows"] = 0 if existing is None else len(existing)
+
+    fresh, seen = None, None
+    if mark is None:
+        # Full rebuild: stream every record from START_DATE onward, chunk by chunk
+        with stage("read_aggregate") as st:
+            hourly = aggregate_hourly_chunks(store.iter_frames(start=START_DATE))
+            st["rows_out"] = len(hourly)
+        if hourly.empty:
+            raise ValueError("Raw store contained no rows.")
+        print(f"🧹 Full rebuild from {START_DATE}")
+    else:
+        # Incremental: only raw records from the watermark hour onward (that hour may
+        # have been unfinished last run, so it is re-aggregated and replaced)
+        with stage("read_raw") as st:
+            df = store.read_frame(start=mark)
+            st["rows"] = len(df)
+        if df.empty:
+            print(f"⏩ No raw records since {mark}; {out_csv} unchanged.")
+            return
+        seen = raw_seen(df)
+        if all(info.get(k) == v for k, v in seen.items()):
+            # Same records as the run that wrote the watermark → same output; leave the files untouched
+            print(f"⏩ No raw records newer than {seen['last_record']}; {out_csv} unchanged.")
+            return
+        with stage("aggregate_hourly", rows=len(df)) as st:
+            fresh = aggregate_hourly(df)
+            st["rows_out"] = len(fresh)
+        kept = existing[existing["timestamp"] < fresh["timestamp"].min()]
+        hourly = pd.concat([kept, fresh], ignore_index=True)
+        print(f"🧹 Incremental: {len(df)} raw records → {len(fresh)} hour bucket(s) from {mark}")
 
     # Final tidy + save
     hourly = hourly.sort_values("timestamp").reset_index(drop=True)
-    hourly.to_csv(OUT_CSV, index=False)
-    print(f"✅ Clean hourly data saved → {OUT_CSV}  (rows={len(hourly)})")
+    with stage("write", rows=len(hourly)):
+        # CSV export + monthly partitions; incremental runs rewrite only the partition(s) of `fresh`
+        write_frame(hourly, out_csv, partition_by="month", changed=fresh)
+        write_watermark(hourly, watermark, seen)
+    print(f"✅ Clean hourly data saved → {out_csv}  (rows={len(hourly)})")
+
+def main(full: bool = False, station_ids: list = None, profile: bool = False):
+    # Default: the original single station; station_ids=[] → every configured station
+    if station_ids is None:
+        stations = [get_station()]
+    elif station_ids:
+        stations = [get_station(sid) for sid in station_ids]
+    else:
+        stations = load_stations()
+    with collect("clean_aqi_json_v2", METRICS, PROFILE if profile else None):
+        for station in stations:
+            if len(stations) > 1:
+                print(f"📍 {station.id}")
+            station.data_dir.mkdir(parents=True, exist_ok=True)
+            with stage(station.id):
+                clean_station(station.raw_store(), station.hourly_csv, station.watermark, full)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Raw store → clean hourly CSV")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and rebuild everything")
+    parser.add_argument("--station", action="append", dest="stations", metavar="ID",
+                        help="station id(s) from data/stations.json (default: karachi)")
+    parser.add_argument("--all-stations", action="store_true", help="clean every configured station")
+    parser.add_argument("--profile", action="store_true", help=f"also write a cProfile dump ({PROFILE})")
+    args = parser.parse_args()
+    main(args.full, [] if args.all_stations else args.stations, args.profile)
@@ -1,12 +1,15 @@
 import pandas as pd
 from datetime import datetime
 
+from raw_store import RawStore
+
 # 📂 File paths
-raw_file = "data/aqi_data.json"          # ✅ CI/CD keeps updating this
 clean_file = "data/hourly_clean.csv"     # ✅ We'll generate this cleaned version
+cutoff_date = datetime(2025, 7, 26)
 
 print("📥 Loading raw AQI data...")
-df = pd.read_json(raw_file)
+# ✅ CI/CD keeps appending to the raw store; stream only what we keep
+df = RawStore().read_frame(start=cutoff_date)
 
 print(f"✅ Raw file loaded: {len(df)} rows")
 
@@ -33,7 +36,6 @@ df = df.drop_duplicates(subset=['timestamp'], keep='last')
 print(f"🗑️ Dropped {before - len(df)} duplicate timestamps")
 
 # ✅ 5️⃣ Filter to keep only data from July 26, 2025 onward
-cutoff_date = datetime(2025, 7, 26)
 df = df[df['timestamp'] >= cutoff_date]
 
 # 6️⃣ Sort chronologically
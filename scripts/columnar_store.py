@@ -0,0 +1,416 @@
+# scripts/columnar_store.py
+"""
+Typed columnar on-disk tables (NumPy only, no extra dependency).
+
+A table `data/hourly_clean_updated.cols/` sits next to its CSV and contains
+    meta.json        {"rows": N, "columns": [{"name", "dtype"}...]}
+    <column>.bin     raw little-endian values, one file per column
+Timestamps are stored as int64 nanoseconds since epoch.
+
+Loading is a memory-map of only the requested columns — no text parsing and no
+datetime inference. Tables only ever gain rows at the end, so append_table()
+writes the new bytes and bumps the row count in meta.json.
+
+The CSV stays the export format (dashboard, downloads, git-friendly diffs);
+write_frame() writes both, load_frame() prefers the table when it is fresh.
+
+Time-partitioned layout (write_frame(..., partition_by="month" | "day")):
+    data/hourly_clean_updated.parts/
+        manifest.json    {"by", "columns", "partitions": [{"key", "min", "max", "rows"}...]}
+        2025-07/ ...     one columnar table per calendar month (or day), sorted by timestamp
+load_range(csv, start, end, columns) opens only the partitions whose
+[min, max] overlaps [start, end], so a range query costs in proportion to the
+range. write_frame(..., changed=rows) rewrites only the partitions of the
+new / replaced rows — the hourly ingest touches just the current month.
+
+    python scripts/columnar_store.py data/hourly_clean_updated.csv data/final_training_dataset_v3.csv
+    python scripts/columnar_store.py --partition month data/historic_weather.json
+converts existing CSVs (or JSON record arrays).
+"""
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+META = "meta.json"
+TS_DTYPE = "datetime64[ns]"
+MANIFEST = "manifest.json"
+PARTITION_UNITS = {"month": "datetime64[M]", "day": "datetime64[D]"}
+
+# Compact (memory-budget) mode for history/feature frames: float64 → float32,
+# calendar fields → int8. Timestamps stay datetime64[ns], which already is an
+# int64 epoch (8 bytes/row) and keeps the .dt accessors working.
+COMPACT_ENV = "AQI_COMPACT"
+CALENDAR_COLS = {"hour": np.int8, "dayofweek": np.int8, "month": np.int8}
+
+
+def table_path(csv_path) -> Path:
+    """data/foo.csv → data/foo.cols"""
+    return Path(csv_path).with_suffix(".cols")
+
+
+def _column_spec(s: pd.Series) -> str:
+    if pd.api.types.is_datetime64_any_dtype(s):
+        if getattr(s.dt, "tz", None) is not None:
+            raise ValueError(f"Column {s.name!r}: timezone-aware timestamps are not supported")
+        return TS_DTYPE
+    if pd.api.types.is_bool_dtype(s) or pd.api.types.is_numeric_dtype(s):
+        return np.dtype(s.dtype).newbyteorder("<").str
+    raise ValueError(f"Column {s.name!r} has unsupported dtype {s.dtype} (numeric / datetime only)")
+
+
+def _to_bytes(s: pd.Series, dtype: str) -> bytes:
+    if dtype == TS_DTYPE:
+        values = s.to_numpy(dtype="datetime64[ns]").view("<i8")
+    else:
+        values = s.to_numpy(dtype=np.dtype(dtype))
+    return np.ascontiguousarray(values).tobytes()
+
+
+def _read_meta(path: Path) -> dict:
+    with (path / META).open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_meta(path: Path, meta: dict) -> None:
+    tmp = path / (META + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, path / META)     # readers never see a half-written meta
+
+
+def save_table(df: pd.DataFrame, path) -> Path:
+    """(Re)write a whole table."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    columns = []
+    for name in df.columns:
+        dtype = _column_spec(df[name])
+        with (path / f"{name}.bin").open("wb") as f:
+            f.write(_to_bytes(df[name], dtype))
+        columns.append({"name": str(name), "dtype": dtype})
+    _write_meta(path, {"rows": int(len(df)), "columns": columns})
+    return path
+
+
+def append_table(df: pd.DataFrame, path) -> Path:
+    """Append rows with the same schema; creates the table if it doesn't exist."""
+    path = Path(path)
+    if not (path / META).exists():
+        return save_table(df, path)
+    meta = _read_meta(path)
+    names = [c["name"] for c in meta["columns"]]
+    if list(map(str, df.columns)) != names:
+        raise ValueError(f"Schema mismatch: table has {names}, got {list(df.columns)}")
+    for col in meta["columns"]:
+        data = _to_bytes(df[col["name"]], col["dtype"])
+        with (path / f"{col['name']}.bin").open("r+b") as f:
+            # Truncate any bytes past the committed row count (e.g. a crashed append)
+            f.truncate(meta["rows"] * np.dtype("<i8" if col["dtype"] == TS_DTYPE else col["dtype"]).itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(data)
+    meta["rows"] += int(len(df))
+    _write_meta(path, meta)
+    return path
+
+
+def table_columns(path) -> list:
+    return [c["name"] for c in _read_meta(Path(path))["columns"]]
+
+
+def table_rows(path) -> int:
+    return _read_meta(Path(path))["rows"]
+
+
+def truncate_table(path, rows: int) -> Path:
+    """Keep only the first `rows` rows (e.g. before re-appending a replaced tail)."""
+    path = Path(path)
+    meta = _read_meta(path)
+    if rows >= meta["rows"]:
+        return path
+    meta["rows"] = int(rows)
+    _write_meta(path, meta)         # commit first: readers/appends ignore bytes past the row count
+    for col in meta["columns"]:
+        itemsize = np.dtype("<i8" if col["dtype"] == TS_DTYPE else col["dtype"]).itemsize
+        with (path / f"{col['name']}.bin").open("r+b") as f:
+            f.truncate(rows * itemsize)
+    return path
+
+
+def replace_columns(path, df: pd.DataFrame, drop=()) -> Path:
+    """Rewrite (or add) the columns of `df` — one row per table row — and drop `drop`; other columns untouched."""
+    path = Path(path)
+    meta = _read_meta(path)
+    if len(df) != meta["rows"]:
+        raise ValueError(f"Column length {len(df)} != table rows {meta['rows']}")
+    specs = {c["name"]: c["dtype"] for c in meta["columns"]}
+    for name in df.columns:
+        dtype = _column_spec(df[name])
+        tmp = path / f"{name}.bin.tmp"
+        with tmp.open("wb") as f:
+            f.write(_to_bytes(df[name], dtype))
+        os.replace(tmp, path / f"{name}.bin")
+        specs[str(name)] = dtype
+    for name in drop:
+        specs.pop(name, None)
+    meta["columns"] = [{"name": n, "dtype": d} for n, d in specs.items()]
+    _write_meta(path, meta)
+    for name in drop:
+        (path / f"{name}.bin").unlink(missing_ok=True)
+    return path
+
+
+def load_table(path, columns=None, mmap: bool = True) -> pd.DataFrame:
+    """Load selected columns; with mmap=True the arrays are read-only views of the files."""
+    path = Path(path)
+    meta = _read_meta(path)
+    specs = {c["name"]: c["dtype"] for c in meta["columns"]}
+    wanted = list(specs) if columns is None else list(columns)
+    missing = [c for c in wanted if c not in specs]
+    if missing:
+        raise KeyError(f"Columns not in table {path}: {missing}")
+
+    n = meta["rows"]
+    data = {}
+    for name in wanted:
+        dtype = specs[name]
+        raw_dtype = np.dtype("<i8") if dtype == TS_DTYPE else np.dtype(dtype)
+        file = path / f"{name}.bin"
+        if n == 0:
+            arr = np.empty(0, dtype=raw_dtype)
+        elif mmap:
+            arr = np.memmap(file, dtype=raw_dtype, mode="r", shape=(n,))
+        else:
+            arr = np.fromfile(file, dtype=raw_dtype, count=n)
+        data[name] = arr.view("datetime64[ns]") if dtype == TS_DTYPE else arr
+    return pd.DataFrame(data, copy=False)
+
+
+# ---------- time-partitioned tables ----------
+def parts_path(csv_path) -> Path:
+    """data/foo.csv → data/foo.parts"""
+    return Path(csv_path).with_suffix(".parts")
+
+
+def _read_manifest(path: Path) -> dict:
+    with (path / MANIFEST).open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(path: Path, manifest: dict) -> None:
+    tmp = path / (MANIFEST + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path / MANIFEST)
+
+
+def _partition_keys(ts: pd.Series, by: str) -> np.ndarray:
+    """'2025-07' (month) / '2025-07-26' (day) per row."""
+    if by not in PARTITION_UNITS:
+        raise ValueError(f"partition_by must be one of {sorted(PARTITION_UNITS)}, got {by!r}")
+    return np.datetime_as_string(ts.to_numpy(dtype="datetime64[ns]").astype(PARTITION_UNITS[by]))
+
+
+def save_partitions(df: pd.DataFrame, path, by: str = "month", changed: pd.DataFrame = None) -> list:
+    """
+    (Re)write a partitioned table from the full frame `df`. With `changed` (the
+    new / replaced rows of `df`) only their partitions are rewritten. Returns
+    the partition keys written.
+    """
+    path = Path(path)
+    if df["timestamp"].isna().any():
+        raise ValueError("Partitioned tables need a timestamp on every row")
+    df = df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    keys = _partition_keys(df["timestamp"], by)
+    bounds = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])     # runs of one key (sorted)
+
+    columns = [{"name": str(n), "dtype": _column_spec(df[n])} for n in df.columns]
+    old = _read_manifest(path) if (path / MANIFEST).exists() else None
+    if changed is not None and old is not None and old["by"] == by and old["columns"] == columns:
+        touched = set(_partition_keys(changed["timestamp"], by))
+    else:
+        touched = None                                                    # everything
+    path.mkdir(parents=True, exist_ok=True)
+    manifest = {"by": by, "columns": columns, "partitions": []}
+    written = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        key, part = keys[lo], df.iloc[lo:hi]
+        if touched is None or key in touched:
+            save_table(part, path / key)
+            written.append(key)
+        manifest["partitions"].append({"key": key, "min": str(part["timestamp"].iloc[0]),
+                                       "max": str(part["timestamp"].iloc[-1]), "rows": int(hi - lo)})
+    _write_manifest(path, manifest)
+
+    # Partitions that no longer have rows
+    live = {p["key"] for p in manifest["partitions"]}
+    for stale in path.iterdir():
+        if stale.is_dir() and stale.name not in live:
+            shutil.rmtree(stale)
+    return written
+
+
+def load_partitions(path, start=None, end=None, columns=None) -> pd.DataFrame:
+    """Rows with start <= timestamp <= end, reading only the overlapping partitions."""
+    path = Path(path)
+    manifest = _read_manifest(path)
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    wanted = [c["name"] for c in manifest["columns"]] if columns is None else list(columns)
+    read = wanted if "timestamp" in wanted else ["timestamp", *wanted]
+
+    frames = []
+    for p in manifest["partitions"]:
+        lo, hi = pd.Timestamp(p["min"]), pd.Timestamp(p["max"])
+        if (start is not None and hi < start) or (end is not None and lo > end):
+            continue                                                      # pruned
+        part = load_table(path / p["key"], read)
+        if (start is not None and lo < start) or (end is not None and hi > end):
+            ts = part["timestamp"]
+            mask = np.ones(len(part), dtype=bool)
+            if start is not None:
+                mask &= (ts >= start).to_numpy()
+            if end is not None:
+                mask &= (ts <= end).to_numpy()
+            part = part[mask]
+        frames.append(part)
+    if not frames:
+        specs = {c["name"]: c["dtype"] for c in manifest["columns"]}
+        return pd.DataFrame({n: np.empty(0, dtype=specs[n]) for n in wanted})
+    return pd.concat(frames, ignore_index=True)[wanted]
+
+
+def parts_are_fresh(csv_path) -> bool:
+    """True if the partitioned table exists and was written no earlier than its source file."""
+    csv_path, manifest = Path(csv_path), parts_path(csv_path) / MANIFEST
+    if not manifest.exists():
+        return False
+    return not csv_path.exists() or manifest.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns
+
+
+def table_is_fresh(csv_path) -> bool:
+    """True if the table exists and was written no earlier than its CSV."""
+    csv_path, tbl = Path(csv_path), table_path(csv_path)
+    meta = tbl / META
+    if not meta.exists():
+        return False
+    return not csv_path.exists() or meta.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns
+
+
+def compact_enabled(compact=None) -> bool:
+    """Explicit flag wins; None → the AQI_COMPACT environment variable."""
+    if compact is None:
+        return os.getenv(COMPACT_ENV, "").strip().lower() in ("1", "true", "yes")
+    return bool(compact)
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """float64 columns as float32, calendar columns as int8 (shallow copy; the input is untouched)."""
+    out = df.copy(deep=False)
+    for name in out.columns:
+        if name in CALENDAR_COLS:
+            if out[name].dtype != CALENDAR_COLS[name]:
+                out[name] = out[name].astype(CALENDAR_COLS[name])
+        elif out[name].dtype == np.float64:
+            out[name] = out[name].astype(np.float32)
+    return out
+
+
+def _read_source(path, columns=None, parse_dates=("timestamp",)) -> pd.DataFrame:
+    """The CSV (or JSON record array) itself, with the same timestamp parsing."""
+    path = Path(path)
+    if path.suffix == ".json":
+        df = pd.read_json(path, convert_dates=False)
+        if columns is not None:
+            df = df[list(columns)]
+        for c in parse_dates:
+            if c in df.columns:
+                df[c] = pd.to_datetime(df[c], errors="coerce")
+        return df
+    header = pd.read_csv(path, nrows=0).columns
+    dates = [c for c in parse_dates if c in header and (columns is None or c in columns)]
+    return pd.read_csv(path, usecols=columns, parse_dates=dates or False)
+
+
+def load_frame(csv_path, columns=None, parse_dates=("timestamp",), compact: bool = False) -> pd.DataFrame:
+    """
+    Shared loader: partitioned or single columnar table when it's fresh,
+    otherwise the CSV (same columns and timestamp parsing either way).
+    `compact` → compact_frame().
+    """
+    if parts_are_fresh(csv_path):
+        df = load_partitions(parts_path(csv_path), columns=columns)
+    elif table_is_fresh(csv_path):
+        df = load_table(table_path(csv_path), columns)
+    else:
+        df = _read_source(csv_path, columns, parse_dates)
+    return compact_frame(df) if compact else df
+
+
+def load_range(csv_path, start=None, end=None, columns=None, compact: bool = False) -> pd.DataFrame:
+    """
+    Rows with start <= timestamp <= end (either bound optional). Only the
+    overlapping partitions are opened when a fresh partitioned table exists;
+    otherwise the whole source is loaded and filtered.
+    """
+    if parts_are_fresh(csv_path):
+        df = load_partitions(parts_path(csv_path), start, end, columns)
+    else:
+        read = None if columns is None else list(dict.fromkeys(["timestamp", *columns]))
+        df = load_frame(csv_path, read)
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (df["timestamp"] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (df["timestamp"] <= pd.Timestamp(end)).to_numpy()
+        df = df[mask].reset_index(drop=True)
+        if columns is not None:
+            df = df[list(columns)]
+    return compact_frame(df) if compact else df
+
+
+def write_frame(df: pd.DataFrame, csv_path, partition_by: str = None, changed: pd.DataFrame = None) -> None:
+    """
+    Write the CSV export and its columnar copy (written last, so it counts as
+    fresh): a single table, or with `partition_by` a time-partitioned table in
+    which only the partitions of `changed` (new / replaced rows) are rewritten.
+    """
+    # An out-of-date partitioned table can't be patched: decide before the CSV is rewritten
+    if changed is not None and not parts_are_fresh(csv_path):
+        changed = None
+    df.to_csv(csv_path, index=False)
+    try:
+        if partition_by:
+            save_partitions(df, parts_path(csv_path), partition_by, changed)
+        else:
+            save_table(df, table_path(csv_path))
+    except ValueError as e:
+        print(f"⚠️ Columnar table skipped for {csv_path}: {e}")
+
+
+def convert_csv(csv_path, partition_by: str = None) -> Path:
+    df = _read_source(csv_path, parse_dates=())
+    if "timestamp" in df.columns:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    if partition_by:
+        out = parts_path(csv_path)
+        save_partitions(df, out, partition_by)
+        return out
+    return save_table(df, table_path(csv_path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert CSVs (or JSON record arrays) to columnar tables")
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("--partition", choices=sorted(PARTITION_UNITS),
+                        help="time-partitioned table (<file>.parts/) instead of a single one")
+    args = parser.parse_args()
+    for p in args.files:
+        out = convert_csv(p, args.partition)
+        rows = (sum(x["rows"] for x in _read_manifest(out)["partitions"]) if args.partition
+                else _read_meta(out)["rows"])
+        print(f"✅ {p} → {out} (rows={rows})")
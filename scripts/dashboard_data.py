@@ -0,0 +1,144 @@
+# scripts/dashboard_data.py
+"""
+Data access for the Streamlit dashboard (app.py).
+
+- remote mode (default): CSVs from raw.githubusercontent, through an on-disk
+  HTTP cache. Within the TTL nothing goes over the network; after it, a
+  conditional GET (If-None-Match / If-Modified-Since) is sent and a 304 just
+  renews the cached copy. If GitHub is unreachable the last copy is served.
+- local mode: reads the files in data/ directly (columnar table when fresh).
+
+Parsed DataFrames are memoized per content version, so a Streamlit rerun
+with unchanged data costs a dict lookup.
+
+    AQI_DATA_SOURCE=local streamlit run app.py
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+try:
+    from columnar_store import load_frame
+except ImportError:                      # imported from app.py as scripts.dashboard_data
+    from scripts.columnar_store import load_frame
+
+SOURCE_ENV = "AQI_DATA_SOURCE"           # "remote" (default) or "local"
+DEFAULT_TTL = 300                        # seconds before revalidating with the server
+CACHE_DIR = Path(os.getenv("AQI_CACHE_DIR", Path(tempfile.gettempdir()) / "aqi_dashboard_cache"))
+
+
+class HTTPCache:
+    """Tiny on-disk HTTP cache with TTL + ETag/Last-Modified revalidation."""
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl: float = DEFAULT_TTL, session=None, clock=time.time):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.session = session or requests.Session()
+        self.clock = clock
+        self.stats = {"fresh": 0, "revalidated": 0, "downloaded": 0, "stale": 0}
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.json"
+
+    def _save_meta(self, meta_path: Path, meta: dict) -> None:
+        tmp = meta_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+    def fetch(self, url: str, timeout: float = 15):
+        """Return (body bytes, version string) for url."""
+        body_path, meta_path = self._paths(url)
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() and body_path.exists() else None
+
+        if meta and self.clock() - meta["checked_at"] < self.ttl:
+            self.stats["fresh"] += 1
+            return body_path.read_bytes(), meta["version"]
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            resp = self.session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            if meta:                      # offline: serve what we have
+                self.stats["stale"] += 1
+                return body_path.read_bytes(), meta["version"]
+            raise
+
+        if resp.status_code == 304 and meta:
+            meta["checked_at"] = self.clock()
+            self._save_meta(meta_path, meta)
+            self.stats["revalidated"] += 1
+            return body_path.read_bytes(), meta["version"]
+
+        resp.raise_for_status()
+        body = resp.content
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = body_path.with_suffix(".body.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, body_path)
+        meta = {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "version": resp.headers.get("ETag") or hashlib.sha256(body).hexdigest(),
+            "checked_at": self.clock(),
+        }
+        self._save_meta(meta_path, meta)
+        self.stats["downloaded"] += 1
+        return body, meta["version"]
+
+
+def latest_row(df: pd.DataFrame, col: str = "timestamp") -> pd.Series:
+    """Row with the newest timestamp — O(n) idxmax instead of sorting the history."""
+    return df.loc[df[col].idxmax()]
+
+
+class DashboardData:
+    """History + predictions for the dashboard, from GitHub (cached) or local files."""
+
+    def __init__(self, source: str, urls: dict, local_paths: dict, cache: HTTPCache = None):
+        if source not in ("remote", "local"):
+            raise ValueError(f"Unknown data source {source!r} (expected 'remote' or 'local')")
+        self.source = source
+        self.urls = urls
+        self.local_paths = {k: Path(v) for k, v in local_paths.items()}
+        self.cache = cache or HTTPCache()
+        self._frames = {}                 # name → (version, DataFrame)
+
+    @classmethod
+    def from_env(cls, urls: dict, local_paths: dict, **kwargs):
+        return cls(os.getenv(SOURCE_ENV, "remote"), urls, local_paths, **kwargs)
+
+    def _memo(self, name: str, version, parse):
+        cached = self._frames.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        df = parse()
+        self._frames[name] = (version, df)
+        return df
+
+    def frame(self, name: str) -> pd.DataFrame:
+        if self.source == "local":
+            path = self.local_paths[name]
+            st = path.stat()
+            return self._memo(name, (st.st_mtime_ns, st.st_size), lambda: load_frame(path))
+        body, version = self.cache.fetch(self.urls[name])
+        return self._memo(name, version, lambda: pd.read_csv(io.BytesIO(body), parse_dates=["timestamp"]))
+
+    def history(self) -> pd.DataFrame:
+        return self.frame("history")
+
+    def predictions(self) -> pd.DataFrame:
+        return self.frame("predictions")
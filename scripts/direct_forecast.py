@@ -0,0 +1,68 @@
+# scripts/direct_forecast.py
+"""
+Direct multi-horizon forecasting helpers.
+
+Instead of feeding each prediction back in (72 sequential model.predict calls),
+a single model is trained on (origin features, horizon) → AQI at origin + horizon.
+At serving time the whole forecast is one predict over a 72-row matrix:
+the same origin row repeated once per horizon, plus the horizon columns.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from forest_intervals import make_predictor
+
+# Extra columns appended to the (scaled) origin features
+HORIZON_COLS = ["horizon", "target_hour_sin", "target_hour_cos"]
+
+
+def horizon_block(origin_times: pd.Series, horizons: np.ndarray) -> np.ndarray:
+    """Horizon + cyclical hour-of-day of the *target* time, one row per (origin, horizon)."""
+    target_hour = (pd.DatetimeIndex(origin_times).hour.to_numpy() + horizons) % 24
+    return np.column_stack([
+        horizons.astype(float),
+        np.sin(2 * np.pi * target_hour / 24),
+        np.cos(2 * np.pi * target_hour / 24),
+    ])
+
+
+def build_direct_training_set(df_fe: pd.DataFrame, X_scaled: np.ndarray, max_horizon: int = 72):
+    """
+    Stack one block per horizon h: features at time t (already scaled) + horizon
+    columns, target = AQI observed at exactly t + h hours (rows without a target
+    because of gaps in the history are dropped).
+    """
+    ts = pd.to_datetime(df_fe["timestamp"]).reset_index(drop=True)
+    aqi_at = pd.Series(df_fe["aqi"].to_numpy(), index=ts)
+    aqi_at = aqi_at[~aqi_at.index.duplicated(keep="last")]
+
+    X_blocks, y_blocks = [], []
+    for h in range(1, max_horizon + 1):
+        y_h = aqi_at.reindex(ts + timedelta(hours=h)).to_numpy()
+        ok = ~np.isnan(y_h)
+        if not ok.any():
+            continue
+        hz = horizon_block(ts[ok], np.full(ok.sum(), h))
+        X_blocks.append(np.hstack([X_scaled[ok], hz]))
+        y_blocks.append(y_h[ok])
+    if not X_blocks:
+        raise ValueError("No (origin, horizon) pairs found — history too short or too gappy.")
+    return np.vstack(X_blocks), np.concatenate(y_blocks)
+
+
+def direct_forecast_matrix(origin_scaled: np.ndarray, last_time: pd.Timestamp, hours: int = 72) -> np.ndarray:
+    """72-row design matrix: the origin row repeated per horizon + horizon columns."""
+    horizons = np.arange(1, hours + 1)
+    origin = np.repeat(np.asarray(origin_scaled).reshape(1, -1), hours, axis=0)
+    hz = horizon_block(pd.Series([last_time] * hours), horizons)
+    return np.hstack([origin, hz])
+
+
+def direct_forecast(model, origin_scaled: np.ndarray, last_time: pd.Timestamp, hours: int = 72,
+                    coverage: float = None) -> pd.DataFrame:
+    """Whole forecast (plus pred_lo/pred_hi with a coverage) from one batched predict call."""
+    X = direct_forecast_matrix(origin_scaled, last_time, hours)
+    times = [last_time + timedelta(hours=h) for h in range(1, hours + 1)]
+    return pd.DataFrame({"timestamp": times, **make_predictor(model, coverage)(X)})
@@ -1,36 +1,23 @@
 import pandas as pd
-import json
 
-# ---------- Paths ----------
-json_path = "data/aqi_data.json"
-
-# ---------- Load JSON ----------
-with open(json_path, "r") as f:
-    data = json.load(f)
-
-df = pd.DataFrame(data)
-
-# ---------- Convert timestamp ----------
-df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed')
-
-# ---------- Keep only clean data from 26 July 2025 onwards ----------
-df = df[df['timestamp'] >= "2025-07-26 17:08:15"]
+from raw_store import RawStore
+from aqi import proxy_aqi
 
 # ---------- Select pollutants + weather ----------
 pollutant_cols = ['timestamp', 'co', 'no2', 'o3', 'so2', 
                   'temp_c', 'humidity', 'wind_kph', 'pressure_mb']
-df = df[pollutant_cols]
 
-# ---------- Calculate Real AQI (EPA-style formula) ----------
-df['aqi'] = (
-    df['co'] * 0.02 +
-    df['no2'] * 0.6 +
-    df['o3'] * 0.3 +
-    df['so2'] * 0.5
-)
+def load_window(start, end):
+    """Raw records in [start, end) — only that range is read from the store — with the real AQI."""
+    df = RawStore().read_frame(start=start, end=pd.Timestamp(end) - pd.Timedelta(seconds=1))
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='mixed')
+    df = df[(df['timestamp'] >= start) & (df['timestamp'] < end)][pollutant_cols]
+    # ---------- Calculate Real AQI (EPA-style formula) ----------
+    df['aqi'] = proxy_aqi(df)
+    return df
 
 # ---------- Evaluation dataset (1–3 Aug) ----------
-eval_df = df[(df['timestamp'] >= "2025-08-01") & (df['timestamp'] < "2025-08-04")]
+eval_df = load_window("2025-08-01", "2025-08-04")
 
 # Save pollutants only
 eval_df[pollutant_cols].to_csv("data/pollutants_1_3_aug.csv", index=False)
@@ -42,7 +29,7 @@ print(f"✅ Saved evaluation pollutants: data/pollutants_1_3_aug.csv ({eval_df.s
 print(f"✅ Saved evaluation actual AQI: data/real_aqi_1_3_aug.csv ({eval_df.shape[0]} rows)")
 
 # ---------- Forecast dataset (4–6 Aug) ----------
-forecast_df = df[(df['timestamp'] >= "2025-08-04") & (df['timestamp'] < "2025-08-07")]
+forecast_df = load_window("2025-08-04", "2025-08-07")
 
 # Save pollutants only
 forecast_df[pollutant_cols].to_csv("data/pollutants_4_6_aug.csv", index=False)
@@ -2,6 +2,29 @@
 import pandas as pd
 import numpy as np
 
+from instrument import stage
+from columnar_store import compact_enabled, compact_frame
+
+# Lag / rolling windows used for the AQI features (shared with incremental_features.py)
+LAGS = [1, 3, 6]
+WINDOWS = [3, 12]
+
+# Station-keyed frames (scripts/stations.py): lags/rollings never cross stations
+STATION_COL = "station"
+
+# Feature spec, as used by the persisted feature store (scripts/feature_store.py):
+# output column → definition string. The store recomputes a column only when its
+# definition changes; bump FEATURE_SPEC_VERSION to invalidate every column (e.g.
+# after changing the code of a make_* function).
+FEATURE_SPEC_VERSION = 1
+TIME_FEATURES = ['hour', 'dayofweek', 'month', 'hour_sin', 'hour_cos']
+
+def _series(df, col):
+    """The column, grouped per station when the frame is station-keyed."""
+    if STATION_COL in df.columns:
+        return df.groupby(STATION_COL, sort=False)[col]
+    return df[col]
+
 def make_time_features(df):
     df['hour'] = df['timestamp'].dt.hour
     df['dayofweek'] = df['timestamp'].dt.dayofweek
@@ -10,60 +33,148 @@ def make_time_features(df):
     df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
     return df
 
-def make_lags(df, col='aqi', lags=[1, 3, 6]):
+def make_lags(df, col='aqi', lags=LAGS):
     for lag in lags:
         if col in df.columns:
-            df[f"{col}_lag_{lag}"] = df[col].shift(lag)
+            df[f"{col}_lag_{lag}"] = _series(df, col).shift(lag)
         else:
             df[f"{col}_lag_{lag}"] = np.nan
     return df
 
-def make_rolling(df, col='aqi', windows=[3, 12]):
+def make_rolling(df, col='aqi', windows=WINDOWS):
     for w in windows:
         if col in df.columns:
-            df[f"{col}_roll_{w}"] = df[col].rolling(window=w, min_periods=1).mean()
+            roll = _series(df, col).rolling(window=w, min_periods=1).mean()
+            if STATION_COL in df.columns:
+                roll = roll.reset_index(level=0, drop=True)   # drop the station level
+            df[f"{col}_roll_{w}"] = roll
         else:
             df[f"{col}_roll_{w}"] = np.nan
     return df
 
-def feature_engineering_pipeline(df: pd.DataFrame) -> pd.DataFrame:
+def make_change_rate(df, col='aqi'):
+    if col in df.columns:
+        df[f'{col}_change_rate'] = _series(df, col).diff().fillna(0)
+    else:
+        df[f'{col}_change_rate'] = np.nan
+    return df
+
+def feature_spec(lags=LAGS, windows=WINDOWS) -> dict:
+    """{feature column: definition} for the current pipeline settings."""
+    spec = {name: f"time:{name}" for name in TIME_FEATURES}
+    spec.update({f"aqi_lag_{k}": f"lag:aqi:{k}" for k in lags})
+    spec.update({f"aqi_roll_{w}": f"rolling_mean:aqi:{w}" for w in windows})
+    spec['aqi_change_rate'] = "diff:aqi:1"
+    return {name: f"v{FEATURE_SPEC_VERSION}:{d}" for name, d in spec.items()}
+
+def _spec_params(spec: dict):
+    """Definition strings → (time columns, lags, windows, change rate?)."""
+    times, lags, windows, change = [], [], [], False
+    for name, definition in spec.items():
+        kind, *args = definition.split(":")[1:]
+        if kind == "time":
+            times.append(name)
+        elif kind == "lag":
+            lags.append(int(args[1]))
+        elif kind == "rolling_mean":
+            windows.append(int(args[1]))
+        elif kind == "diff":
+            change = True
+        else:
+            raise ValueError(f"Unknown feature definition for {name!r}: {definition}")
+    return times, lags, windows, change
+
+def context_rows(spec: dict) -> int:
+    """How many preceding rows a row's features depend on."""
+    _, lags, windows, change = _spec_params(spec)
+    return max(lags + [w - 1 for w in windows] + [1 if change else 0, 0])
+
+def compute_features(df: pd.DataFrame, spec: dict) -> pd.DataFrame:
+    """
+    Just the feature columns named in `spec`, row-aligned with `df` (no NaN
+    dropping) — same make_* functions as the pipeline, for feature_store.py.
+    """
+    times, lags, windows, change = _spec_params(spec)
+    work = df.copy(deep=False)
+    if times:
+        work = make_time_features(work)
+    if lags:
+        work = make_lags(work, 'aqi', sorted(lags))
+    if windows:
+        work = make_rolling(work, 'aqi', sorted(windows))
+    if change:
+        work = make_change_rate(work, 'aqi')
+    return work[list(spec)]
+
+def feature_engineering_pipeline(df: pd.DataFrame, compact: bool = None) -> pd.DataFrame:
     """
     Applies the complete feature engineering process.
     Handles both training (AQI exists) and forecasting (AQI missing).
+    A station-keyed frame (with a `station` column) is processed for all
+    stations in one grouped pass; rows come back sorted by station, timestamp.
+    The input frame is never modified, so callers need not copy it.
+    `compact` (default: $AQI_COMPACT) keeps inputs and features as float32 and
+    calendar fields as int8 (columnar_store.compact_frame).
     """
-    df = df.copy()
-    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-    df = df.dropna(subset=['timestamp'])
-
-    has_aqi = 'aqi' in df.columns
-
-    df = make_time_features(df)
-    df = make_lags(df, 'aqi')
-    df = make_rolling(df, 'aqi')
-
-    if has_aqi:
-        df['aqi_change_rate'] = df['aqi'].diff().fillna(0)
-        initial_rows = len(df)
-        df = df.dropna().reset_index(drop=True)
-        if len(df) < initial_rows:
-            print(f"Dropped {initial_rows - len(df)} rows due to NaN after FE.")
-    else:
-        df['aqi_change_rate'] = np.nan
+    compact = compact_enabled(compact)
+    with stage("feature_engineering", rows=len(df)) as st:
+        # Shallow copy: added/replaced columns never reach the caller's frame,
+        # and no column data is duplicated up front
+        df = compact_frame(df) if compact else df.copy(deep=False)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+        df = df.dropna(subset=['timestamp'])
+        if STATION_COL in df.columns:
+            df = df.sort_values([STATION_COL, 'timestamp'], kind='stable').reset_index(drop=True)
+
+        has_aqi = 'aqi' in df.columns
+
+        with stage("time_features"):
+            df = make_time_features(df)
+        with stage("lags"):
+            df = make_lags(df, 'aqi')
+        with stage("rolling"):
+            df = make_rolling(df, 'aqi')
+
+        df = make_change_rate(df, 'aqi')
+        if has_aqi:
+            if compact:
+                df = compact_frame(df)     # before dropna, so its copy is already small
+            initial_rows = len(df)
+            df = df.dropna().reset_index(drop=True)
+            if len(df) < initial_rows:
+                print(f"Dropped {initial_rows - len(df)} rows due to NaN after FE.")
+        elif compact:
+            df = compact_frame(df)
+        st["rows_out"] = len(df)
 
     return df
 if __name__ == "__main__":
+    import argparse
     import os
+    from columnar_store import load_frame, write_frame
+    from feature_store import load_features
+    from instrument import collect
+
+    parser = argparse.ArgumentParser(description="Clean hourly CSV → feature CSV (via the feature store)")
+    parser.add_argument("--profile", action="store_true",
+                        help="also write a cProfile dump (data/hourly_features.prof)")
+    args = parser.parse_args()
 
-    # 1️⃣ Load the cleaned data
     input_path = os.path.join("data", "hourly_clean_updated.csv")
-    df = pd.read_csv(input_path)
+    output_path = os.path.join("data", "hourly_features.csv")
+    with collect("feature_engineering", metrics_path=os.path.join("data", "hourly_features_metrics.json"),
+                 profile_path=os.path.join("data", "hourly_features.prof") if args.profile else None):
+        # 1️⃣ Load the cleaned data
+        with stage("load_csv") as st:
+            df = load_frame(input_path)
+            st["rows"] = len(df)
 
-    # 2️⃣ Run feature engineering
-    df_fe = feature_engineering_pipeline(df)
+        # 2️⃣ Feature engineering: only hours not yet in the feature store are computed
+        df_fe = load_features(input_path, df)
 
-    # 3️⃣ Save the features file
-    output_path = os.path.join("data", "hourly_features.csv")
-    df_fe.to_csv(output_path, index=False)
+        # 3️⃣ Save the features file (export of the store)
+        with stage("write_csv", rows=len(df_fe)):
+            write_frame(df_fe, output_path)
 
     # 4️⃣ Print success message
     print(f"✅ Features saved → {output_path} (rows={len(df_fe)})")
@@ -0,0 +1,171 @@
+# scripts/feature_store.py
+"""
+Persisted, incrementally maintained feature table for an hourly history.
+
+    data/hourly_clean_updated.features/     (next to its source CSV)
+        meta.json, <column>.bin              columnar table (scripts/columnar_store.py)
+        spec.json                            {"source_columns": [...], "spec": {feature: definition}}
+
+One row per source row, keyed by timestamp: the source columns plus every
+feature of feature_engineering.feature_spec(), kept *before* the pipeline's
+NaN-row drop. load() applies that drop, so
+    FeatureStore.for_source(csv).sync(df).load()  ==  feature_engineering_pipeline(df)
+and training (train_model.py, train_direct_model.py) and live inference
+(predict_live.py, forecast_service.py) read the same engineered rows.
+
+sync(df) does the least work that makes the table current:
+  • rows     stored source columns are compared with `df`; the first differing
+             row (usually the re-aggregated last hour) and everything after it
+             are recomputed, from context_rows() of earlier history
+  • columns  features whose definition changed, or that are new (e.g. another
+             lag), are recomputed over the stored rows; features no longer in
+             the spec are dropped — the other columns are not touched
+  • a different set of source columns → full rebuild
+
+    python scripts/feature_store.py data/hourly_clean_updated.csv data/final_training_dataset_v3.csv
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import (append_table, compact_frame, load_frame, load_table, replace_columns,
+                            save_table, table_columns, table_rows, truncate_table)
+from feature_engineering import STATION_COL, compute_features, context_rows, feature_spec
+from instrument import stage
+
+SPEC_FILE = "spec.json"
+
+
+def store_path(source_csv) -> Path:
+    """data/foo.csv → data/foo.features"""
+    return Path(source_csv).with_suffix(".features")
+
+
+def _prefix_length(stored: pd.DataFrame, src: pd.DataFrame) -> int:
+    """Number of leading rows on which every source column is identical (NaN == NaN)."""
+    n = min(len(stored), len(src))
+    same = np.ones(n, dtype=bool)
+    for name in src.columns:
+        a, b = stored[name].to_numpy()[:n], src[name].to_numpy()[:n]
+        if np.issubdtype(a.dtype, np.datetime64):
+            a, b = a.astype("datetime64[ns]"), b.astype("datetime64[ns]")
+            same &= a == b
+        else:
+            same &= (a == b) | (pd.isna(a) & pd.isna(b))
+    return n if same.all() else int(np.argmin(same))
+
+
+class FeatureStore:
+    def __init__(self, path, spec: dict = None):
+        self.path = Path(path)
+        self.spec = spec if spec is not None else feature_spec()
+
+    @classmethod
+    def for_source(cls, source_csv, spec: dict = None):
+        return cls(store_path(source_csv), spec)
+
+    def exists(self) -> bool:
+        return (self.path / SPEC_FILE).exists() and (self.path / "meta.json").exists()
+
+    def _read_state(self) -> dict:
+        with (self.path / SPEC_FILE).open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_state(self, source_columns: list) -> None:
+        tmp = self.path / (SPEC_FILE + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"source_columns": source_columns, "spec": self.spec}, f, indent=2)
+        os.replace(tmp, self.path / SPEC_FILE)
+
+    # ---------- writing ----------
+    def _rebuild(self, src: pd.DataFrame) -> dict:
+        (self.path / SPEC_FILE).unlink(missing_ok=True)      # invalid until the table is complete
+        save_table(pd.concat([src, compute_features(src, self.spec)], axis=1), self.path)
+        self._write_state(list(src.columns))
+        return {"mode": "rebuild", "rows": len(src), "appended": len(src), "replaced": 0,
+                "columns": list(self.spec), "dropped": []}
+
+    def sync(self, source: pd.DataFrame):
+        """Bring the table up to date with `source` (one station's history); returns self."""
+        if STATION_COL in source.columns:
+            raise ValueError("One feature store per station: pass a single station's history.")
+        with stage("feature_store", rows=len(source)) as st:
+            src = source.copy(deep=False)
+            src["timestamp"] = pd.to_datetime(src["timestamp"], errors="coerce")
+            src = src.dropna(subset=["timestamp"]).reset_index(drop=True)
+
+            state = self._read_state() if self.exists() else None
+            if state is None or state["source_columns"] != list(src.columns):
+                summary = self._rebuild(src)
+            else:
+                summary = self._update(src, state)
+            st.update(rows_out=summary["rows"], appended=summary["appended"])
+
+        if summary["mode"] == "rebuild":
+            print(f"🧮 Feature store rebuilt → {self.path} (rows={summary['rows']})")
+        elif summary["appended"] or summary["columns"] or summary["dropped"]:
+            print(f"🧮 Feature store {self.path}: +{summary['appended']} row(s) "
+                  f"({summary['replaced']} replaced), recomputed columns {summary['columns']}, "
+                  f"dropped {summary['dropped']}")
+        return self
+
+    def _update(self, src: pd.DataFrame, state: dict) -> dict:
+        n_stored = table_rows(self.path)
+        keep = _prefix_length(load_table(self.path, list(src.columns)), src)
+        if keep == 0:
+            return self._rebuild(src)
+
+        stale = {n: d for n, d in self.spec.items() if state["spec"].get(n) != d}
+        dropped = [n for n in state["spec"] if n not in self.spec]
+
+        # Invalidate first: a crash below leaves a store that rebuilds, never a mixed one
+        (self.path / SPEC_FILE).unlink()
+        if keep < n_stored:
+            truncate_table(self.path, keep)
+        if stale or dropped:
+            # Changed / new feature columns over the kept rows only
+            replace_columns(self.path, compute_features(src.iloc[:keep], stale), drop=dropped)
+
+        if keep < len(src):
+            # New (or replaced) rows, with enough earlier rows for lags / rolling windows
+            start = max(0, keep - context_rows(self.spec))
+            window = src.iloc[start:]
+            rows = pd.concat([window, compute_features(window, self.spec)], axis=1).iloc[keep - start:]
+            append_table(rows[table_columns(self.path)], self.path)
+
+        self._write_state(list(src.columns))
+        return {"mode": "update", "rows": len(src), "appended": len(src) - keep,
+                "replaced": n_stored - keep, "columns": list(stale), "dropped": dropped}
+
+    # ---------- reading ----------
+    def load(self, dropna: bool = True, compact: bool = False) -> pd.DataFrame:
+        """Source columns + features in pipeline column order; `dropna` drops rows like the pipeline does."""
+        state = self._read_state()
+        df = load_table(self.path, state["source_columns"] + list(self.spec))
+        if dropna:
+            df = df.dropna().reset_index(drop=True)
+        return compact_frame(df) if compact else df
+
+
+def load_features(source_csv, source: pd.DataFrame = None, compact: bool = False) -> pd.DataFrame:
+    """
+    Sync the store next to `source_csv` and load its rows. `source` is the
+    already-loaded full-precision history (default: read the CSV); the store
+    always keeps float64 and `compact` only applies to the returned frame.
+    """
+    if source is None:
+        source = load_frame(source_csv)
+    return FeatureStore.for_source(source_csv).sync(source).load(compact=compact)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/feature_store.py <source.csv> [<source.csv> ...]")
+        sys.exit(1)
+    for p in sys.argv[1:]:
+        df = load_features(p)
+        print(f"✅ {p} → {store_path(p)} (feature rows={len(df)})")
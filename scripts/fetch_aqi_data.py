@@ -1,56 +1,51 @@
-import requests
-import json
 import os
 from datetime import datetime
 
+from raw_store import RAW_JSON, migrate_from_json
+from stations import load_stations
+from http_client import get_client
+
 # ✅ Load API key from GitHub Secret or local env
 API_KEY = os.getenv("WEATHER_API_KEY")
-CITY = "Karachi"
-URL = f"https://api.weatherapi.com/v1/current.json?key={API_KEY}&q={CITY}&aqi=yes"
-
-try:
-    response = requests.get(URL)
-    data = response.json()
-except Exception as e:
-    print("❌ Failed to fetch data:", e)
-    exit()
+URL = "https://api.weatherapi.com/v1/current.json"
 
-if "current" not in data or "air_quality" not in data["current"]:
-    print("❌ API response missing expected fields")
-    exit()
+# ✅ One request per station (data/stations.json; just Karachi by default),
+#    all over one pooled connection (current conditions are never cached)
+client = get_client()
+for station in load_stations():
+    try:
+        response = client.get(URL, params={"key": API_KEY, "q": station.q, "aqi": "yes"})
+        data = response.json()
+    except Exception as e:
+        print(f"❌ Failed to fetch data for {station.id}:", e)
+        continue
 
-# ✅ Extract allowed features only
-timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-aq_data = {
-    "timestamp": timestamp,
-    "o3": data["current"]["air_quality"].get("o3"),
-    "co": data["current"]["air_quality"].get("co"),
-    "no2": data["current"]["air_quality"].get("no2"),
-    "so2": data["current"]["air_quality"].get("so2"),
-    "temp_c": data["current"].get("temp_c"),
-    "humidity": data["current"].get("humidity"),
-    "wind_kph": data["current"].get("wind_kph"),
-    "pressure_mb": data["current"].get("pressure_mb")
-}
+    if "current" not in data or "air_quality" not in data["current"]:
+        print(f"❌ API response missing expected fields for {station.id}")
+        continue
 
-# ✅ Save to data/aqi_data.json
-os.makedirs("data", exist_ok=True)
-json_file = "data/aqi_data.json"
+    # ✅ Extract allowed features only
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    aq_data = {
+        "timestamp": timestamp,
+        "o3": data["current"]["air_quality"].get("o3"),
+        "co": data["current"]["air_quality"].get("co"),
+        "no2": data["current"]["air_quality"].get("no2"),
+        "so2": data["current"]["air_quality"].get("so2"),
+        "temp_c": data["current"].get("temp_c"),
+        "humidity": data["current"].get("humidity"),
+        "wind_kph": data["current"].get("wind_kph"),
+        "pressure_mb": data["current"].get("pressure_mb")
+    }
 
-if os.path.exists(json_file):
-    with open(json_file, 'r') as f:
-        try:
-            existing_data = json.load(f)
-        except json.JSONDecodeError:
-            existing_data = []
-else:
-    existing_data = []
+    # ✅ Append to the station's raw store (aqi_data.jsonl + timestamp index)
+    store = station.raw_store()
+    if station.is_default and not store.exists() and RAW_JSON.exists():
+        print(f"📦 Migrating {RAW_JSON} → {store.path} (one-time)")
+        migrate_from_json(RAW_JSON, store)
 
-# ✅ Skip duplicates
-if any(item["timestamp"] == aq_data["timestamp"] for item in existing_data):
-    print("⏩ Duplicate timestamp, skipping entry.")
-else:
-    existing_data.append(aq_data)
-    with open(json_file, 'w') as f:
-        json.dump(existing_data, f, indent=2)
-    print(f"✅ AQI data added for {timestamp}")
+    # ✅ Skip duplicates (index lookup, no full read)
+    if store.append(aq_data):
+        print(f"✅ AQI data added for {station.id} at {timestamp}")
+    else:
+        print(f"⏩ Duplicate timestamp for {station.id}, skipping entry.")
@@ -1,66 +1,126 @@
 import os
-import requests
 import json
+import argparse
 from datetime import datetime, timedelta
-from time import sleep
+
+import requests
+
+from backfill import Checkpoint, PermanentError, RetryableError, TokenBucket, run_backfill
+from http_client import get_client, is_past
+from stations import get_station, load_stations
 
 # ✅ Read API Key from environment (set it in PowerShell before running)
 API_KEY = os.getenv("WEATHER_API_KEY")
-if not API_KEY:
-    raise ValueError("❌ WEATHER_API_KEY not found. Please set it in your environment.")
 
-# 📍 Location (Karachi)
-LOCATION = "Karachi"
+# 🌐 API root (point it at a local stub server for testing)
+BASE_URL = os.getenv("WEATHERAPI_BASE_URL", "http://api.weatherapi.com/v1")
 
 # 📅 Date Range (match Open-Meteo range)
 START_DATE = datetime(2025, 4, 1)
 END_DATE = datetime(2025, 7, 21)
 
-# 📂 Output file
-OUTPUT_FILE = "data/historic_weather.json"
+# 📂 Output file (per station data dir) + per-day progress / partial results
+OUTPUT_NAME = "historic_weather.json"
+PROGRESS_NAME = "historic_weather.days.jsonl"
 
-all_weather = []
+# ⏱ Be nice to API (free tier has limits)
+DEFAULT_RATE = 1.0      # requests per second, shared by all workers
+DEFAULT_WORKERS = 4
 
-current = START_DATE
-while current <= END_DATE:
-    date_str = current.strftime("%Y-%m-%d")
-    print(f"📅 Fetching hourly weather for {date_str}")
+HOUR_FIELDS = ["time", "temp_c", "humidity", "wind_kph", "pressure_mb"]   # read from every hourly record
 
-    url = f"http://api.weatherapi.com/v1/history.json?key={API_KEY}&q={LOCATION}&dt={date_str}"
+def day_hours(resp) -> list:
+    """The hourly records of a history.json body (RetryableError if truncated / malformed)."""
+    try:
+        hours = resp.json()["forecast"]["forecastday"][0]["hour"]
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        raise RetryableError(f"Malformed response: {e}") from e
+    if not isinstance(hours, list) or not hours or \
+            any(not isinstance(r, dict) or any(f not in r for f in HOUR_FIELDS) for r in hours):
+        raise RetryableError("Malformed response: missing or incomplete hourly records")
+    return hours
 
+
+def fetch_day(location: str, date_str: str, timeout: float = 20) -> list:
+    """All 24 hourly weather records for one day (past days come from the HTTP cache on reruns)."""
+    url = f"{BASE_URL}/history.json"
+    params = {"key": API_KEY, "q": location, "dt": date_str}
     try:
-        resp = requests.get(url, timeout=20)
-        if resp.status_code != 200:
-            print(f"⚠️ Failed for {date_str}: {resp.text}")
-            sleep(2)
-            current += timedelta(days=1)
-            continue
-
-        data = resp.json()
-
-        # ✅ Extract all 24 hours
-        hours = data["forecast"]["forecastday"][0]["hour"]
-        for record in hours:
-            row = {
-                "timestamp": record["time"],         # full hourly timestamp
-                "temp_c": record["temp_c"],
-                "humidity": record["humidity"],
-                "wind_kph": record["wind_kph"],
-                "pressure_mb": record["pressure_mb"]
-            }
-            all_weather.append(row)
-
-        print(f"✅ Added {len(hours)} hourly records for {date_str}")
-
-    except Exception as e:
-        print(f"❌ Error for {date_str}: {e}")
-
-    # ⏱ Be nice to API (free tier has limits)
-    sleep(1)
-    current += timedelta(days=1)
-
-# 💾 Save JSON
-with open(OUTPUT_FILE, "w") as f:
-    json.dump(all_weather, f, indent=2)
-
-print(f"🎉 Saved {len(all_weather)} hourly weather records to {OUTPUT_FILE}")
+        # Validated before caching: a bad 200 is retried, never stored for good
+        resp = get_client().get(url, params=params, immutable=is_past(date_str), timeout=timeout,
+                                validate=day_hours)
+    except requests.RequestException as e:
+        raise RetryableError(f"{type(e).__name__}: {e}") from e
+    if resp.status_code == 429 or resp.status_code >= 500:
+        raise RetryableError(f"HTTP {resp.status_code}")
+    if resp.status_code != 200:
+        raise PermanentError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+
+    # ✅ Extract all 24 hours
+    hours = day_hours(resp)
+    return [{
+        "timestamp": record["time"],         # full hourly timestamp
+        "temp_c": record["temp_c"],
+        "humidity": record["humidity"],
+        "wind_kph": record["wind_kph"],
+        "pressure_mb": record["pressure_mb"]
+    } for record in hours]
+
+
+def day_range(start: datetime, end: datetime) -> list:
+    return [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days + 1)]
+
+
+def backfill_station(station, start: datetime, end: datetime, workers: int, rate: float, retries: int) -> dict:
+    """Fetch the missing days for one station, then (re)write its historic_weather.json."""
+    days = day_range(start, end)
+    checkpoint = Checkpoint(station.data_dir / PROGRESS_NAME)
+    print(f"📅 {station.id}: {len(days)} days {days[0]} → {days[-1]} "
+          f"({len(checkpoint.done() & set(days))} already fetched)")
+
+    summary = run_backfill(days, lambda d: fetch_day(station.q, d), checkpoint,
+                           workers=workers, bucket=TokenBucket(rate, burst=workers), retries=retries,
+                           is_final=is_past)     # today's hours are still filling: not checkpointed
+
+    # 💾 Save JSON: every fetched day in the range (incl. today's hours so far), in time order
+    fetched = {**checkpoint.items(), **summary["partial"]}
+    all_weather = [row for d in days if d in fetched for row in fetched[d]]
+    all_weather.sort(key=lambda r: r["timestamp"])
+    output = station.data_dir / OUTPUT_NAME
+    with open(output, "w") as f:
+        json.dump(all_weather, f, indent=2)
+
+    print(f"🎉 Saved {len(all_weather)} hourly weather records to {output} "
+          f"(fetched {summary['fetched']}, skipped {summary['skipped']}, failed {len(summary['failed'])})")
+    if summary["failed"]:
+        print(f"⚠️ Failed days (rerun to retry): {', '.join(sorted(summary['failed']))}")
+    return summary
+
+
+def main(station_ids=None, all_stations=False, start=START_DATE, end=END_DATE,
+         workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, retries=5):
+    if not API_KEY:
+        raise ValueError("❌ WEATHER_API_KEY not found. Please set it in your environment.")
+    if all_stations:
+        stations = load_stations()
+    else:
+        stations = [get_station(s) for s in station_ids] if station_ids else [get_station()]
+    failed = 0
+    for station in stations:
+        failed += len(backfill_station(station, start, end, workers, rate, retries)["failed"])
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable WeatherAPI history backfill")
+    parser.add_argument("station", nargs="*", help="station id(s) (default: karachi)")
+    parser.add_argument("--all-stations", action="store_true")
+    parser.add_argument("--start", type=lambda s: datetime.strptime(s, "%Y-%m-%d"), default=START_DATE)
+    parser.add_argument("--end", type=lambda s: datetime.strptime(s, "%Y-%m-%d"), default=END_DATE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="max requests per second")
+    parser.add_argument("--retries", type=int, default=5)
+    args = parser.parse_args()
+    n_failed = main(args.station, args.all_stations, args.start, args.end,
+                    args.workers, args.rate, args.retries)
+    raise SystemExit(1 if n_failed else 0)
@@ -1,6 +1,11 @@
-import requests, json, time
+import requests, json, time, sys
 
-LAT, LON = 24.8607, 67.0011
+from stations import get_station
+from http_client import get_client, is_past
+
+# 📍 Station (default Karachi): python scripts/fetch_historic_openmeteo.py [station_id]
+STATION = get_station(*sys.argv[1:2])
+LAT, LON = STATION.lat, STATION.lon
 START_DATE = "2025-04-01"
 END_DATE = "2025-07-21"
 
@@ -13,14 +18,21 @@ params = {
     "hourly": "carbon_monoxide,nitrogen_dioxide,ozone,sulphur_dioxide"
 }
 
-print("📡 Fetching pollutant data from Open-Meteo...")
+print(f"📡 Fetching pollutant data from Open-Meteo for {STATION.id}...")
+
+def check_hourly(resp):
+    """Reject (and so never cache) a 200 without the hourly block."""
+    if "hourly" not in resp.json():
+        raise ValueError(f"❌ Unexpected API response: {resp.text[:200]}")
 
 for attempt in range(3):  # retry up to 3 times if network fails
     try:
-        resp = requests.get(url, params=params, timeout=30)
+        # A range that is entirely in the past never changes → cached forever
+        resp = get_client().get(url, params=params, immutable=is_past(END_DATE), timeout=30,
+                                validate=check_hourly)
         resp.raise_for_status()
         break
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:   # ValueError: bad 200 body
         print(f"⚠️ Attempt {attempt+1} failed: {e}")
         if attempt == 2:
             raise SystemExit("❌ Failed after 3 attempts.")
@@ -48,7 +60,8 @@ for i in range(len(ts)):
         "so2": so2[i]
     })
 
-with open("historic_openmeteo_pollutants.json", "w") as f:
+STATION.data_dir.mkdir(parents=True, exist_ok=True)
+with open(STATION.data_dir / "historic_openmeteo_pollutants.json", "w") as f:
     json.dump(records, f, indent=2)
 
 print(f"✅ Saved {len(records)} pollutant-only records from {START_DATE} to {END_DATE}")
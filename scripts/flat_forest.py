@@ -0,0 +1,161 @@
+# scripts/flat_forest.py
+"""
+Flat-array export of a fitted RandomForestRegressor + a NumPy-only predictor.
+
+All trees are packed into one set of contiguous node arrays:
+
+    feature    int32    split feature (0 at leaves)
+    threshold  float64  go left if x[feature] <= threshold (+inf at leaves)
+    children   int32    [left, right] per node, as global node ids (leaves point to themselves)
+    value      float64  leaf value (per-node mean; only read at leaves)
+    roots      int32    node id of each tree's root
+
+Prediction walks every (row, tree) pair at once, at most `depth` rounds of
+node = children[2*node + (x[feature[node]] > threshold[node])].
+Leaves are self-loops, so no per-node branching is needed. Inputs are rounded
+to float32 first, like sklearn's trees do, so the split decisions (and the
+tree-by-tree mean) match model.predict.
+
+    python scripts/flat_forest.py models/RandomForest_final_model_v3.joblib      # → .npz next to it
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class FlatForest:
+    """Forest as flat node arrays; predict/apply/tree_predictions on NumPy only."""
+
+    def __init__(self, feature, threshold, children, value, roots, depth: int, n_features: int):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.children = np.ascontiguousarray(children, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.depth = int(depth)
+        self.n_features = int(n_features)
+        self.n_trees = len(self.roots)
+
+    # ---------- export / load ----------
+    @classmethod
+    def from_sklearn(cls, model):
+        trees = [est.tree_ for est in model.estimators_]
+        if any(t.n_outputs != 1 for t in trees):
+            raise ValueError("Only single-output forests are supported.")
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for t in trees:
+            ids = np.arange(t.node_count) + offset
+            leaf = t.children_left == -1
+            features.append(np.where(leaf, 0, t.feature))
+            thresholds.append(np.where(leaf, np.inf, t.threshold))
+            lefts.append(np.where(leaf, ids, t.children_left + offset))
+            rights.append(np.where(leaf, ids, t.children_right + offset))
+            values.append(t.value[:, 0, 0])
+            roots.append(offset)
+            offset += t.node_count
+        children = np.column_stack([np.concatenate(lefts), np.concatenate(rights)]).ravel()
+        return cls(np.concatenate(features), np.concatenate(thresholds), children,
+                   np.concatenate(values), np.array(roots),
+                   depth=max(t.max_depth for t in trees), n_features=model.n_features_in_)
+
+    def save(self, path) -> None:
+        np.savez(path, feature=self.feature, threshold=self.threshold, children=self.children,
+                 value=self.value, roots=self.roots, depth=self.depth, n_features=self.n_features)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(z["feature"], z["threshold"], z["children"], z["value"], z["roots"],
+                       depth=int(z["depth"]), n_features=int(z["n_features"]))
+
+    # ---------- inference ----------
+    def _as_float32(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"X has {X.shape[1]} features, the forest expects {self.n_features}")
+        if np.isnan(X).any():
+            raise ValueError("NaN input: the flat export has no missing-value routing")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """(n_rows, n_trees) global leaf node ids."""
+        X = self._as_float32(X)
+        n_rows = X.shape[0]
+        x = X.ravel().astype(np.float64)                  # flat rows; float32 values, compared in float64
+        row_start = (np.arange(n_rows) * self.n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).astype(np.intp)
+        for level in range(self.depth):
+            go_right = x.take(row_start + self.feature.take(node)) > self.threshold.take(node)
+            nxt = self.children.take(2 * node + go_right)
+            # Most paths end well above max depth: stop once every walk sits on a leaf
+            if level % 4 == 3 and np.array_equal(nxt, node):
+                break
+            node = nxt
+        return node
+
+    def tree_predictions(self, X) -> np.ndarray:
+        """(n_rows, n_trees) per-tree predictions."""
+        return self.value[self.apply(X)]
+
+    def predict(self, X) -> np.ndarray:
+        per_tree = self.tree_predictions(X)
+        # cumsum adds tree by tree in estimator order, like RandomForestRegressor.predict
+        return np.cumsum(per_tree, axis=1)[:, -1] / self.n_trees
+
+
+def flat_path(model_path) -> Path:
+    return Path(model_path).with_suffix(".npz")
+
+
+def export(model_path, out_path=None) -> Path:
+    import joblib
+    model = joblib.load(model_path)
+    out_path = Path(out_path) if out_path else flat_path(model_path)
+    FlatForest.from_sklearn(model).save(out_path)
+    return out_path
+
+
+def load_model(model_path):
+    """The flat export if it exists and is at least as new as the pickled model, else the pickle."""
+    model_path = Path(model_path)
+    flat = flat_path(model_path)
+    if flat.exists() and (not model_path.exists() or flat.stat().st_mtime >= model_path.stat().st_mtime):
+        return FlatForest.load(flat)
+    import joblib
+    return joblib.load(model_path)
+
+
+def main(model_path: Path, out_path: Path = None, rows: int = 1000):
+    import joblib
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    t_pickle = time.perf_counter() - start
+
+    out_path = export(model_path, out_path)
+    start = time.perf_counter()
+    flat = FlatForest.load(out_path)
+    t_flat = time.perf_counter() - start
+
+    # Check against sklearn on random rows spread around the split thresholds
+    rng = np.random.default_rng(0)
+    X = rng.normal(0, 1.5, (rows, flat.n_features))
+    err = np.max(np.abs(flat.predict(X) - model.predict(X)))
+
+    print(f"✅ {model_path} → {out_path}")
+    print(f"  {flat.n_trees} trees, {len(flat.value):,} nodes, depth {flat.depth}")
+    print(f"  size  {Path(model_path).stat().st_size / 1e6:8.2f} MB → {out_path.stat().st_size / 1e6:8.2f} MB")
+    print(f"  load  {t_pickle * 1e3:8.1f} ms → {t_flat * 1e3:8.1f} ms")
+    print(f"  max |flat - sklearn| on {rows} rows: {err:.3g}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a RandomForest to flat NumPy node arrays")
+    parser.add_argument("model", type=Path)
+    parser.add_argument("--out", type=Path, help="output .npz (default: next to the model)")
+    args = parser.parse_args()
+    main(args.model, args.out)
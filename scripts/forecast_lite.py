@@ -0,0 +1,201 @@
+# scripts/forecast_lite.py
+"""
+Lean, fast-starting 72-hour recursive forecast (NumPy only).
+
+A predict_live.py run spends most of its time importing pandas, joblib and
+sklearn (through unpickling) before ~72 tiny predictions. This entry point
+runs the same forecast from a prepared feature state instead:
+
+    data/forecast_state.json
+        last_time, feature_cols, base        last observed pollutant / weather values (LOCF)
+        state                                IncrementalFeatureState.to_dict() of the history
+        scaler                               StandardScaler mean / scale (or null)
+        model                                flat forest export (.npz, scripts/flat_forest.py)
+        inputs                               {path: sha256} the state was built from
+
+predict_live.py writes the state as a by-product of every recursive run. When
+the state is missing or any recorded input changed, it is rebuilt here through
+the regular loaders — only then are pandas / joblib / sklearn imported. The
+forecast itself uses the same IncrementalFeatureState, scaler arithmetic and
+forest, so data/predictions_72h.csv comes out identical.
+
+    python scripts/forecast_lite.py                     → data/predictions_72h.csv
+    python scripts/forecast_lite.py --intervals 0.9 --out /tmp/p.csv
+    python -X importtime scripts/forecast_lite.py       (see scripts/benchmark_startup.py)
+"""
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from flat_forest import FlatForest, flat_path
+from forest_intervals import DEFAULT_COVERAGE, make_predictor
+from incremental_features import CARRY_COLS, IncrementalFeatureState
+
+STATE_PATH    = Path("data/forecast_state.json")
+DATA_CSV      = Path("data/hourly_clean_updated.csv")      # same files as predict_live.py
+MODEL_PATH    = Path("models/RandomForest_final_model_v3.joblib")
+SCALER_PATH   = Path("models/scaler_v3.joblib")
+FEATCOLS_PATH = Path("models/feature_cols.json")
+OUT_PRED      = Path("data/predictions_72h.csv")
+
+FORECAST_HOURS = 72
+STATE_VERSION = 1
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def file_sha256(path) -> str:
+    path = Path(path)
+    if not path.exists():
+        return "missing"
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def scaler_params(scaler):
+    """(mean, scale) lists of a fitted StandardScaler; None for no scaler."""
+    if scaler is None:
+        return None
+    if type(scaler).__name__ != "StandardScaler":
+        raise ValueError(f"Only a StandardScaler can be prepared, got {type(scaler).__name__}")
+    n = scaler.n_features_in_
+    mean = scaler.mean_ if getattr(scaler, "with_mean", True) and scaler.mean_ is not None else np.zeros(n)
+    scale = scaler.scale_ if getattr(scaler, "with_std", True) and scaler.scale_ is not None else np.ones(n)
+    return {"mean": [float(v) for v in mean], "scale": [float(v) for v in scale]}
+
+
+# ---------- preparing ----------
+def prepare_state(hist, last_time, feature_cols: list, scaler, model_path, source_csv=DATA_CSV) -> dict:
+    """
+    Everything the recursive forecast needs from an already-loaded history
+    (`hist`: full-precision clean rows, `last_time`: last feature row).
+    """
+    model_path = Path(model_path)
+    flat = flat_path(model_path)
+    last = hist.iloc[-1]
+    return {
+        "version": STATE_VERSION,
+        "last_time": last_time.strftime(TS_FORMAT),
+        "feature_cols": list(feature_cols),
+        "base": {c: float(last[c]) if c in last.index else math.nan for c in CARRY_COLS},
+        "state": IncrementalFeatureState.from_history(hist).to_dict(),
+        "scaler": scaler_params(scaler),
+        "model": str(flat),
+        "inputs": {str(p): file_sha256(p) for p in (source_csv, FEATCOLS_PATH, SCALER_PATH, flat)},
+    }
+
+
+def save_state(state: dict, path: Path = STATE_PATH) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)          # floats round-trip exactly (NaN written as NaN)
+    os.replace(tmp, path)
+
+
+def load_state(path: Path = STATE_PATH):
+    """The prepared state if it exists and was built from the current files, else None."""
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION:
+        return None
+    if any(file_sha256(p) != h for p, h in state["inputs"].items()):
+        return None
+    return state
+
+
+def rebuild_state(source_csv: Path = DATA_CSV, model_path: Path = MODEL_PATH) -> dict:
+    """Slow path: load history, features, scaler (and export the flat model) with the regular loaders."""
+    import predict_live as pl
+    from columnar_store import load_frame
+    from feature_store import load_features
+    from flat_forest import export
+
+    if not source_csv.exists():
+        raise FileNotFoundError(f"Clean data not found: {source_csv}")
+    flat = flat_path(model_path)
+    if not flat.exists() or (model_path.exists() and flat.stat().st_mtime < model_path.stat().st_mtime):
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model not found: {model_path}")
+        print(f"🔄 Exporting flat model → {export(model_path)}")
+
+    hist = load_frame(source_csv)
+    if hist.empty:
+        raise ValueError("Clean data is empty.")
+    hist_fe = load_features(source_csv, hist)
+    feature_cols = pl.load_feature_cols_or_infer(hist_fe)
+    state = prepare_state(hist, hist_fe["timestamp"].max(), feature_cols, pl.load_scaler_if_exists(),
+                          model_path, source_csv)
+    save_state(state)
+    return state
+
+
+# ---------- forecasting ----------
+def forecast(state: dict, model, hours: int = FORECAST_HOURS, coverage: float = None):
+    """recursive_forecast() on the prepared state → (timestamps, {column: array})."""
+    predict = make_predictor(model, coverage)
+    feats = IncrementalFeatureState.from_dict(state["state"])
+    base = state["base"]
+    cols = state["feature_cols"]
+    if state["scaler"] is not None:
+        mean, scale = np.asarray(state["scaler"]["mean"]), np.asarray(state["scaler"]["scale"])
+    last_time = datetime.strptime(state["last_time"], TS_FORMAT)
+
+    timestamps, outs = [], {}
+    for step in range(1, hours + 1):
+        ts = last_time + timedelta(hours=step)
+        row = feats.features_for(ts, feats.last, base)
+        if any(math.isnan(v) for v in row.values()):
+            raise RuntimeError("Failed to produce features for forecast step — insufficient history.")
+
+        X = np.array([[row[c] for c in cols]], dtype=np.float64)
+        if state["scaler"] is not None:
+            X = (X - mean) / scale                 # StandardScaler.transform
+
+        out = predict(X)
+        for k, v in out.items():
+            outs.setdefault(k, []).append(float(v[0]))
+        timestamps.append(ts)
+        feats.push(float(out["pred_aqi"][0]))
+    return timestamps, outs
+
+
+def write_predictions(path: Path, timestamps: list, outs: dict) -> None:
+    """Same CSV as predict_live.py (timestamp + output columns, shortest round-trip floats)."""
+    with Path(path).open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(["timestamp", *outs])
+        for i, ts in enumerate(timestamps):
+            w.writerow([ts.strftime(TS_FORMAT), *(repr(v[i]) for v in outs.values())])
+
+
+def main(hours: int = FORECAST_HOURS, coverage: float = None, out: Path = OUT_PRED, rebuild: bool = False):
+    start = time.perf_counter()
+    state = None if rebuild else load_state()
+    if state is None:
+        print("🔄 Prepared state missing or stale — rebuilding from the clean history")
+        state = rebuild_state()
+
+    model = FlatForest.load(state["model"])
+    timestamps, outs = forecast(state, model, hours, coverage)
+    write_predictions(out, timestamps, outs)
+    print(f"✅ {hours}-hour forecast (recursive, lite) saved → {out}  (rows={len(timestamps)}, "
+          f"{(time.perf_counter() - start) * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="72-hour AQI forecast from the prepared state (NumPy only)")
+    parser.add_argument("--hours", type=int, default=FORECAST_HOURS)
+    parser.add_argument("--intervals", nargs="?", type=float, const=DEFAULT_COVERAGE, default=None,
+                        metavar="COVERAGE", help=f"add pred_lo/pred_hi (central band, default {DEFAULT_COVERAGE})")
+    parser.add_argument("--out", type=Path, default=OUT_PRED)
+    parser.add_argument("--rebuild", action="store_true", help=f"rebuild {STATE_PATH} even if it is current")
+    args = parser.parse_args()
+    main(args.hours, args.intervals, args.out, args.rebuild)
@@ -0,0 +1,239 @@
+# scripts/forecast_service.py
+"""
+Resident forecast service: loads model, scaler and feature column list ONCE,
+keeps them warm, and hot-reloads any of them (and the clean hourly history)
+when the file on disk changes.
+
+Run (TCP or Unix socket):
+    python scripts/forecast_service.py --port 8765
+    python scripts/forecast_service.py --socket /tmp/aqi_forecast.sock
+
+Endpoints:
+    GET /forecast?hours=72&mode=recursive|direct   → {"mode", "hours", "predictions": [...]}
+    GET /health                                     → loaded artifact versions
+
+predict_live.py becomes a thin client with --service http://127.0.0.1:8765
+(or unix:///tmp/aqi_forecast.sock, or FORECAST_SERVICE_URL).
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+
+MAX_HOURS = 24 * 14
+
+
+class WatchedFile:
+    """
+    Value loaded from a file, reloaded whenever the (mtime, size) of the file —
+    or of any of the `also` files the loader may read instead — changes.
+    """
+
+    def __init__(self, path, loader, also=()):
+        self.path = path
+        self.loader = loader
+        self.paths = [path, *also]
+        self.version = None
+        self.value = None
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self):
+        version = tuple(self._stat(p) for p in self.paths)
+        if all(v is None for v in version):
+            self.version, self.value = None, None
+            return None
+        if version != self.version:
+            self.value = self.loader(self.path)
+            self.version = version
+            print(f"🔄 Loaded {self.path}")
+        return self.value
+
+
+class ForecastArtifacts:
+    """Warm model/scaler/feature-cols/history, shared by all request threads."""
+
+    def __init__(self):
+        # Heavy imports happen once, at service start
+        import joblib
+        import predict_live as pl
+        from columnar_store import compact_enabled, load_frame
+        from feature_store import load_features
+
+        self.pl = pl
+        self._lock = threading.Lock()
+
+        def load_history(path):
+            compact = compact_enabled()                 # $AQI_COMPACT
+            hist = load_frame(path, compact=compact)
+            if hist.empty:
+                raise ValueError("Clean data is empty.")
+            # The feature store syncs from full-precision rows
+            return hist, load_features(path, None if compact else hist, compact)
+
+        def load_json(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        # load_model picks the flat .npz export when it is fresh (scripts/flat_forest.py),
+        # so a change to either file reloads
+        self.models = {
+            "recursive": WatchedFile(pl.MODEL_PATH, pl.load_model, also=[pl.flat_path(pl.MODEL_PATH)]),
+            "direct": WatchedFile(pl.DIRECT_MODEL_PATH, pl.load_model, also=[pl.flat_path(pl.DIRECT_MODEL_PATH)]),
+        }
+        self.scaler = WatchedFile(pl.SCALER_PATH, joblib.load)
+        self.feature_cols = WatchedFile(pl.FEATCOLS_PATH, load_json)
+        self.history = WatchedFile(pl.DATA_CSV, load_history)
+
+    def forecast(self, hours: int, mode: str):
+        # Reload checks are a few os.stat() calls; loading itself is serialized
+        with self._lock:
+            model = self.models[mode].get()
+            if model is None:
+                raise FileNotFoundError(f"Model not found: {self.models[mode].path}")
+            loaded = self.history.get()
+            if loaded is None:
+                raise FileNotFoundError(f"Clean data not found: {self.history.path}")
+            hist, hist_fe = loaded
+            scaler = self.scaler.get()
+            feature_cols = self.feature_cols.get() or self.pl.load_feature_cols_or_infer(hist_fe)
+
+        pred_df = self.pl.forecast_from_history(hist, hist_fe, model, scaler, feature_cols, mode, hours)
+        return [{"timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"), "pred_aqi": float(y)}
+                for ts, y in zip(pred_df["timestamp"], pred_df["pred_aqi"])]
+
+    def health(self):
+        files = dict(self.models)
+        files.update(scaler=self.scaler, feature_cols=self.feature_cols, history=self.history)
+        return {name: {"path": str(w.path), "loaded": w.version is not None} for name, w in files.items()}
+
+
+class ForecastHandler(BaseHTTPRequestHandler):
+    artifacts: ForecastArtifacts = None
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            return self._send_json(200, {"status": "ok", "artifacts": self.artifacts.health()})
+        if url.path != "/forecast":
+            return self._send_json(404, {"error": f"Unknown path: {url.path}"})
+
+        try:
+            hours = int(query.get("hours", [self.artifacts.pl.FORECAST_HOURS])[0])
+        except ValueError:
+            return self._send_json(400, {"error": "hours must be an integer"})
+        mode = query.get("mode", ["recursive"])[0]
+        if not 1 <= hours <= MAX_HOURS:
+            return self._send_json(400, {"error": f"hours must be in 1..{MAX_HOURS}"})
+        if mode not in self.artifacts.models:
+            return self._send_json(400, {"error": f"mode must be one of {sorted(self.artifacts.models)}"})
+
+        try:
+            preds = self.artifacts.forecast(hours, mode)
+        except FileNotFoundError as e:
+            return self._send_json(503, {"error": str(e)})
+        except Exception as e:
+            return self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        self._send_json(200, {"mode": mode, "hours": hours, "predictions": preds})
+
+    def address_string(self):
+        # Unix-socket clients have no (host, port)
+        return self.client_address[0] if self.client_address else "unix"
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(port: int = None, socket_path: str = None, host: str = "127.0.0.1"):
+    ForecastHandler.artifacts = ForecastArtifacts()
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return ThreadingUnixHTTPServer(socket_path, ForecastHandler)
+    return ThreadingHTTPServer((host, port), ForecastHandler)
+
+
+# ---------- client side (used by predict_live.py --service) ----------
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request_forecast(service_url: str, hours: int = 72, mode: str = "recursive", timeout: float = 60.0) -> dict:
+    """GET /forecast from a running service; service_url is http://host:port or unix:///path.sock."""
+    url = urlparse(service_url)
+    if url.scheme == "unix":
+        conn = _UnixHTTPConnection(url.path, timeout)
+    else:
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+    try:
+        conn.request("GET", "/forecast?" + urlencode({"hours": hours, "mode": mode}))
+        resp = conn.getresponse()
+        payload = json.loads(resp.read().decode("utf-8"))
+    finally:
+        conn.close()
+    if resp.status != 200:
+        raise RuntimeError(f"Forecast service error {resp.status}: {payload.get('error')}")
+    return payload
+
+
+def save_forecast(service_url: str, out_path, hours: int = 72, mode: str = "recursive") -> int:
+    """request_forecast() → the CSV predict_live.py writes (timestamp, pred_aqi); standard library only."""
+    preds = request_forecast(service_url, hours=hours, mode=mode)["predictions"]
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(["timestamp", "pred_aqi"])
+        for p in preds:
+            w.writerow([p["timestamp"], repr(float(p["pred_aqi"]))])
+    return len(preds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm AQI forecast service")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--socket", help="serve on this Unix socket instead of TCP")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.socket, args.host)
+    where = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"🚀 Forecast service listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# scripts/forest_intervals.py
+"""
+Prediction intervals from a fitted RandomForestRegressor's per-tree outputs.
+
+Every tree's leaf values are concatenated once into one flat array (with a
+node offset per tree). For a batch, model.apply() gives the leaf index of
+each row in each tree, and a single fancy-index gather turns that into the
+(n_rows x n_trees) matrix of per-tree predictions — no Python loop over
+estimators_. The point forecast is the mean over trees (same as
+model.predict), the band is a pair of quantiles over trees. A FlatForest
+(scripts/flat_forest.py) already works this way and is used directly.
+"""
+import numpy as np
+
+DEFAULT_COVERAGE = 0.9     # central 90% band → quantiles 0.05 / 0.95
+
+
+def interval_quantiles(coverage: float = DEFAULT_COVERAGE):
+    if not 0 < coverage < 1:
+        raise ValueError("coverage must be in (0, 1)")
+    tail = (1 - coverage) / 2
+    return tail, 1 - tail
+
+
+class ForestIntervals:
+    """Per-tree predictions for a whole batch in one gather."""
+
+    def __init__(self, model, coverage: float = DEFAULT_COVERAGE):
+        self.model = model
+        self.quantiles = interval_quantiles(coverage)
+        if hasattr(model, "tree_predictions"):         # FlatForest
+            self.n_trees = model.n_trees
+            self.tree_predictions = model.tree_predictions
+            return
+        trees = [est.tree_ for est in model.estimators_]
+        if any(t.n_outputs != 1 for t in trees):
+            raise ValueError("Only single-output forests are supported.")
+        self.n_trees = len(trees)
+        node_counts = np.array([t.node_count for t in trees])
+        self.offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]]).astype(np.intp)
+        self.values = np.concatenate([t.value[:, 0, 0] for t in trees])
+
+    def tree_predictions(self, X) -> np.ndarray:
+        """(n_rows, n_trees) — what each tree predicts for each row."""
+        leaves = self.model.apply(X)                # (n_rows, n_trees) leaf node ids
+        return self.values[leaves + self.offsets]
+
+    def predict(self, X) -> dict:
+        """{"pred_aqi", "pred_lo", "pred_hi"} arrays for the batch."""
+        per_tree = self.tree_predictions(X)
+        # cumsum adds tree by tree in estimator order, like RandomForestRegressor.predict,
+        # so pred_aqi is bit-identical to the point forecast
+        total = np.cumsum(per_tree, axis=1)[:, -1]
+        lo, hi = np.quantile(per_tree, self.quantiles, axis=1)
+        return {"pred_aqi": total / self.n_trees, "pred_lo": lo, "pred_hi": hi}
+
+
+def make_predictor(model, coverage: float = None):
+    """X → dict of output columns: just pred_aqi, or pred_aqi/pred_lo/pred_hi with a coverage."""
+    if coverage is None:
+        return lambda X: {"pred_aqi": model.predict(X)}
+    return ForestIntervals(model, coverage).predict
@@ -0,0 +1,193 @@
+# scripts/http_client.py
+"""
+Shared HTTP client for the fetchers: one pooled requests.Session (keep-alive,
+no TLS handshake per request) plus a content-addressed on-disk response cache.
+
+Cache key = sha256(endpoint + sorted params), with credentials (key/apikey)
+left out so the cache survives key rotation and never stores secrets. Entries
+live for the endpoint's TTL, or forever when the caller marks the request
+immutable (e.g. history for a date that is already over). Only 200 responses
+are cached, and only once the caller's `validate` callback accepts the body —
+a truncated or malformed 200 is never stored (and a cached body that fails
+validation is evicted and fetched again).
+
+    AQI_HTTP_CACHE=/path/to/dir   cache location (default data/http_cache)
+    AQI_HTTP_CACHE=off            disable the cache (pooling stays on)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_ENV = "AQI_HTTP_CACHE"
+DEFAULT_CACHE_DIR = Path("data/http_cache")
+SECRET_PARAMS = {"key", "apikey", "api_key", "token"}
+FOREVER = float("inf")
+
+# Per-endpoint TTLs in seconds, matched against the end of the URL path
+DEFAULT_TTLS = {
+    "current.json": 0,            # live conditions: never served from cache
+    "history.json": 6 * 3600,     # today's (still filling) history; past days are immutable
+    "air-quality":  3600,         # Open-Meteo ranges that reach today
+}
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def is_past(day, today: date = None) -> bool:
+    """
+    True for a date (or "YYYY-MM-DD") strictly before today in UTC — its data
+    can no longer change. The one rule for "this day is over": the response
+    cache marks such days immutable and the backfill checkpoints only them, so
+    the two never disagree whatever the host's timezone.
+    """
+    if isinstance(day, str):
+        day = datetime.strptime(day[:10], "%Y-%m-%d").date()
+    elif isinstance(day, datetime):
+        day = day.date()
+    return day < (today or utc_today())
+
+
+class CachedResponse:
+    """The bits of requests.Response the fetchers use."""
+
+    def __init__(self, status_code: int, content: bytes, from_cache: bool = False):
+        self.status_code = status_code
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}: {self.text[:200]}", response=self)
+
+
+class FetchClient:
+    """Pooled session + on-disk cache; safe to share between threads."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttls: dict = None, pool_size: int = 16,
+                 session: requests.Session = None, clock=time.time):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.clock = clock
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        setting = os.getenv(CACHE_ENV)
+        if setting and setting.lower() in ("off", "0", "none"):
+            return cls(cache_dir=None, **kwargs)
+        return cls(cache_dir=setting or DEFAULT_CACHE_DIR, **kwargs)
+
+    # ---------- cache ----------
+    def ttl_for(self, url: str) -> float:
+        path = urlparse(url).path
+        for suffix, ttl in self.ttls.items():
+            if path.endswith(suffix):
+                return ttl
+        return 0
+
+    @staticmethod
+    def cache_key(url: str, params: dict = None) -> str:
+        public = sorted((k, str(v)) for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS)
+        return hashlib.sha256(json.dumps([url, public]).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read(self, key: str, ttl: float):
+        path = self._entry_path(key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not entry["immutable"] and self.clock() - entry["fetched_at"] >= ttl:
+            return None
+        return entry["body"].encode("utf-8")
+
+    def _write(self, key: str, url: str, params: dict, body: bytes, immutable: bool) -> None:
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "url": url,
+            "params": {k: v for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS},
+            "fetched_at": self.clock(),
+            "immutable": immutable,
+            "body": body.decode("utf-8"),
+        }
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    # ---------- requests ----------
+    def get(self, url: str, params: dict = None, ttl: float = None, immutable: bool = False,
+            timeout: float = 30, validate=None) -> CachedResponse:
+        """
+        GET through the cache. Network errors propagate as requests exceptions.
+        `validate(response)` should raise for a 200 whose body is unusable: the
+        exception propagates and nothing is cached.
+        """
+        ttl = FOREVER if immutable else (self.ttl_for(url) if ttl is None else ttl)
+        use_cache = self.cache_dir is not None and ttl > 0
+        key = self.cache_key(url, params) if use_cache else None
+
+        if use_cache:
+            body = self._read(key, ttl)
+            if body is not None:
+                cached = CachedResponse(200, body, from_cache=True)
+                try:
+                    if validate is not None:
+                        validate(cached)
+                except Exception:
+                    self._entry_path(key).unlink(missing_ok=True)   # bad entry (older run): refetch
+                else:
+                    with self._lock:
+                        self.stats["hits"] += 1
+                    return cached
+
+        raw = self.session.get(url, params=params, timeout=timeout)
+        resp = CachedResponse(raw.status_code, raw.content)
+        with self._lock:
+            self.stats["misses"] += 1
+        if resp.status_code == 200 and validate is not None:
+            validate(resp)
+        if use_cache and resp.status_code == 200:
+            self._write(key, url, params, resp.content, immutable)
+        return resp
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> FetchClient:
+    """Process-wide shared client (configured from the environment on first use)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = FetchClient.from_env()
+        return _default_client
@@ -0,0 +1,150 @@
+# scripts/incremental_features.py
+"""
+Incremental (constant-time per step) version of feature_engineering_pipeline
+for the autoregressive forecast loop.
+
+Instead of re-running the pipeline over the whole history for every new hour,
+we keep a small ring buffer with the last few AQI values plus running sums for
+each rolling window. Output matches feature_engineering.py (lags, rollings with
+min_periods=1, change rate with fillna(0), time features).
+
+Only NumPy is imported up front: pandas (from_history) and the default
+lags / windows of feature_engineering.py are imported on first use, so the
+lean forecast entry point (scripts/forecast_lite.py) can restore a state
+with to_dict() / from_dict() without loading pandas.
+"""
+import math
+from datetime import datetime
+
+import numpy as np
+
+CARRY_COLS = ["co", "no2", "o3", "so2", "temp_c", "humidity", "wind_kph", "pressure_mb"]
+
+
+def _default_windows():
+    from feature_engineering import LAGS, WINDOWS
+    return LAGS, WINDOWS
+
+
+def time_features(ts: datetime) -> dict:
+    """Same values as make_time_features() for a single timestamp (pd.Timestamp or datetime)."""
+    hour = ts.hour
+    return {
+        "hour": hour,
+        "dayofweek": ts.weekday(),
+        "month": ts.month,
+        "hour_sin": np.sin(2 * np.pi * hour / 24),
+        "hour_cos": np.cos(2 * np.pi * hour / 24),
+    }
+
+
+class IncrementalFeatureState:
+    """
+    Ring buffer of recent AQI values + running (sum, count) per rolling window.
+    NaN values are skipped in the rolling means, exactly like pandas does.
+    """
+
+    def __init__(self, lags=None, windows=None):
+        if lags is None or windows is None:
+            default_lags, default_windows = _default_windows()
+            lags = default_lags if lags is None else lags
+            windows = default_windows if windows is None else windows
+        self.lags = list(lags)
+        self.windows = list(windows)
+        # Need lag k *before* the new value and w values *including* it
+        self.size = max(max(self.lags) + 1, max(self.windows))
+        self._buf = [math.nan] * self.size
+        self._pos = 0            # index where the next value will be written
+        self._n = 0              # total values pushed so far
+        self._sums = {w: 0.0 for w in self.windows}
+        self._counts = {w: 0 for w in self.windows}
+
+    # ---------- ring buffer helpers ----------
+    def _back(self, k: int) -> float:
+        """k-th most recent value (k=1 → last pushed). NaN if not available."""
+        if k > self._n or k > self.size:
+            return math.nan
+        return self._buf[(self._pos - k) % self.size]
+
+    def push(self, value: float) -> None:
+        """Append one AQI value and update the running window sums in O(#windows)."""
+        value = float(value) if value is not None else math.nan
+        for w in self.windows:
+            leaving = self._back(w)          # value that drops out of this window
+            if not math.isnan(leaving):
+                self._sums[w] -= leaving
+                self._counts[w] -= 1
+            if not math.isnan(value):
+                self._sums[w] += value
+                self._counts[w] += 1
+        self._buf[self._pos] = value
+        self._pos = (self._pos + 1) % self.size
+        self._n += 1
+
+    @property
+    def last(self) -> float:
+        return self._back(1)
+
+    # ---------- features ----------
+    def aqi_features(self, value: float) -> dict:
+        """
+        Lag / rolling / change-rate features for a new row whose AQI is `value`,
+        without mutating the state (call push() once the real value is known).
+        """
+        value = float(value) if value is not None else math.nan
+        feats = {}
+        for lag in self.lags:
+            feats[f"aqi_lag_{lag}"] = self._back(lag)
+        for w in self.windows:
+            # window = new value + (w-1) most recent values
+            s, c = self._sums[w], self._counts[w]
+            leaving = self._back(w)
+            if not math.isnan(leaving):
+                s -= leaving
+                c -= 1
+            if not math.isnan(value):
+                s += value
+                c += 1
+            feats[f"aqi_roll_{w}"] = s / c if c > 0 else math.nan
+        change = value - self.last
+        feats["aqi_change_rate"] = 0.0 if math.isnan(change) else change
+        return feats
+
+    def features_for(self, ts: datetime, aqi_value: float, base: dict) -> dict:
+        """Full feature row (carried pollutant/weather + time + AQI features)."""
+        row = {c: base.get(c, np.nan) for c in CARRY_COLS}
+        row.update(time_features(ts))
+        row.update(self.aqi_features(aqi_value))
+        return row
+
+    # ---------- persistence ----------
+    def to_dict(self) -> dict:
+        """Exact internal state (buffer and running sums), JSON-serialisable."""
+        return {"lags": self.lags, "windows": self.windows, "buf": list(self._buf), "pos": self._pos,
+                "n": self._n, "sums": [self._sums[w] for w in self.windows],
+                "counts": [self._counts[w] for w in self.windows]}
+
+    @classmethod
+    def from_dict(cls, d: dict):
+        state = cls(d["lags"], d["windows"])
+        if len(d["buf"]) != state.size:
+            raise ValueError(f"State buffer has {len(d['buf'])} values, expected {state.size}")
+        state._buf = [float(v) for v in d["buf"]]
+        state._pos, state._n = int(d["pos"]), int(d["n"])
+        state._sums = {w: float(s) for w, s in zip(state.windows, d["sums"])}
+        state._counts = {w: int(c) for w, c in zip(state.windows, d["counts"])}
+        return state
+
+    @classmethod
+    def from_history(cls, hist: "pd.DataFrame", lags=None, windows=None):
+        """
+        Seed the state from a clean hourly history. Only the tail that can still
+        influence the next features is replayed, so this is O(buffer size).
+        """
+        import pandas as pd
+        state = cls(lags, windows)
+        ts = pd.to_datetime(hist["timestamp"], errors="coerce")
+        aqi = hist.loc[ts.notna(), "aqi"] if "aqi" in hist.columns else pd.Series(dtype=float)
+        for v in pd.to_numeric(aqi, errors="coerce").tail(state.size):
+            state.push(v)
+        return state
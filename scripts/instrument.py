@@ -0,0 +1,186 @@
+# scripts/instrument.py
+"""
+Lightweight per-stage instrumentation for the pipeline scripts.
+
+    from instrument import collect, stage, timed
+
+    with collect("predict_live", metrics_path="data/predictions_72h_metrics.json",
+                 profile_path="data/predict_live.prof" if args.profile else None):
+        with stage("load_history") as st:
+            hist = load_frame(...)
+            st["rows"] = len(hist)
+        for step in ...:
+            with timed("predict"):          # many short calls → one accumulated record
+                model.predict(X)
+
+Each stage records wall time, CPU time, peak RSS while it ran and an optional
+row count; nested stages are named "outer/inner". Outside collect() every call
+is a cheap no-op, so library code (e.g. feature_engineering_pipeline) can be
+instrumented unconditionally. Peak RSS per stage uses the Linux high-water
+mark reset (/proc/self/clear_refs); elsewhere it is the process peak so far.
+"""
+import cProfile
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:                      # Windows
+    resource = None
+
+
+def _peak_rss_mb():
+    """High-water RSS of this process in MB (resettable on Linux)."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+def _reset_peak() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class Metrics:
+    """Collected stage records for one script run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = datetime.now(timezone.utc)
+        self.stages = []
+        self.counters = {}
+        self.info = {}
+        self._stack = []                     # open stage records (for nesting + peak propagation)
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str, rows=None):
+        full = "/".join([r["stage"] for r in self._stack] + [name])
+        rec = {"stage": full, "rows": rows}
+        # Fold the peak so far into the enclosing stage before resetting the high-water mark
+        if self._stack:
+            peak = _peak_rss_mb()
+            parent = self._stack[-1]
+            parent["_peak"] = max(parent.get("_peak") or 0, peak or 0)
+        rec["_resettable"] = _reset_peak()
+        self._stack.append(rec)
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec["wall_s"] = round(time.perf_counter() - t0, 6)
+            rec["cpu_s"] = round(time.process_time() - c0, 6)
+            peak = max(_peak_rss_mb() or 0, rec.pop("_peak", 0) or 0)
+            rec["peak_rss_mb"] = round(peak, 1) if rec.pop("_resettable") else None
+            rec["stage"] = full
+            self._stack.pop()
+            if self._stack:
+                parent = self._stack[-1]
+                parent["_peak"] = max(parent.get("_peak") or 0, peak)
+            self.stages.append(rec)
+
+    @contextmanager
+    def timed(self, name: str):
+        """Accumulate many short calls into one counter (calls, wall_s, cpu_s)."""
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            c = self.counters.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            c["calls"] += 1
+            c["wall_s"] += time.perf_counter() - t0
+            c["cpu_s"] += time.process_time() - c0
+
+    def to_dict(self) -> dict:
+        return {
+            "script": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "argv": sys.argv[1:],
+            "python": platform.python_version(),
+            "total": {
+                "wall_s": round(time.perf_counter() - self._t0, 6),
+                "cpu_s": round(time.process_time() - self._c0, 6),
+                "peak_rss_mb": round(_peak_rss_mb() or 0, 1),
+            },
+            "stages": self.stages,
+            "counters": {k: {"calls": v["calls"], "wall_s": round(v["wall_s"], 6), "cpu_s": round(v["cpu_s"], 6)}
+                         for k, v in self.counters.items()},
+            **({"info": self.info} if self.info else {}),
+        }
+
+    def write(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+
+
+class _NullMetrics:
+    """Stand-in when nothing is collecting: same interface, no work."""
+
+    @contextmanager
+    def stage(self, name: str, rows=None):
+        yield {}
+
+    @contextmanager
+    def timed(self, name: str):
+        yield
+
+
+_NULL = _NullMetrics()
+_active = None
+
+
+def current():
+    return _active if _active is not None else _NULL
+
+
+def stage(name: str, rows=None):
+    return current().stage(name, rows)
+
+
+def timed(name: str):
+    return current().timed(name)
+
+
+@contextmanager
+def collect(name: str, metrics_path=None, profile_path=None):
+    """Collect stage metrics for the block; write them (and a cProfile dump) at the end."""
+    global _active
+    previous, _active = _active, Metrics(name)
+    metrics = _active
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler:
+            profiler.disable()
+            Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(profile_path))
+            metrics.info["profile"] = str(profile_path)
+        _active = previous
+        if metrics_path:
+            metrics.write(metrics_path)
+            print(f"📊 Stage metrics → {metrics_path}" + (f", profile → {profile_path}" if profiler else ""))
@@ -1,19 +1,64 @@
 # scripts/predict_live.py
+import argparse
 import json
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 
+# If set, predict_live.py is just a client of a running forecast_service.py
+SERVICE_ENV = "FORECAST_SERVICE_URL"
+
+def run_service_client(argv: list) -> bool:
+    """
+    Thin-client fast path of the CLI: with --service (or $FORECAST_SERVICE_URL)
+    fetch the forecast from forecast_service.py and write it using the standard
+    library only — this runs before pandas / joblib / sklearn are imported.
+    False when the arguments need the local path (--all-stations, --intervals, --help).
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--service", default=os.getenv(SERVICE_ENV))
+    parser.add_argument("--mode", default="recursive")
+    parser.add_argument("--all-stations", action="store_true")
+    parser.add_argument("--intervals", nargs="?", const="", default=None)
+    parser.add_argument("-h", "--help", action="store_true")
+    args, _ = parser.parse_known_args(argv)
+    if (not args.service or args.all_stations or args.intervals is not None or args.help
+            or args.mode not in ("recursive", "direct")):
+        return False
+    from forecast_service import save_forecast
+    out = Path("data/predictions_72h.csv")                  # OUT_PRED
+    rows = save_forecast(args.service, out, mode=args.mode)
+    print(f"✅ 72-hour forecast ({args.mode}, via {args.service}) saved → {out}  (rows={rows})")
+    return True
+
+if __name__ == "__main__" and run_service_client(sys.argv[1:]):
+    sys.exit(0)
+
 import numpy as np
 import pandas as pd
 import joblib
 
-from feature_engineering import feature_engineering_pipeline
+from feature_store import load_features
+from incremental_features import IncrementalFeatureState
+from direct_forecast import direct_forecast, direct_forecast_matrix
+from columnar_store import compact_enabled, load_frame
+from stations import STATION_COL, load_stations
+from forest_intervals import DEFAULT_COVERAGE, make_predictor
+from flat_forest import flat_path, load_model
+from forecast_lite import STATE_PATH, prepare_state, save_state
+from instrument import collect, stage, timed
 
 DATA_CSV      = Path("data/hourly_clean_updated.csv")
 MODEL_PATH    = Path("models/RandomForest_final_model_v3.joblib")
+DIRECT_MODEL_PATH = Path("models/RandomForest_direct_v3.joblib")   # --mode direct
 SCALER_PATH   = Path("models/scaler_v3.joblib")          # optional
 FEATCOLS_PATH = Path("models/feature_cols.json")         # optional
 OUT_PRED      = Path("data/predictions_72h.csv")
+OUT_PRED_STATIONS = Path("data/predictions_72h_stations.csv")   # --all-stations
+OUT_METRICS   = Path("data/predictions_72h_metrics.json")   # per-stage timings of the last run
+OUT_METRICS_STATIONS = Path("data/predictions_72h_stations_metrics.json")
+OUT_PROFILE   = Path("data/predict_live.prof")              # --profile
 
 FORECAST_HOURS = 72
 
@@ -25,11 +70,12 @@ def load_feature_cols_or_infer(df_fe: pd.DataFrame) -> list:
     # Fallback: all except timestamp & aqi if not provided
     return [c for c in df_fe.columns if c not in ["timestamp", "aqi"]]
 
-def apply_scaler_if_exists(X: pd.DataFrame):
-    if SCALER_PATH.exists():
-        scaler = joblib.load(SCALER_PATH)
-        X_scaled = scaler.transform(X)
-        return X_scaled
+def load_scaler_if_exists():
+    return joblib.load(SCALER_PATH) if SCALER_PATH.exists() else None
+
+def apply_scaler(X: pd.DataFrame, scaler):
+    if scaler is not None:
+        return scaler.transform(X)
     return X.values  # no scaling
 
 def forward_fill_future_base_row(hist_row: pd.Series) -> pd.Series:
@@ -44,84 +90,265 @@ def forward_fill_future_base_row(hist_row: pd.Series) -> pd.Series:
             row[c] = row[c] if c in row.index else np.nan
     return row
 
-def main():
-    # Sanity checks
-    if not DATA_CSV.exists():
-        raise FileNotFoundError(f"Clean data not found: {DATA_CSV}")
-    if not MODEL_PATH.exists():
-        raise FileNotFoundError(f"Model not found: {MODEL_PATH}")
+def recursive_forecast(hist: pd.DataFrame, last_time: pd.Timestamp, feature_cols: list,
+                       model, scaler=None, hours: int = FORECAST_HOURS, coverage: float = None) -> pd.DataFrame:
+    """
+    Autoregressive forecast: one predict per hour, each fed back into the lags.
+    With `coverage`, each step also gets a per-tree band (pred_lo/pred_hi) around
+    the point path (the band is not itself fed back).
+    """
+    predict = make_predictor(model, coverage)
+    # Incremental feature state seeded from the *original history* (with true AQI):
+    # a small ring buffer of recent AQI values, so each forecast step is O(1)
+    # instead of re-running feature_engineering_pipeline over the whole history.
+    state = IncrementalFeatureState.from_history(hist)
+    base = forward_fill_future_base_row(hist.iloc[-1])
 
-    # Load clean hourly history
-    hist = pd.read_csv(DATA_CSV, parse_dates=["timestamp"])
-    if hist.empty:
-        raise ValueError("Clean data is empty.")
+    preds = []
+    for step in range(1, hours + 1):
+        new_ts = last_time + timedelta(hours=step)
+
+        # Placeholder AQI = last known AQI for rolling/change-rate calc (same as the
+        # full pipeline did); the real prediction is pushed into the state below.
+        row = state.features_for(new_ts, state.last, base)
+        if any(pd.isna(row[c]) for c in row):
+            raise RuntimeError("Failed to produce features for forecast step — insufficient history.")
+
+        X_this = pd.DataFrame([row])[feature_cols]
+        with timed("scaler"):
+            X_scaled = apply_scaler(X_this, scaler)
+
+        with timed("predict"):
+            out = predict(X_scaled)
+        y_pred = float(out["pred_aqi"][0])
+
+        # Save prediction for this hour
+        preds.append({"timestamp": new_ts, **{k: float(v[0]) for k, v in out.items()}})
 
-    # Build features for history (this also drops early rows w/ NaNs from lags)
-    hist_fe = feature_engineering_pipeline(hist.copy())
+        # Feed our prediction back so next-step lags/rollings use it
+        state.push(y_pred)
 
-    # Prepare feature list
-    feature_cols = load_feature_cols_or_infer(hist_fe)
+    return pd.DataFrame(preds)
 
-    # Train-ready matrix for last known time (we will autoregress from there)
+def forecast_from_history(hist: pd.DataFrame, hist_fe: pd.DataFrame, model, scaler,
+                          feature_cols: list, mode: str = "recursive",
+                          hours: int = FORECAST_HOURS, coverage: float = None) -> pd.DataFrame:
+    """Forecast `hours` ahead of the last feature row (shared by the CLI and forecast_service.py)."""
+    # Train-ready matrix for last known time (we will forecast from there)
     last_time = hist_fe["timestamp"].max()
-    last_row_full = hist_fe[hist_fe["timestamp"] == last_time].iloc[-1]
 
-    # We will keep a rolling small dataframe of recent rows to compute lags/rollings on the fly
-    # Start from the *original history* (with true AQI) to compute lags for first forecast step
-    work = hist.copy()
+    if mode == "direct":
+        # All horizons in one batched predict from the last known feature row
+        origin = apply_scaler(hist_fe[hist_fe["timestamp"] == last_time].tail(1)[feature_cols], scaler)
+        return direct_forecast(model, origin, last_time, hours, coverage)
+    return recursive_forecast(hist, last_time, feature_cols, model, scaler, hours, coverage)
 
-    preds = []
-    for step in range(1, FORECAST_HOURS + 1):
-        new_ts = last_time + timedelta(hours=step)
+def load_station_history(stations, compact: bool = False) -> pd.DataFrame:
+    """Clean hourly history of every station as one station-keyed frame."""
+    frames = []
+    for station in stations:
+        if not station.hourly_csv.exists():
+            print(f"⚠️ No clean data for {station.id} ({station.hourly_csv}), skipping.")
+            continue
+        df = load_frame(station.hourly_csv, compact=compact)
+        df.insert(0, STATION_COL, station.id)
+        frames.append(df)
+    if not frames:
+        raise FileNotFoundError("No clean hourly data for any station.")
+    return pd.concat(frames, ignore_index=True)
 
-        # Build a new "base" row by carrying forward last observed pollutants/weather
-        base = forward_fill_future_base_row(work.iloc[-1])
-
-        # Set new timestamp & (temporarily) put AQI as last known to compute lags/rollings;
-        # then we'll replace with model prediction after we predict this step.
-        new_row = {
-            "timestamp": new_ts,
-            "co": base.get("co", np.nan),
-            "no2": base.get("no2", np.nan),
-            "o3": base.get("o3", np.nan),
-            "so2": base.get("so2", np.nan),
-            "temp_c": base.get("temp_c", np.nan),
-            "humidity": base.get("humidity", np.nan),
-            "wind_kph": base.get("wind_kph", np.nan),
-            "pressure_mb": base.get("pressure_mb", np.nan),
-            # Put a placeholder AQI = last known AQI for lag/rolling calc; will overwrite with prediction.
-            "aqi": work.iloc[-1]["aqi"]
-        }
-        work = pd.concat([work, pd.DataFrame([new_row])], ignore_index=True)
-
-        # Feature engineering on the most recent window to get features for this one new timestamp
-        fe = feature_engineering_pipeline(work.copy())
-        this_fe = fe[fe["timestamp"] == new_ts]
-        # If FE dropped the row due to missing lags, try recompute using more history (shouldn't happen after enough history)
-        if this_fe.empty:
-            # Use the tail (ensure min history) and recompute
-            fe = feature_engineering_pipeline(work.tail(200).copy())
-            this_fe = fe[fe["timestamp"] == new_ts]
-            if this_fe.empty:
-                raise RuntimeError("Failed to produce features for forecast step — insufficient history.")
-
-        X_this = this_fe[feature_cols]
-        X_scaled = apply_scaler_if_exists(X_this)
-
-        # Load model once (outside loop would be faster, but keep clear)
-        model = joblib.load(MODEL_PATH)
-        y_pred = float(model.predict(X_scaled)[0])
+def load_station_features(stations, hist: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+    """Each station's persisted feature store, synced with its history → one station-keyed frame."""
+    groups = dict(tuple(hist.groupby(STATION_COL, sort=False)))
+    frames = []
+    for station in stations:
+        if station.id not in groups:
+            continue
+        # The store syncs from full-precision rows: re-read them when `hist` is compacted
+        source = None if compact else groups[station.id].drop(columns=[STATION_COL])
+        df = load_features(station.hourly_csv, source, compact)
+        df.insert(0, STATION_COL, station.id)
+        frames.append(df)
+    # Same row order as feature_engineering_pipeline() on the station-keyed history
+    return pd.concat(frames, ignore_index=True).sort_values([STATION_COL, "timestamp"], kind="stable",
+                                                            ignore_index=True)
 
-        # Save prediction for this hour
-        preds.append({"timestamp": new_ts, "pred_aqi": y_pred})
+def recursive_forecast_lockstep(states: list, bases: list, last_times: list, feature_cols: list,
+                                model, scaler=None, hours: int = FORECAST_HOURS, coverage: float = None,
+                                names: list = None) -> dict:
+    """
+    Several independent recursive forecasts advanced together: one model.predict
+    per horizon step over an (n_forecasts x features) matrix. `states` are pushed
+    in place. Returns {output column: (n_forecasts, hours) array}.
+    """
+    predict = make_predictor(model, coverage)
+    names = names if names is not None else list(range(len(states)))
+    outs = {}
+    for step in range(1, hours + 1):
+        rows = []
+        for name, state, base, last_time in zip(names, states, bases, last_times):
+            row = state.features_for(last_time + timedelta(hours=step), state.last, base)
+            if any(pd.isna(row[c]) for c in row):
+                raise RuntimeError(f"Failed to produce features for {name} — insufficient history.")
+            rows.append(row)
+
+        X_step = pd.DataFrame(rows)[feature_cols]
+        with timed("scaler"):
+            X_scaled = apply_scaler(X_step, scaler)
+        with timed("predict"):
+            out = predict(X_scaled)
+
+        for k, v in out.items():
+            outs.setdefault(k, np.empty((len(states), hours)))[:, step - 1] = v
+        for i, state in enumerate(states):
+            state.push(float(out["pred_aqi"][i]))
+    return outs
+
+def recursive_forecast_stations(hist: pd.DataFrame, hist_fe: pd.DataFrame, feature_cols: list,
+                                model, scaler=None, hours: int = FORECAST_HOURS,
+                                coverage: float = None) -> pd.DataFrame:
+    """
+    recursive_forecast() for a station-keyed history, all stations in lockstep:
+    one model.predict per horizon step over an (n_stations x features) matrix.
+    """
+    last_times = hist_fe.groupby(STATION_COL, sort=True)["timestamp"].max()
+    groups = dict(tuple(hist.groupby(STATION_COL, sort=False)))
+    station_ids = list(last_times.index)
+    states = [IncrementalFeatureState.from_history(groups[sid]) for sid in station_ids]
+    bases = [forward_fill_future_base_row(groups[sid].iloc[-1]) for sid in station_ids]
+
+    outs = recursive_forecast_lockstep(states, bases, list(last_times), feature_cols, model, scaler,
+                                       hours, coverage, names=station_ids)
+    horizons = pd.to_timedelta(np.tile(np.arange(1, hours + 1), len(station_ids)), unit="h")
+    return pd.DataFrame({
+        STATION_COL: np.repeat(station_ids, hours),
+        "timestamp": np.repeat(last_times.to_numpy(), hours) + horizons,
+        **{k: v.ravel() for k, v in outs.items()},
+    })
+
+def direct_forecast_stations(hist_fe: pd.DataFrame, feature_cols: list, model, scaler=None,
+                             hours: int = FORECAST_HOURS, coverage: float = None) -> pd.DataFrame:
+    """direct_forecast() for every station at once: a single predict over stations x horizons."""
+    origins = hist_fe.sort_values([STATION_COL, "timestamp"]).groupby(STATION_COL).tail(1)
+    origin_scaled = apply_scaler(origins[feature_cols], scaler)
+    X = np.vstack([direct_forecast_matrix(row, t, hours)
+                   for row, t in zip(origin_scaled, origins["timestamp"])])
+    horizons = pd.to_timedelta(np.tile(np.arange(1, hours + 1), len(origins)), unit="h")
+    return pd.DataFrame({
+        STATION_COL: np.repeat(origins[STATION_COL].to_numpy(), hours),
+        "timestamp": np.repeat(origins["timestamp"].to_numpy(), hours) + horizons,
+        **make_predictor(model, coverage)(X),
+    })
+
+def main_stations(mode: str = "recursive", coverage: float = None, compact: bool = False):
+    """--all-stations: one station-keyed history, one grouped FE pass, batched predicts."""
+    model_path = DIRECT_MODEL_PATH if mode == "direct" else MODEL_PATH
+    if not (model_path.exists() or flat_path(model_path).exists()):
+        raise FileNotFoundError(f"Model not found: {model_path}")
+
+    with stage("load_history") as st:
+        stations = load_stations()
+        hist = load_station_history(stations, compact)
+        st["rows"] = len(hist)
+    hist_fe = load_station_features(stations, hist, compact)
+    feature_cols = load_feature_cols_or_infer(hist_fe.drop(columns=[STATION_COL]))
+    with stage("load_model"):
+        model = load_model(model_path)   # flat .npz export when fresh, else the pickle
+        scaler = load_scaler_if_exists()
+
+    with stage("forecast") as st:
+        if mode == "direct":
+            pred_df = direct_forecast_stations(hist_fe, feature_cols, model, scaler, FORECAST_HOURS, coverage)
+        else:
+            pred_df = recursive_forecast_stations(hist, hist_fe, feature_cols, model, scaler, FORECAST_HOURS,
+                                                  coverage)
+        st["rows"] = len(pred_df)
+
+    with stage("write", rows=len(pred_df)):
+        pred_df.to_csv(OUT_PRED_STATIONS, index=False)
+    print(f"✅ 72-hour forecast ({mode}) for {pred_df[STATION_COL].nunique()} station(s) saved → "
+          f"{OUT_PRED_STATIONS}  (rows={len(pred_df)})")
+
+def main(mode: str = "recursive", service_url: str = None, all_stations: bool = False,
+         coverage: float = None, profile: bool = False, compact: bool = None):
+    compact = compact_enabled(compact)
+    if all_stations:
+        with collect("predict_live", OUT_METRICS_STATIONS, OUT_PROFILE if profile else None):
+            main_stations(mode, coverage, compact)
+        return
+
+    if service_url and coverage is not None:
+        print("⚠️ --intervals is computed locally; ignoring the forecast service.")
+        service_url = None
+    if service_url:
+        # Thin-client path: ask a running forecast_service.py instead of loading anything
+        from forecast_service import save_forecast
+        rows = save_forecast(service_url, OUT_PRED, FORECAST_HOURS, mode)
+        print(f"✅ 72-hour forecast ({mode}, via {service_url}) saved → {OUT_PRED}  (rows={rows})")
+        return
+
+    model_path = DIRECT_MODEL_PATH if mode == "direct" else MODEL_PATH
+
+    # Sanity checks
+    if not DATA_CSV.exists():
+        raise FileNotFoundError(f"Clean data not found: {DATA_CSV}")
+    if not (model_path.exists() or flat_path(model_path).exists()):
+        raise FileNotFoundError(f"Model not found: {model_path}")
+
+    with collect("predict_live", OUT_METRICS, OUT_PROFILE if profile else None) as metrics:
+        metrics.info.update(mode=mode, model=str(model_path), compact=compact)
+
+        # Load clean hourly history
+        with stage("load_history") as st:
+            hist = load_frame(DATA_CSV, compact=compact)   # columnar table if fresh, else CSV
+            st["rows"] = len(hist)
+        if hist.empty:
+            raise ValueError("Clean data is empty.")
+
+        # Features for history from the persisted store: only new hours are engineered
+        # (rows with NaNs from lags are dropped, as in feature_engineering_pipeline)
+        # (the store syncs from full-precision rows: re-read them when `hist` is compacted)
+        hist_fe = load_features(DATA_CSV, None if compact else hist, compact)
+
+        # Prepare feature list
+        feature_cols = load_feature_cols_or_infer(hist_fe)
+
+        # Load model + scaler once
+        with stage("load_model"):
+            model = load_model(model_path)   # flat .npz export when fresh, else the pickle
+            scaler = load_scaler_if_exists()
 
-        # Overwrite the placeholder AQI in 'work' with our prediction, so next-step lags use it
-        work.loc[work["timestamp"] == new_ts, "aqi"] = y_pred
+        with stage("forecast") as st:
+            pred_df = forecast_from_history(hist, hist_fe, model, scaler, feature_cols, mode, FORECAST_HOURS,
+                                            coverage)
+            st["rows"] = len(pred_df)
 
-    # Write predictions
-    pred_df = pd.DataFrame(preds)
-    pred_df.to_csv(OUT_PRED, index=False)
-    print(f"✅ 72-hour forecast saved → {OUT_PRED}  (rows={len(pred_df)})")
+        # Write predictions
+        with stage("write", rows=len(pred_df)):
+            pred_df.to_csv(OUT_PRED, index=False)
+            if mode == "recursive" and not compact and flat_path(model_path).exists():
+                # Prepared state for the NumPy-only entry point (scripts/forecast_lite.py)
+                try:
+                    save_state(prepare_state(hist, hist_fe["timestamp"].max(), feature_cols, scaler, model_path))
+                except ValueError as e:
+                    print(f"⚠️ {STATE_PATH} not written: {e}")
+    print(f"✅ 72-hour forecast ({mode}) saved → {OUT_PRED}  (rows={len(pred_df)})")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="72-hour AQI forecast")
+    parser.add_argument("--mode", choices=["recursive", "direct"], default="recursive",
+                        help="recursive: one predict per hour (default); direct: one batched multi-horizon predict")
+    parser.add_argument("--service", default=os.getenv(SERVICE_ENV),
+                        help="URL of a running forecast_service.py (http://host:port or unix:///path.sock); "
+                             f"defaults to ${SERVICE_ENV}")
+    parser.add_argument("--all-stations", action="store_true",
+                        help=f"forecast every station in data/stations.json → {OUT_PRED_STATIONS}")
+    parser.add_argument("--intervals", nargs="?", type=float, const=DEFAULT_COVERAGE, default=None,
+                        metavar="COVERAGE", help="add pred_lo/pred_hi from the per-tree spread "
+                                                 f"(central band, default {DEFAULT_COVERAGE})")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"also write a cProfile dump ({OUT_PROFILE}); stage metrics always go to {OUT_METRICS}")
+    parser.add_argument("--compact", action="store_true", default=None,
+                        help="float32 / int8 history and feature frames (default: $AQI_COMPACT)")
+    args = parser.parse_args()
+    main(args.mode, args.service, args.all_stations, args.intervals, args.profile, args.compact)
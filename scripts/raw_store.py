@@ -0,0 +1,316 @@
+# scripts/raw_store.py
+"""
+Append-only raw observation store (JSON Lines) with a compact timestamp index.
+
+    data/aqi_data.jsonl  one raw record per line, exactly as fetched
+    data/aqi_data.idx    fixed-width lines "YYYY-MM-DD HH:MM:SS <byte offset>", sorted by timestamp
+
+Adding an observation = one binary search in the index + one appended line in
+each file (no full read/rewrite of the archive). Readers stream records for a
+time range by seeking straight to the first matching index entry.
+
+One-time migration from the old JSON array:
+    python scripts/raw_store.py --migrate
+Rebuild the index from the .jsonl (e.g. after a manual edit):
+    python scripts/raw_store.py --reindex
+
+Both the store and the legacy JSON array can be read as a stream of DataFrame
+chunks (RawStore.iter_frames / iter_json_frames): time-range and column
+filters are applied record by record, so peak memory is bounded by the chunk
+size rather than the archive size.
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+RAW_JSON  = Path("data/aqi_data.json")     # legacy JSON array (frozen after migration)
+RAW_JSONL = Path("data/aqi_data.jsonl")
+RAW_INDEX = Path("data/aqi_data.idx")
+
+CHUNK_ROWS = 50_000          # records per DataFrame chunk when streaming
+JSON_BLOCK = 1 << 20         # characters read per step from the legacy JSON array
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+TS_LEN = 19
+OFFSET_LEN = 12
+REC_LEN = TS_LEN + 1 + OFFSET_LEN + 1      # "<ts> <offset>\n"
+
+
+def normalize_ts(ts) -> str:
+    """Canonical index key for a timestamp (None if it can't be parsed)."""
+    if ts is None:
+        return None
+    if hasattr(ts, "strftime"):           # datetime / pd.Timestamp
+        return ts.strftime(TS_FORMAT)
+    s = str(ts).strip()
+    if len(s) == TS_LEN and s[10] == " ":
+        # Already canonical (the common case): the C-level ISO parser just validates it
+        try:
+            datetime.fromisoformat(s)
+            return s
+        except ValueError:
+            pass
+    for fmt in (TS_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(s, fmt).strftime(TS_FORMAT)
+        except ValueError:
+            pass
+    try:
+        return datetime.fromisoformat(s).strftime(TS_FORMAT)
+    except ValueError:
+        return None
+
+
+def records_frame(records: list):
+    """
+    Raw records → DataFrame (pandas imported lazily).
+    Measurements are always float64, whatever slice of history was read.
+    """
+    import pandas as pd
+    df = pd.DataFrame(records)
+    for c in df.columns:
+        if c != "timestamp" and pd.api.types.is_integer_dtype(df[c]):
+            df[c] = df[c].astype("float64")
+    return df
+
+
+def batched_frames(records, chunksize: int = CHUNK_ROWS):
+    """Group a record iterator into DataFrames of at most `chunksize` rows."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunksize:
+            yield records_frame(batch)
+            batch = []
+    if batch:
+        yield records_frame(batch)
+
+
+def iter_json_array(json_path: Path = RAW_JSON, start=None, end=None, columns=None):
+    """
+    Stream the records of a top-level JSON array without loading the file:
+    the text is read in blocks and decoded one element at a time. Records with
+    a timestamp outside [start, end] (or an unparseable one, when a range is
+    given) are dropped as they are read; `columns` limits the kept fields.
+    """
+    start_key = normalize_ts(start) if start is not None else None
+    end_key = normalize_ts(end) if end is not None else None
+    keep = None if columns is None else set(columns) | {"timestamp"}
+    decoder = json.JSONDecoder()
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            block = f.read(JSON_BLOCK)
+            eof = not block
+            buf, pos = buf[pos:] + block, 0
+
+        def skip(chars):
+            # Advance past whitespace / separators, reading more text as needed
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        fill()
+        skip(" \t\r\n")
+        if buf[pos:pos + 1] != "[":
+            raise ValueError(f"{json_path} is not a JSON array")
+        pos += 1
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buf) or buf[pos] == "]":
+                return
+            try:
+                record, end_pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()                      # element continues in the next block
+                continue
+            pos = end_pos
+            if start_key or end_key:
+                key = normalize_ts(record.get("timestamp")) if isinstance(record, dict) else None
+                if key is None or (start_key and key < start_key) or (end_key and key > end_key):
+                    continue
+            if keep is not None:
+                record = {k: v for k, v in record.items() if k in keep}
+            yield record
+
+
+def iter_json_frames(json_path: Path = RAW_JSON, start=None, end=None, columns=None,
+                     chunksize: int = CHUNK_ROWS):
+    """iter_json_array() as DataFrame chunks (file order, not sorted)."""
+    return batched_frames(iter_json_array(json_path, start, end, columns), chunksize)
+
+
+class RawStore:
+    def __init__(self, path: Path = RAW_JSONL, index_path: Path = RAW_INDEX):
+        self.path = Path(path)
+        self.index_path = Path(index_path)
+
+    # ---------- index helpers ----------
+    def __len__(self) -> int:
+        return self.index_path.stat().st_size // REC_LEN if self.index_path.exists() else 0
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @staticmethod
+    def _key_at(f, i: int) -> str:
+        f.seek(i * REC_LEN)
+        return f.read(TS_LEN).decode("ascii")
+
+    @staticmethod
+    def _entry_at(f, i: int):
+        f.seek(i * REC_LEN)
+        rec = f.read(REC_LEN).decode("ascii")
+        return rec[:TS_LEN], int(rec[TS_LEN + 1:TS_LEN + 1 + OFFSET_LEN])
+
+    def _bisect_left(self, f, key: str, n: int) -> int:
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(f, mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __contains__(self, ts) -> bool:
+        key = normalize_ts(ts)
+        n = len(self)
+        if key is None or n == 0:
+            return False
+        with self.index_path.open("rb") as f:
+            i = self._bisect_left(f, key, n)
+            return i < n and self._key_at(f, i) == key
+
+    @staticmethod
+    def _format_entry(key: str, offset: int) -> bytes:
+        return f"{key} {offset:0{OFFSET_LEN}d}\n".encode("ascii")
+
+    # ---------- writing ----------
+    def append(self, record: dict) -> bool:
+        """Append one record; returns False (and writes nothing) for a duplicate timestamp."""
+        key = normalize_ts(record.get("timestamp"))
+        if key is None:
+            raise ValueError(f"Unparseable timestamp: {record.get('timestamp')!r}")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        n = len(self)
+        insert_at = n
+        if n:
+            with self.index_path.open("rb") as f:
+                insert_at = self._bisect_left(f, key, n)
+                if insert_at < n and self._key_at(f, insert_at) == key:
+                    return False
+
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        with self.path.open("ab") as f:
+            offset = f.tell()
+            f.write(line)
+
+        entry = self._format_entry(key, offset)
+        if insert_at == n:
+            # Normal case: observations arrive in time order → pure append
+            with self.index_path.open("ab") as f:
+                f.write(entry)
+        else:
+            # Rare out-of-order record: splice it into the sorted index
+            with self.index_path.open("r+b") as f:
+                f.seek(insert_at * REC_LEN)
+                tail = f.read()
+                f.seek(insert_at * REC_LEN)
+                f.write(entry + tail)
+        return True
+
+    def rebuild_index(self) -> int:
+        """Re-create the index from the .jsonl (first occurrence of a timestamp wins)."""
+        entries = {}
+        with self.path.open("rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    key = normalize_ts(json.loads(line).get("timestamp"))
+                    if key is not None and key not in entries:
+                        entries[key] = offset
+                offset += len(line)
+        tmp = self.index_path.with_suffix(".idx.tmp")
+        with tmp.open("wb") as f:
+            for key in sorted(entries):
+                f.write(self._format_entry(key, entries[key]))
+        os.replace(tmp, self.index_path)
+        return len(entries)
+
+    # ---------- reading ----------
+    def iter_records(self, start=None, end=None, columns=None):
+        """Yield raw records with start <= timestamp <= end, in timestamp order."""
+        n = len(self)
+        if n == 0:
+            return
+        start_key = normalize_ts(start) if start is not None else None
+        end_key = normalize_ts(end) if end is not None else None
+        keep = None if columns is None else set(columns) | {"timestamp"}
+
+        with self.index_path.open("rb") as idx, self.path.open("rb") as data:
+            i = self._bisect_left(idx, start_key, n) if start_key else 0
+            for j in range(i, n):
+                key, offset = self._entry_at(idx, j)
+                if end_key is not None and key > end_key:
+                    break
+                data.seek(offset)
+                record = json.loads(data.readline())
+                if keep is not None:
+                    record = {k: v for k, v in record.items() if k in keep}
+                yield record
+
+    def read_frame(self, start=None, end=None, columns=None):
+        """Records in [start, end] as one DataFrame (see records_frame)."""
+        return records_frame(list(self.iter_records(start, end, columns)))
+
+    def iter_frames(self, start=None, end=None, columns=None, chunksize: int = CHUNK_ROWS):
+        """Records in [start, end] as DataFrame chunks of at most `chunksize` rows, in timestamp order."""
+        return batched_frames(self.iter_records(start, end, columns), chunksize)
+
+
+def migrate_from_json(json_path: Path = RAW_JSON, store: RawStore = None) -> int:
+    """One-time conversion of the legacy JSON array into the JSONL store (file order kept)."""
+    store = store or RawStore()
+    if store.exists():
+        raise FileExistsError(f"{store.path} already exists — refusing to migrate twice.")
+    store.path.parent.mkdir(parents=True, exist_ok=True)
+    skipped = 0
+    with store.path.open("wb") as f:
+        for record in iter_json_array(json_path):     # streamed, never the whole array in memory
+            if normalize_ts(record.get("timestamp")) is None:
+                skipped += 1
+                continue
+            f.write((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+    n = store.rebuild_index()
+    if skipped:
+        print(f"⚠️ Skipped {skipped} records with unparseable timestamps")
+    return n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raw AQI JSONL store maintenance")
+    parser.add_argument("--migrate", action="store_true", help=f"convert {RAW_JSON} → {RAW_JSONL} + index")
+    parser.add_argument("--reindex", action="store_true", help=f"rebuild {RAW_INDEX} from {RAW_JSONL}")
+    args = parser.parse_args()
+
+    if args.migrate:
+        n = migrate_from_json()
+        print(f"✅ Migrated {n} records → {RAW_JSONL} (index: {RAW_INDEX})")
+    elif args.reindex:
+        n = RawStore().rebuild_index()
+        print(f"✅ Index rebuilt → {RAW_INDEX} ({n} timestamps)")
+    else:
+        parser.print_help()
@@ -0,0 +1,326 @@
+# scripts/run_pipeline.py
+"""
+Content-hash cached runner for the pipeline scripts.
+
+Each stage declares the command it runs, the files it reads and the files it
+writes. Its fingerprint is a SHA-256 over
+    • the contents of every input file (a missing file counts too; a glob that
+      matches nothing adds nothing, so an optional file appearing changes it)
+    • the code: the stage's script and every scripts/ module it imports, recursively
+    • its arguments and the environment variables that change its output
+A stage is skipped when its fingerprint equals the one recorded after its last
+successful run and its outputs are still exactly what that run wrote (every
+declared output path must exist; per-station paths come from the configured
+stations, so a single-station setup declares only the files it writes). Stages
+run in dependency order (a stage that reads another one's output runs after
+it), so an upstream stage that rewrote its outputs changes the downstream
+fingerprint and the downstream stage runs again.
+
+State is split in two files:
+    data/pipeline_state.json         committed by the hourly workflow, so the next run sees it;
+                                     content hashes only, so it changes only when a stage ran
+        {"stages": {name: {"fingerprint", "outputs": {path: sha256}}}}
+    data/pipeline_state.local.json   git-ignored, per machine (a fresh checkout resets mtimes)
+        {"hashes": {path: [size, mtime_ns, sha256]},   unchanged files aren't re-read
+         "timings": {name: {"duration_s", "finished"}},
+         "last_run": {...}}                            what the last run skipped / saved
+
+    python scripts/run_pipeline.py                  hourly: clean → forecast(s)
+    python scripts/run_pipeline.py train            train → direct model → backtest
+    python scripts/run_pipeline.py update           warm-start the forest with the new hours
+    python scripts/run_pipeline.py --dry-run        show what would run
+    python scripts/run_pipeline.py --force predict  rerun a stage regardless
+"""
+import argparse
+import ast
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from graphlib import TopologicalSorter
+from pathlib import Path
+
+from stations import load_stations
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STATE_PATH  = Path("data/pipeline_state.json")
+
+HASH_BLOCK = 1 << 20
+ENV_VARS = ["AQI_COMPACT", "FORECAST_SERVICE_URL"]     # read by the scripts, part of every fingerprint
+MODEL_FILES = ["models/RandomForest_final_model_v3.joblib", "models/RandomForest_final_model_v3.npz",
+               "models/scaler_v3.joblib", "models/feature_cols.json"]
+
+
+class Stage:
+    """One script invocation with its declared inputs / outputs (paths or globs)."""
+
+    def __init__(self, name: str, script: str, args=(), inputs=(), outputs=(), only_if: str = None):
+        self.name = name
+        self.script = script
+        self.args = list(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.only_if = only_if          # run only when this file exists (else: not applicable)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, {self.script!r})"
+
+    @property
+    def cmd(self) -> list:
+        return [sys.executable, str(SCRIPTS_DIR / self.script), *self.args]
+
+    def applicable(self) -> bool:
+        return self.only_if is None or Path(self.only_if).exists()
+
+    def depends_on(self, other: "Stage") -> bool:
+        return any(fnmatch(o, i) or fnmatch(i, o) for i in self.inputs for o in other.outputs)
+
+
+def station_files(*names) -> list:
+    """`names` in the data directory of every configured station (data/ for the default one)."""
+    return [str(s.data_dir / n) for s in load_stations() for n in names]
+
+
+PIPELINES = {
+    "hourly": [
+        Stage("clean", "clean_aqi_json_v2.py", ["--all-stations"],
+              inputs=["data/stations.json", *station_files("aqi_data.jsonl", "aqi_data.idx")],
+              outputs=station_files("hourly_clean_updated.csv", "hourly_clean_watermark.json")),
+        Stage("predict", "predict_live.py",
+              inputs=["data/hourly_clean_updated.csv", *MODEL_FILES],
+              outputs=["data/predictions_72h.csv"]),
+        Stage("predict_stations", "predict_live.py", ["--all-stations"],
+              inputs=["data/stations.json", *station_files("hourly_clean_updated.csv"), *MODEL_FILES],
+              outputs=["data/predictions_72h_stations.csv"],
+              only_if="data/stations.json"),
+    ],
+    "train": [
+        Stage("train", "train_model.py",
+              inputs=["data/final_training_dataset_v3.csv"],
+              outputs=["models/RandomForest_final_model_v3.joblib", "models/scaler_v3.joblib",
+                       "models/feature_cols.json", "models/cv_report.json",
+                       "models/feature_importance.csv"]),
+        Stage("train_direct", "train_direct_model.py",
+              inputs=["data/final_training_dataset_v3.csv", "models/scaler_v3.joblib",
+                      "models/feature_cols.json"],
+              outputs=["models/RandomForest_direct_v3.joblib"]),
+        Stage("backtest", "backtest.py",
+              inputs=["data/hourly_clean_updated.csv", *MODEL_FILES],
+              outputs=["models/backtest_horizons.csv", "models/backtest_report.json"]),
+    ],
+    "update": [
+        Stage("update", "train_model.py", ["--update"],
+              inputs=["data/final_training_dataset_v3.csv"],
+              outputs=["models/RandomForest_final_model_v3.joblib", "models/RandomForest_final_model_v3.npz",
+                       "models/feature_importance.csv", "models/forest_state.json"]),
+    ],
+}
+
+
+# ---------- fingerprints ----------
+def expand(patterns) -> list:
+    """
+    Concrete paths for paths / globs. A plain path is always kept (hashed as
+    "missing" if absent); a glob that matches nothing is optional and dropped.
+    """
+    paths = []
+    for p in patterns:
+        paths.extend(sorted(glob.glob(p)) if glob.has_magic(p) else [p])
+    return sorted(set(paths))
+
+
+class FileHasher:
+    """sha256 of file contents, cached on (size, mtime_ns) across runs."""
+
+    def __init__(self, cache: dict = None):
+        self.cache = dict(cache or {})
+
+    def __call__(self, path) -> str:
+        path = str(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return "missing"
+        cached = self.cache.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            while block := f.read(HASH_BLOCK):
+                h.update(block)
+        digest = h.hexdigest()
+        self.cache[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+
+def code_files(script: str) -> list:
+    """The script plus every sibling module it imports (recursively)."""
+    seen, todo = set(), [script[:-3] if script.endswith(".py") else script]
+    while todo:
+        mod = todo.pop()
+        path = SCRIPTS_DIR / f"{mod}.py"
+        if mod in seen or not path.exists():
+            continue
+        seen.add(mod)
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                todo.extend(a.name.split(".")[0] for a in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                todo.append(node.module.split(".")[0])
+    return sorted(str(SCRIPTS_DIR / f"{m}.py") for m in seen)
+
+
+def fingerprint(stage: Stage, hasher: FileHasher) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps({"script": stage.script, "args": stage.args,
+                         "env": {k: os.getenv(k, "") for k in ENV_VARS}}, sort_keys=True).encode())
+    for path in expand(stage.inputs):
+        h.update(f"in:{path}:{hasher(path)}\n".encode())
+    for path in code_files(stage.script):
+        h.update(f"code:{Path(path).name}:{hasher(path)}\n".encode())
+    return h.hexdigest()
+
+
+def output_hashes(stage: Stage, hasher: FileHasher) -> dict:
+    return {p: hasher(p) for p in expand(stage.outputs)}
+
+
+# ---------- state ----------
+def local_path(state_path: Path) -> Path:
+    """data/pipeline_state.json → data/pipeline_state.local.json"""
+    return state_path.with_suffix(".local.json")
+
+
+def _read_json(path: Path) -> dict:
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def load_state(path: Path = STATE_PATH) -> tuple:
+    """(committed state, local state); a pre-split state file is split on the fly."""
+    state, local = _read_json(path), _read_json(local_path(path))
+    local.setdefault("hashes", state.pop("hashes", {}))
+    local.setdefault("timings", {})
+    state.pop("last_run", None)
+    records = state.setdefault("stages", {})
+    for name, rec in records.items():
+        timing = {k: rec.pop(k) for k in ("duration_s", "finished") if k in rec}
+        if timing:
+            local["timings"].setdefault(name, timing)
+    return state, local
+
+
+def save_state(state: dict, local: dict, path: Path = STATE_PATH) -> None:
+    for target, data in ((path, state), (local_path(path), local)):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)    # deterministic: same content → same bytes
+        os.replace(tmp, target)
+
+
+def ordered(stages: list) -> list:
+    """Dependency order (declaration order among independent stages)."""
+    sorter = TopologicalSorter({s.name: [o.name for o in stages if o is not s and s.depends_on(o)]
+                                for s in stages})
+    sorter.prepare()                                    # raises CycleError on a cyclic declaration
+    by_name, out = {s.name: s for s in stages}, []
+    while sorter.is_active():
+        ready = sorted(sorter.get_ready(), key=lambda n: stages.index(by_name[n]))
+        out.extend(by_name[n] for n in ready)
+        sorter.done(*ready)
+    return out
+
+
+def is_fresh(stage: Stage, record: dict, fp: str, hasher: FileHasher) -> bool:
+    return (record is not None and record.get("fingerprint") == fp
+            and record.get("outputs") == output_hashes(stage, hasher)
+            and all(h != "missing" for h in record["outputs"].values()))
+
+
+# ---------- run ----------
+def run_pipeline(name: str = "hourly", force=(), dry_run: bool = False, state_path: Path = STATE_PATH) -> dict:
+    state, local = load_state(state_path)
+    hasher = FileHasher(local["hashes"])
+    records, timings = state["stages"], local["timings"]
+    summary = {"pipeline": name, "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+               "ran": [], "skipped": [], "not_applicable": [], "failed": None,
+               "ran_s": 0.0, "saved_s": 0.0}
+
+    for stage in ordered(PIPELINES[name]):
+        if not stage.applicable():
+            summary["not_applicable"].append(stage.name)
+            print(f"➖ {stage.name}: not applicable ({stage.only_if} missing)")
+            continue
+
+        fp = fingerprint(stage, hasher)
+        record = records.get(stage.name)
+        if stage.name not in force and "all" not in force and is_fresh(stage, record, fp, hasher):
+            saved = float(timings.get(stage.name, {}).get("duration_s", 0.0))
+            summary["skipped"].append(stage.name)
+            summary["saved_s"] += saved
+            print(f"⏩ {stage.name}: inputs and code unchanged — skipped (saves ~{saved:.1f}s)")
+            continue
+
+        if dry_run:
+            summary["ran"].append(stage.name)
+            print(f"🔄 {stage.name}: would run {' '.join(stage.cmd[1:])}")
+            continue
+
+        print(f"🚀 {stage.name}: {' '.join(stage.cmd[1:])}", flush=True)
+        t0 = time.perf_counter()
+        code = subprocess.run(stage.cmd).returncode
+        duration = time.perf_counter() - t0
+        summary["ran_s"] += duration
+        if code != 0:
+            summary["failed"] = stage.name
+            records.pop(stage.name, None)           # never skip a stage whose last run failed
+            timings.pop(stage.name, None)
+            print(f"❌ {stage.name} failed (exit {code}) after {duration:.1f}s — later stages not run")
+            break
+        records[stage.name] = {"fingerprint": fp, "outputs": output_hashes(stage, hasher)}
+        timings[stage.name] = {"duration_s": round(duration, 3),
+                               "finished": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+        summary["ran"].append(stage.name)
+        print(f"✅ {stage.name} done in {duration:.1f}s")
+
+    summary["ran_s"] = round(summary["ran_s"], 3)
+    summary["saved_s"] = round(summary["saved_s"], 3)
+    if not dry_run:
+        # Only hashes of files that still exist; keeps the cache from growing with deleted paths
+        local["hashes"] = {p: v for p, v in hasher.cache.items() if Path(p).exists()}
+        local["last_run"] = summary
+        save_state(state, local, state_path)
+
+    print(f"📊 {name}: ran {len(summary['ran'])} stage(s) {summary['ran']} in {summary['ran_s']:.1f}s, "
+          f"skipped {len(summary['skipped'])} {summary['skipped']} — saved ~{summary['saved_s']:.1f}s")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pipeline stages, skipping those whose inputs and code are unchanged.")
+    parser.add_argument("pipeline", nargs="?", choices=sorted(PIPELINES), default="hourly")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE",
+                        help="rerun these stages even if unchanged ('all' for every stage)")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would run")
+    parser.add_argument("--state", type=Path, default=STATE_PATH)
+    args = parser.parse_args()
+
+    unknown = set(args.force) - {s.name for s in PIPELINES[args.pipeline]} - {"all"}
+    if unknown:
+        parser.error(f"unknown stage(s) for {args.pipeline}: {sorted(unknown)}")
+
+    summary = run_pipeline(args.pipeline, force=set(args.force), dry_run=args.dry_run, state_path=args.state)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
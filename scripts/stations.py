@@ -0,0 +1,82 @@
+# scripts/stations.py
+"""
+Monitoring stations the pipeline runs for.
+
+The list lives in data/stations.json (optional):
+
+    [{"id": "karachi", "name": "Karachi", "lat": 24.8607, "lon": 67.0011, "q": "Karachi"},
+     {"id": "lahore",  "name": "Lahore",  "lat": 31.5204, "lon": 74.3587}]
+
+`q` is the WeatherAPI location query (defaults to "lat,lon"). The default
+station keeps the original single-city files in data/; every other station
+gets the same file names under data/stations/<id>/. In station-keyed frames
+the station id is the `station` column.
+"""
+import json
+from pathlib import Path
+
+from raw_store import RawStore
+
+STATIONS_FILE = Path("data/stations.json")
+STATIONS_DIR  = Path("data/stations")
+STATION_COL   = "station"
+
+DEFAULT_STATION_ID = "karachi"
+DEFAULT_STATIONS = [
+    {"id": DEFAULT_STATION_ID, "name": "Karachi", "lat": 24.8607, "lon": 67.0011, "q": "Karachi"},
+]
+
+
+class Station:
+    """One location + where its files live."""
+
+    def __init__(self, id: str, name: str, lat: float, lon: float, q: str = None):
+        self.id = id
+        self.name = name
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.q = q or f"{self.lat},{self.lon}"
+
+    def __repr__(self):
+        return f"Station({self.id!r}, {self.lat}, {self.lon})"
+
+    @property
+    def is_default(self) -> bool:
+        return self.id == DEFAULT_STATION_ID
+
+    @property
+    def data_dir(self) -> Path:
+        return Path("data") if self.is_default else STATIONS_DIR / self.id
+
+    def raw_store(self) -> RawStore:
+        return RawStore(self.data_dir / "aqi_data.jsonl", self.data_dir / "aqi_data.idx")
+
+    @property
+    def hourly_csv(self) -> Path:
+        return self.data_dir / "hourly_clean_updated.csv"
+
+    @property
+    def watermark(self) -> Path:
+        return self.data_dir / "hourly_clean_watermark.json"
+
+
+def load_stations(path: Path = STATIONS_FILE) -> list:
+    """All configured stations (just Karachi if data/stations.json does not exist)."""
+    entries = DEFAULT_STATIONS
+    if Path(path).exists():
+        with Path(path).open("r", encoding="utf-8") as f:
+            entries = json.load(f)
+    stations = [Station(**e) for e in entries]
+    ids = [s.id for s in stations]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate station ids in {path}: {ids}")
+    return stations
+
+
+def get_station(station_id: str = DEFAULT_STATION_ID, path: Path = STATIONS_FILE) -> Station:
+    for s in load_stations(path):
+        if s.id == station_id:
+            return s
+    if station_id == DEFAULT_STATION_ID:
+        return Station(**DEFAULT_STATIONS[0])
+    raise KeyError(f"Unknown station {station_id!r} (see {path})")
@@ -0,0 +1,140 @@
+# scripts/synthetic_data.py
+"""
+Synthetic data with the same schemas as the real inputs, at any size:
+
+- raw observations        (data/aqi_data.jsonl + .idx, like fetch_aqi_data.py writes;
+                           optionally the legacy data/aqi_data.json array too). As in the
+                           real store: daily weather-only readings over the historic window,
+                           a day of old OpenWeather-style records (with aqi/no/nh3), then
+                           the hourly live observations
+- Open-Meteo pollutants    (data/historic_openmeteo_pollutants.json)
+- WeatherAPI weather       (data/historic_weather.json)
+
+Used by the benchmark harness; values follow a daily cycle plus noise, live
+observations arrive a few minutes past the hour with occasional gaps/nulls.
+"""
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from raw_store import RawStore
+
+POLLUTANT_LEVELS = {"co": (600, 200), "no2": (20, 10), "o3": (55, 20), "so2": (20, 8)}
+WEATHER_LEVELS = {"temp_c": (29, 3), "humidity": (70, 10), "wind_kph": (20, 8), "pressure_mb": (1005, 4)}
+
+
+def _series(rng, hours: int, levels: dict) -> dict:
+    """Daily-cycle + noise series for each column (non-negative, rounded like the APIs)."""
+    t = np.arange(hours)
+    out = {}
+    for i, (col, (mean, amp)) in enumerate(levels.items()):
+        cycle = amp * np.sin(2 * np.pi * (t % 24) / 24 + i)
+        values = np.maximum(mean + cycle + rng.normal(0, amp / 3, hours), 0)
+        out[col] = np.round(values, 0 if col == "humidity" else 2)
+    return out
+
+
+def raw_records(start: datetime, hours: int, seed: int = 0, gap_rate: float = 0.03, null_rate: float = 0.01):
+    """Live observations (fetch_aqi_data.py schema), roughly one per hour."""
+    rng = np.random.default_rng(seed)
+    values = {**_series(rng, hours, POLLUTANT_LEVELS), **_series(rng, hours, WEATHER_LEVELS)}
+    minutes = rng.integers(0, 15, hours)
+    seconds = rng.integers(0, 60, hours)
+    keep = rng.random(hours) >= gap_rate
+    nulls = rng.random((hours, len(values))) < null_rate
+    cols = ["o3", "co", "no2", "so2", "temp_c", "humidity", "wind_kph", "pressure_mb"]
+    for h in np.flatnonzero(keep):
+        ts = start + timedelta(hours=int(h), minutes=int(minutes[h]), seconds=int(seconds[h]))
+        rec = {"timestamp": ts.strftime("%Y-%m-%d %H:%M:%S")}
+        for j, c in enumerate(cols):
+            v = values[c][h]
+            rec[c] = None if nulls[h, j] else (int(v) if c == "humidity" else float(v))
+        yield rec
+
+
+def daily_weather_records(start: datetime, days: int, seed: int = 3):
+    """Early raw records: one weather reading per day at noon, pollutants null."""
+    rng = np.random.default_rng(seed)
+    values = _series(rng, days, WEATHER_LEVELS)
+    for d in range(days):
+        ts = (start + timedelta(days=d)).replace(hour=12, minute=0)
+        rec = {"timestamp": ts.strftime("%Y-%m-%d %H:%M"), "o3": None, "co": None, "no2": None, "so2": None}
+        rec.update({c: (int(values[c][d]) if c == "humidity" else float(values[c][d])) for c in WEATHER_LEVELS})
+        yield rec
+
+
+def legacy_records(start: datetime, hours: int, seed: int = 4):
+    """Old OpenWeather-style raw records (aqi + no/nh3, no weather), every ~20 minutes."""
+    rng = np.random.default_rng(seed)
+    n = hours * 3
+    values = _series(rng, n, POLLUTANT_LEVELS)
+    aqi = rng.integers(100, 200, n)
+    for i in range(n):
+        ts = start + timedelta(minutes=20 * i)
+        rec = {"timestamp": ts.strftime("%Y-%m-%d %H:%M:%S"), "aqi": int(aqi[i])}
+        rec.update({"co": float(values["co"][i]), "no": 0.01, "no2": float(values["no2"][i]),
+                    "o3": float(values["o3"][i]), "so2": float(values["so2"][i]), "nh3": 0})
+        yield rec
+
+
+def openmeteo_records(start: datetime, hours: int, seed: int = 1):
+    """historic_openmeteo_pollutants.json schema ("2025-04-01T00:00")."""
+    rng = np.random.default_rng(seed)
+    values = _series(rng, hours, POLLUTANT_LEVELS)
+    for h in range(hours):
+        ts = start + timedelta(hours=h)
+        yield {"timestamp": ts.strftime("%Y-%m-%dT%H:%M"), **{c: float(values[c][h]) for c in POLLUTANT_LEVELS}}
+
+
+def weather_records(start: datetime, hours: int, seed: int = 2):
+    """historic_weather.json schema ("2025-04-01 00:00")."""
+    rng = np.random.default_rng(seed)
+    values = _series(rng, hours, WEATHER_LEVELS)
+    for h in range(hours):
+        ts = start + timedelta(hours=h)
+        rec = {"timestamp": ts.strftime("%Y-%m-%d %H:%M")}
+        rec.update({c: (int(values[c][h]) if c == "humidity" else float(values[c][h])) for c in WEATHER_LEVELS})
+        yield rec
+
+
+def write_raw_store(records, store: RawStore) -> int:
+    """Bulk-write records as JSONL and build the index once (faster than append() per record)."""
+    store.path.parent.mkdir(parents=True, exist_ok=True)
+    with store.path.open("w", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+    return store.rebuild_index()
+
+
+def write_dataset(root, live_days: int, historic_days: int, seed: int = 0, legacy_json: bool = False) -> dict:
+    """
+    Populate root/data like the real repo: live observations from 26 Jul 2025 onward
+    (clean_aqi_json_v2.START_DATE) and historic data ending 21 Jul 2025
+    (the clean_and_merge_data.py window end).
+    """
+    from itertools import chain
+
+    data = Path(root) / "data"
+    data.mkdir(parents=True, exist_ok=True)
+    live_start = datetime(2025, 7, 26, 0, 0, 0)
+    hist_end = datetime(2025, 7, 21, 23, 0, 0)
+    hist_start = hist_end - timedelta(days=historic_days) + timedelta(hours=1)
+
+    store = RawStore(data / "aqi_data.jsonl", data / "aqi_data.idx")
+    n_live = write_raw_store(chain(
+        daily_weather_records(hist_start, historic_days, seed + 3),
+        legacy_records(datetime(2025, 7, 17, 11, 0, 0), 24, seed + 4),
+        raw_records(live_start, live_days * 24, seed),
+    ), store)
+    if legacy_json:
+        with (data / "aqi_data.json").open("w", encoding="utf-8") as f:
+            json.dump(list(store.iter_records()), f, indent=2)
+
+    n_hist = historic_days * 24
+    with (data / "historic_openmeteo_pollutants.json").open("w", encoding="utf-8") as f:
+        json.dump(list(openmeteo_records(hist_start, n_hist, seed + 1)), f, indent=2)
+    with (data / "historic_weather.json").open("w", encoding="utf-8") as f:
+        json.dump(list(weather_records(hist_start, n_hist, seed + 2)), f, indent=2)
+    return {"raw_records": n_live, "historic_hours": n_hist}
@@ -0,0 +1,134 @@
+# scripts/train_direct_model.py
+"""
+Train the direct multi-horizon RandomForest used by `predict_live.py --mode direct`.
+
+Same setup as the v3 model (final_training_dataset_v3.csv → feature_engineering_pipeline
+→ models/feature_cols.json → scaler_v3), but every row is expanded into one sample per
+horizon (1..72h) with the horizon as an extra feature.
+
+    python scripts/train_direct_model.py             # train + save models/RandomForest_direct_v3.joblib
+    python scripts/train_direct_model.py --compare   # also report latency/accuracy vs recursive mode
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import RandomForestRegressor
+
+from feature_store import load_features
+from columnar_store import load_frame
+from flat_forest import FlatForest, flat_path
+from direct_forecast import build_direct_training_set, direct_forecast
+from predict_live import recursive_forecast, FORECAST_HOURS
+
+TRAIN_CSV     = Path("data/final_training_dataset_v3.csv")
+FEATCOLS_PATH = Path("models/feature_cols.json")
+SCALER_PATH   = Path("models/scaler_v3.joblib")
+OUT_MODEL     = Path("models/RandomForest_direct_v3.joblib")
+OUT_REPORT    = Path("models/direct_vs_recursive.json")
+
+HOLDOUT_FRAC = 0.2      # last 20% of the timeline for --compare
+ORIGIN_EVERY = 24       # one forecast origin per day in the holdout
+DIRECT_MIN_LEAF = 20
+
+
+def load_training_frame():
+    df = load_frame(TRAIN_CSV)
+    df = df.sort_values("timestamp").reset_index(drop=True)
+    df_fe = load_features(TRAIN_CSV, df)
+    with FEATCOLS_PATH.open("r", encoding="utf-8") as f:
+        feature_cols = json.load(f)
+    scaler = joblib.load(SCALER_PATH)
+    return df, df_fe, feature_cols, scaler
+
+
+def fit_direct(df_fe, X_scaled, n_estimators):
+    X, y = build_direct_training_set(df_fe, X_scaled, FORECAST_HOURS)
+    print(f"🧱 Direct training set: {X.shape[0]} (origin, horizon) rows × {X.shape[1]} features")
+    # 72x more rows than the one-step model: a large leaf size (DIRECT_MIN_LEAF) keeps the artifact size sane
+    model = RandomForestRegressor(n_estimators=n_estimators, min_samples_leaf=DIRECT_MIN_LEAF,
+                                  random_state=42, n_jobs=-1)
+    model.fit(X, y)
+    return model
+
+
+def fmt(value, spec: str) -> str:
+    """format(value, spec), or "n/a" for a metric that could not be computed."""
+    return "n/a" if value is None else format(value, spec)
+
+
+def compare(df, df_fe, feature_cols, scaler, n_estimators):
+    """Hold out the tail of the timeline and score both modes on the same origins."""
+    cutoff = df_fe["timestamp"].iloc[int(len(df_fe) * (1 - HOLDOUT_FRAC))]
+    train_fe = df_fe[df_fe["timestamp"] < cutoff].reset_index(drop=True)
+    X_train = scaler.transform(train_fe[feature_cols])
+
+    print("🤖 Training recursive (one-step) and direct models on the pre-cutoff data...")
+    rec_model = RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=-1)
+    rec_model.fit(X_train, train_fe["aqi"])
+    dir_model = fit_direct(train_fe, X_train, n_estimators)
+
+    truth = pd.Series(df["aqi"].to_numpy(), index=df["timestamp"])
+    truth = truth[~truth.index.duplicated(keep="last")]
+    origins = df_fe[df_fe["timestamp"] >= cutoff].iloc[::ORIGIN_EVERY]
+
+    results = {"recursive": {"err": [], "sec": []}, "direct": {"err": [], "sec": []}}
+    for _, origin in origins.iterrows():
+        t0 = origin["timestamp"]
+        hist = df[df["timestamp"] <= t0]
+
+        start = time.perf_counter()
+        rec = recursive_forecast(hist, t0, feature_cols, rec_model, scaler, FORECAST_HOURS)
+        results["recursive"]["sec"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        origin_scaled = scaler.transform(origin[feature_cols].to_frame().T.astype(float))
+        dirf = direct_forecast(dir_model, origin_scaled, t0, FORECAST_HOURS)
+        results["direct"]["sec"].append(time.perf_counter() - start)
+
+        for name, pred in (("recursive", rec), ("direct", dirf)):
+            actual = truth.reindex(pred["timestamp"]).to_numpy()
+            ok = ~np.isnan(actual)
+            results[name]["err"].extend((pred["pred_aqi"].to_numpy()[ok] - actual[ok]).tolist())
+
+    report = {"origins": len(origins), "cutoff": str(cutoff)}
+    for name, r in results.items():
+        err = np.asarray(r["err"])
+        report[name] = {
+            "mae": float(np.abs(err).mean()) if err.size else None,
+            "rmse": float(np.sqrt((err ** 2).mean())) if err.size else None,
+            "latency_ms_per_forecast": float(np.mean(r["sec"]) * 1000) if r["sec"] else None,
+        }
+        print(f"📊 {name:9s}  MAE={fmt(report[name]['mae'], '.3f')}  RMSE={fmt(report[name]['rmse'], '.3f')}  "
+              f"latency={fmt(report[name]['latency_ms_per_forecast'], '.1f')} ms/forecast")
+    return report
+
+
+def main(n_estimators: int = 100, run_compare: bool = False):
+    df, df_fe, feature_cols, scaler = load_training_frame()
+    print(f"✅ Dataset loaded: {len(df_fe)} feature rows")
+
+    if run_compare:
+        report = compare(df, df_fe, feature_cols, scaler, n_estimators)
+        with OUT_REPORT.open("w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Comparison report saved → {OUT_REPORT}")
+
+    print("🤖 Training direct multi-horizon model on the full dataset...")
+    model = fit_direct(df_fe, scaler.transform(df_fe[feature_cols]), n_estimators)
+    joblib.dump(model, OUT_MODEL)
+    FlatForest.from_sklearn(model).save(flat_path(OUT_MODEL))   # compact export used by predict_live.py
+    print(f"🎉 Direct model saved → {OUT_MODEL}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the direct multi-horizon AQI model")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--compare", action="store_true",
+                        help="hold out the last 20%% and report latency/accuracy vs recursive mode")
+    args = parser.parse_args()
+    main(args.n_estimators, args.compare)
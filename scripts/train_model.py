@@ -1,98 +1,379 @@
-# 🚨 NOTE: This script was part of an earlier approach and is NOT used in the final pipeline.
-# It is kept here for reference only.
-
 """
 train_model.py
 ---------------
-✅ Reads cleaned training dataset
-✅ Adds time-based features (hour, day, month, weekday)
-✅ Splits data into train & test
-✅ Trains a Random Forest Regressor
-✅ Saves the trained model (aqi_model.pkl)
-✅ Exports feature importance to CSV (feature_importance.csv)
+✅ Reads the training dataset (default: final_training_dataset_v3.csv)
+✅ Reads features from the persisted feature store (same rows as predict_live.py;
+   only hours added since the last run are engineered)
+✅ Walk-forward time-series folds (train on the past, score on the next block — no leakage)
+✅ Hyperparameter grid × folds evaluated in a process pool; the feature matrix is
+   written once as float32 .npy and memory-mapped by every worker (no copies)
+✅ Every (config, fold) result is cached → an interrupted or extended search resumes
+✅ Refits the best config on all rows and saves model + scaler + feature_cols.json
+✅ Per-config timing/score report (models/cv_report.json) + feature importances
+✅ --update: warm-start incremental update instead of a full retrain — new trees
+   are fitted on the recent window (new hours + WINDOW_HOURS before them), the
+   oldest trees are retired so the forest never exceeds --max-trees, and the
+   number of new trees follows the number of new rows, so an update costs in
+   proportion to the new data. Tree ages live in models/forest_state.json.
+
+    python scripts/train_model.py                      # full grid, all cores
+    python scripts/train_model.py --folds 3 --workers 2 --grid quick
+    python scripts/train_model.py --update             # daily: add trees for the new hours
 """
 
-import pandas as pd
-import numpy as np
-import joblib
+import argparse
+import hashlib
+import itertools
+import json
+import math
 import os
-from sklearn.model_selection import train_test_split
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
 
-# ========================
-# 📥 1. LOAD THE DATASET
-# ========================
-print("📥 Loading dataset...")
-df = pd.read_csv("data/final_training_dataset.csv")
+from columnar_store import load_frame
+from flat_forest import FlatForest, flat_path
+from feature_store import load_features
 
-print(f"✅ Dataset loaded: {df.shape[0]} rows, {df.shape[1]} columns")
+TRAIN_CSV     = Path("data/final_training_dataset_v3.csv")
+MODEL_PATH    = Path("models/RandomForest_final_model_v3.joblib")
+SCALER_PATH   = Path("models/scaler_v3.joblib")
+FEATCOLS_PATH = Path("models/feature_cols.json")
+REPORT_PATH   = Path("models/cv_report.json")
+IMPORTANCE_CSV = Path("models/feature_importance.csv")
+CACHE_DIR     = Path("models/cv_cache")      # per-(dataset, config, fold) results
+STATE_PATH    = Path("models/forest_state.json")   # per-tree training cut-off, for --update
+
+WINDOW_HOURS  = 24 * 30    # --update fits new trees on the new hours + this much recent history
+
+PARAM_GRIDS = {
+    "full": {
+        "n_estimators": [100, 200],
+        "max_depth": [None, 20],
+        "min_samples_leaf": [1, 5],
+        "max_features": [1.0, 0.5],
+    },
+    "quick": {
+        "n_estimators": [50, 100],
+        "min_samples_leaf": [1, 5],
+    },
+}
 
 # ========================
-# 🛠 2. FEATURE ENGINEERING
+# 🧮 WORKER SIDE
 # ========================
-print("🛠 Adding time-based features...")
+_shared = {}
 
-# Convert timestamp to datetime (safe conversion)
-df['timestamp'] = pd.to_datetime(df['timestamp'])
 
-# Extract useful time components
-df['hour'] = df['timestamp'].dt.hour
-df['day'] = df['timestamp'].dt.day
-df['month'] = df['timestamp'].dt.month
-df['dayofweek'] = df['timestamp'].dt.dayofweek
+def _init_worker(x_path: str, y_path: str):
+    """Each worker maps the same on-disk arrays (read-only, shared page cache)."""
+    _shared["X"] = np.load(x_path, mmap_mode="r")
+    _shared["y"] = np.load(y_path, mmap_mode="r")
 
-# ========================
-# 🗑 3. PREPARE DATA FOR ML
-# ========================
-# Drop columns not needed for training
-X = df.drop(columns=['aqi', 'timestamp'])  # Model doesn’t need raw timestamp
-y = df['aqi']
 
-print(f"✅ Features shape: {X.shape}, Target shape: {y.shape}")
+def _fit_fold(params: dict, fold: int, train_end: int, test_end: int) -> dict:
+    """Fit on rows [0, train_end), score on [train_end, test_end)."""
+    X, y = _shared["X"], _shared["y"]
+    start = time.perf_counter()
+    model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+    model.fit(X[:train_end], y[:train_end])
+    fit_s = time.perf_counter() - start
+    pred = model.predict(X[train_end:test_end])
+    y_test = y[train_end:test_end]
+    return {
+        "fold": fold,
+        "n_train": int(train_end),
+        "n_test": int(test_end - train_end),
+        "mae": float(mean_absolute_error(y_test, pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, pred))),
+        "fit_s": round(fit_s, 3),
+        "total_s": round(time.perf_counter() - start, 3),
+    }
 
-# ========================
-# 📊 4. TRAIN/TEST SPLIT
-# ========================
-print("📊 Splitting into train & test sets...")
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
-print(f"✅ Training: {X_train.shape}, Testing: {X_test.shape}")
 
 # ========================
-# 🤖 5. TRAIN RANDOM FOREST MODEL
+# 🔄 INCREMENTAL UPDATE
 # ========================
-print("🤖 Training Random Forest model...")
-model = RandomForestRegressor(n_estimators=200, random_state=42)
-model.fit(X_train, y_train)
-print("✅ Model training complete.")
+def trees_for_rows(new_rows: int, window_rows: int, max_trees: int) -> int:
+    """New trees in proportion to the new rows' share of the window (at least 1, at most the whole forest)."""
+    return min(max_trees, max(1, math.ceil(max_trees * new_rows / max(window_rows, 1))))
 
-# ========================
-# 📈 6. EVALUATE MODEL
-# ========================
-y_pred = model.predict(X_test)
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-print(f"📊 RMSE on test data: {rmse:.2f}")
 
-# ========================
-# 💾 7. SAVE MODEL
-# ========================
-os.makedirs("models", exist_ok=True)
-joblib.dump(model, "models/aqi_model.pkl")
-print("🎉 Model saved to models/aqi_model.pkl")
+def warm_start_update(model: RandomForestRegressor, X, y, new_trees: int, max_trees: int, seed: int) -> int:
+    """
+    Fit `new_trees` more trees on (X, y) with warm start, then retire the
+    oldest so at most `max_trees` remain (estimators_ is in fitting order).
+    Returns the number of retired trees; `model` is updated in place.
+    """
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees, random_state=seed)
+    model.fit(X, y)
+    retired = max(0, len(model.estimators_) - max_trees)
+    if retired:
+        model.estimators_ = model.estimators_[retired:]
+    model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+    return retired
+
+
+def load_forest_state(df_fe: pd.DataFrame, n_trees: int) -> dict:
+    """forest_state.json, or (for a model trained before it existed) all trees as of the last CV report."""
+    if STATE_PATH.exists():
+        with STATE_PATH.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    if not REPORT_PATH.exists():
+        raise FileNotFoundError(f"Neither {STATE_PATH} nor {REPORT_PATH}: run a full train first.")
+    with REPORT_PATH.open("r", encoding="utf-8") as f:
+        rows = json.load(f)["rows"]
+    until = str(df_fe["timestamp"].iloc[min(rows, len(df_fe)) - 1])
+    return {"trained_until": until, "max_trees": n_trees, "updates": 0, "tree_until": [until] * n_trees}
+
+
+def save_forest_state(state: dict) -> None:
+    tmp = STATE_PATH.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_PATH)
+
+
+def save_model(model, feature_cols: list) -> None:
+    """Model + flat export (used by predict_live.py) + feature importances."""
+    MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, MODEL_PATH)
+    FlatForest.from_sklearn(model).save(flat_path(MODEL_PATH))
+    pd.DataFrame({"feature": feature_cols, "importance": model.feature_importances_}) \
+        .sort_values(by="importance", ascending=False).to_csv(IMPORTANCE_CSV, index=False)
+
+
+def update_model(train_csv: Path = TRAIN_CSV, new_trees: int = None, max_trees: int = None,
+                 window_hours: int = WINDOW_HOURS, compact: bool = False):
+    """--update: warm-start the saved forest with trees for the rows added since it was trained."""
+    for path in (MODEL_PATH, SCALER_PATH, FEATCOLS_PATH):
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found: run a full train first.")
+
+    print(f"📥 Loading {train_csv}...")
+    df = load_frame(train_csv).sort_values("timestamp").reset_index(drop=True)
+    df_fe = load_features(train_csv, df, compact)
+    feature_cols = [c for c in df_fe.columns if c not in ["timestamp", "aqi"]]
+    with FEATCOLS_PATH.open("r", encoding="utf-8") as f:
+        if json.load(f) != feature_cols:
+            raise ValueError(f"Feature set differs from {FEATCOLS_PATH}: run a full train.")
+
+    model = joblib.load(MODEL_PATH)
+    state = load_forest_state(df_fe, len(model.estimators_))
+    trained_until = pd.Timestamp(state["trained_until"])
+    new_rows = int((df_fe["timestamp"] > trained_until).sum())
+    if new_rows == 0:
+        print(f"⏩ No rows after {trained_until}; {MODEL_PATH} unchanged.")
+        return
+
+    # Window: every new row + `window_hours` of history before the newest one
+    last = df_fe["timestamp"].max()
+    window = df_fe[df_fe["timestamp"] > min(trained_until, last - pd.Timedelta(hours=window_hours))]
+    max_trees = max_trees or state.get("max_trees") or len(model.estimators_)
+    new_trees = new_trees or trees_for_rows(new_rows, len(window), max_trees)
+
+    # The scaler stays as fitted: the existing trees' thresholds are in its units
+    scaler = joblib.load(SCALER_PATH)
+    X = scaler.transform(window[feature_cols])
+    y = window["aqi"].to_numpy(dtype=np.float64)
+
+    print(f"🔄 {new_rows} new row(s) since {trained_until}: fitting {new_trees} tree(s) on the last "
+          f"{len(window)} rows")
+    start = time.perf_counter()
+    model.set_params(n_jobs=-1)
+    retired = warm_start_update(model, X, y, new_trees, max_trees, seed=42 + state["updates"] + 1)
+    fit_s = time.perf_counter() - start
+
+    save_model(model, feature_cols)
+    state["tree_until"] = state["tree_until"][retired:] + [str(last)] * new_trees
+    state.update(trained_until=str(last), max_trees=max_trees, updates=state["updates"] + 1,
+                 last_update={"new_rows": new_rows, "window_rows": int(len(window)), "new_trees": new_trees,
+                              "retired_trees": retired, "fit_s": round(fit_s, 3)})
+    save_forest_state(state)
+    print(f"🎉 Model → {MODEL_PATH}: +{new_trees} / -{retired} tree(s) → {len(model.estimators_)} "
+          f"(fit {fit_s:.1f} s; oldest tree trained until {state['tree_until'][0]})")
+
 
 # ========================
-# 📊 8. EXPORT FEATURE IMPORTANCES
+# 🗂 SEARCH
 # ========================
-print("📊 Saving feature importances...")
+def expand_grid(grid: dict) -> list:
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def config_id(params: dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def walk_forward_folds(n_rows: int, n_folds: int, gap: int = 0) -> list:
+    """(train_end, test_end) per fold: expanding training window, next block as test."""
+    folds = []
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=n_folds, gap=gap).split(np.arange(n_rows)):
+        folds.append((int(train_idx[-1]) + 1, int(test_idx[-1]) + 1))
+    return folds
+
+
+def dataset_fingerprint(X: np.ndarray, y: np.ndarray, feature_cols: list, folds: list) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps([feature_cols, folds]).encode("utf-8"))
+    h.update(X.tobytes())
+    h.update(y.tobytes())
+    return h.hexdigest()[:16]
+
+
+def run_search(X: np.ndarray, y: np.ndarray, configs: list, folds: list, cache_dir: Path, workers: int) -> list:
+    """Evaluate every (config, fold) not cached yet on a process pool; return per-config summaries."""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    x_path, y_path = cache_dir / "X.npy", cache_dir / "y.npy"
+    if not x_path.exists():
+        np.save(x_path, X)
+        np.save(y_path, y)
+
+    def cached_path(params, fold):
+        return cache_dir / f"{config_id(params)}_fold{fold}.json"
+
+    results = {}
+    todo = []
+    for params in configs:
+        for fold, (train_end, test_end) in enumerate(folds):
+            path = cached_path(params, fold)
+            if path.exists():
+                with path.open("r", encoding="utf-8") as f:
+                    results[(config_id(params), fold)] = json.load(f)
+            else:
+                todo.append((params, fold, train_end, test_end))
+    print(f"🧮 {len(configs)} configs × {len(folds)} folds: {len(results)} cached, {len(todo)} to run "
+          f"on {workers} worker(s)")
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(x_path), str(y_path))) as pool:
+            futures = {pool.submit(_fit_fold, *task): task for task in todo}
+            for fut in as_completed(futures):
+                params, fold = futures[fut][:2]
+                res = fut.result()
+                res["params"] = params
+                tmp = cached_path(params, fold).with_suffix(".tmp")
+                with tmp.open("w", encoding="utf-8") as f:
+                    json.dump(res, f, indent=2)
+                os.replace(tmp, cached_path(params, fold))
+                results[(config_id(params), fold)] = res
+                print(f"  ✅ {params} fold {fold}: MAE {res['mae']:.2f} ({res['fit_s']:.1f} s)")
+
+    summaries = []
+    for params in configs:
+        per_fold = [results[(config_id(params), k)] for k in range(len(folds))]
+        maes = np.array([r["mae"] for r in per_fold])
+        rmses = np.array([r["rmse"] for r in per_fold])
+        summaries.append({
+            "config": config_id(params),
+            "params": params,
+            "mae_mean": float(maes.mean()),
+            "mae_std": float(maes.std()),
+            "rmse_mean": float(rmses.mean()),
+            "fit_s_total": round(sum(r["fit_s"] for r in per_fold), 3),
+            "folds": [{k: v for k, v in r.items() if k != "params"} for r in per_fold],
+        })
+    return sorted(summaries, key=lambda s: s["mae_mean"])
+
+
+def main(train_csv: Path = TRAIN_CSV, grid: str = "full", n_folds: int = 5, gap: int = 0,
+         workers: int = None, cache_dir: Path = CACHE_DIR, compact: bool = False):
+    workers = workers or os.cpu_count() or 1
+
+    # ========================
+    # 📥 1. LOAD + FEATURES
+    # ========================
+    print(f"📥 Loading {train_csv}...")
+    df = load_frame(train_csv).sort_values("timestamp").reset_index(drop=True)
+    df_fe = load_features(train_csv, df, compact)
+    feature_cols = [c for c in df_fe.columns if c not in ["timestamp", "aqi"]]
+    # float32 is what the trees use internally → workers fit on the mmap without a copy.
+    # Scaling is skipped during CV: per-feature affine transforms do not change RF splits.
+    X = np.ascontiguousarray(df_fe[feature_cols].to_numpy(dtype=np.float32))
+    y = df_fe["aqi"].to_numpy(dtype=np.float64)
+    print(f"✅ Features: {X.shape[0]} rows × {X.shape[1]} columns")
+
+    # ========================
+    # 📊 2. WALK-FORWARD CV + GRID
+    # ========================
+    folds = walk_forward_folds(len(X), n_folds, gap)
+    fingerprint = dataset_fingerprint(X, y, feature_cols, folds)
+    start = time.perf_counter()
+    summaries = run_search(X, y, expand_grid(PARAM_GRIDS[grid]), folds, cache_dir / fingerprint, workers)
+    search_s = time.perf_counter() - start
+
+    best = summaries[0]
+    print("\n📊 Configs by mean walk-forward MAE:")
+    for s in summaries:
+        print(f"  {s['mae_mean']:7.2f} ± {s['mae_std']:5.2f}  RMSE {s['rmse_mean']:7.2f}  "
+              f"{s['fit_s_total']:7.1f} s  {s['params']}")
+
+    # ========================
+    # 🤖 3. REFIT BEST ON ALL ROWS
+    # ========================
+    print(f"\n🤖 Refitting best config on all rows: {best['params']}")
+    scaler = StandardScaler().fit(df_fe[feature_cols])
+    model = RandomForestRegressor(random_state=42, n_jobs=-1, **best["params"])
+    model.fit(scaler.transform(df_fe[feature_cols]), y)
+
+    # ========================
+    # 💾 4. SAVE ARTIFACTS + REPORT
+    # ========================
+    save_model(model, feature_cols)
+    joblib.dump(scaler, SCALER_PATH)
+    with FEATCOLS_PATH.open("w", encoding="utf-8") as f:
+        json.dump(feature_cols, f)
+    # Every tree has seen all rows; --update builds on this
+    until = str(df_fe["timestamp"].max())
+    save_forest_state({"trained_until": until, "max_trees": len(model.estimators_), "updates": 0,
+                       "tree_until": [until] * len(model.estimators_)})
+
+    report = {
+        "dataset": str(train_csv),
+        "fingerprint": fingerprint,
+        "rows": int(len(X)),
+        "folds": [{"train_rows": a, "test_rows": b - a} for a, b in folds],
+        "workers": workers,
+        "search_s": round(search_s, 3),
+        "best": best["params"],
+        "configs": summaries,
+    }
+    with REPORT_PATH.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
 
-importances_df = pd.DataFrame({
-    'feature': X.columns,
-    'importance': model.feature_importances_
-}).sort_values(by='importance', ascending=False)
+    print(f"🎉 Model → {MODEL_PATH}, scaler → {SCALER_PATH}, features → {FEATCOLS_PATH}")
+    print(f"✅ Report → {REPORT_PATH} (search {search_s:.1f} s)")
 
-importances_df.to_csv("models/feature_importance.csv", index=False)
-print("✅ Feature importances saved to models/feature_importance.csv")
 
-print("\n🚀 Training complete! Model + feature importance ready.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward CV + parallel hyperparameter search")
+    parser.add_argument("--data", type=Path, default=TRAIN_CSV)
+    parser.add_argument("--grid", choices=sorted(PARAM_GRIDS), default="full")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--gap", type=int, default=0, help="rows left out between train and test")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    parser.add_argument("--compact", action="store_true", help="float32 / int8 frames while building features")
+    parser.add_argument("--update", action="store_true",
+                        help="warm-start update of the saved model with the rows added since (no CV, no refit)")
+    parser.add_argument("--new-trees", type=int, default=None,
+                        help="--update: trees to add (default: in proportion to the new rows)")
+    parser.add_argument("--max-trees", type=int, default=None,
+                        help="--update: forest size bound, oldest trees retired (default: the current size)")
+    parser.add_argument("--window", type=int, default=WINDOW_HOURS,
+                        help="--update: hours of recent history the new trees are fitted on")
+    args = parser.parse_args()
+    if args.update:
+        update_model(args.data, args.new_trees, args.max_trees, args.window, args.compact)
+    else:
+        main(args.data, args.grid, args.folds, args.gap, args.workers, args.cache_dir, args.compact)